@@ -4,4 +4,23 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Импорт после настройки Django: модуль приложения читает настройки
+from surveys.yandex_forms import close_clients  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """Django не обрабатывает lifespan ASGI — отвечаем на него сами,
+    чтобы при остановке сервера закрыть общий HTTP-клиент Яндекс Форм
+    (он живёт в том же цикле событий, что и запросы)."""
+    if scope["type"] != "lifespan":
+        return await django_application(scope, receive, send)
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_clients()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
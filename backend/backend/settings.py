@@ -7,11 +7,20 @@ load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# development | production
+DJANGO_ENV = os.getenv('DJANGO_ENV', 'development').strip().lower()
+IS_PRODUCTION = DJANGO_ENV == 'production'
+
 SECRET_KEY = os.getenv('SECRET_KEY')
 
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'False' if IS_PRODUCTION else 'True') == 'True'
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'backend', '0.0.0.0']
+ALLOWED_HOSTS += [
+    host.strip()
+    for host in os.getenv('ALLOWED_HOSTS', '').split(',')
+    if host.strip()
+]
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -25,6 +34,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы замерять время всего запроса
+    'surveys.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,9 +73,32 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', 'postgres'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Под ASGI синхронный ORM-код каждого запроса выполняется в новом
+        # потоке, и постоянные соединения не переиспользуются, а копятся
+        # до таймаута (Django #33497). Поэтому соединение закрывается
+        # после запроса, а пул держит PgBouncer (docker-compose.prod.yml)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': True,
+        # True при работе через PgBouncer в режиме transaction pooling:
+        # серверный курсор не переживает смену соединения между
+        # транзакциями. Цена — QuerySet.iterator() перестаёт читать
+        # порциями и загружает всю выборку в память, поэтому большие
+        # выборки (выгрузка, аналитика, rebuild_stats) читаются
+        # keyset-пагинацией (surveys/pagination.py), а не iterator()
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True'
+        ),
     }
 }
 
+# DB_ENGINE=sqlite — локальная база в файле, для разработки и нагрузочных
+# прогонов без Postgres
+if os.getenv('DB_ENGINE', 'postgresql').strip().lower() == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DB_NAME_SQLITE', str(BASE_DIR / 'db.sqlite3')),
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -89,5 +123,33 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'static'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+if IS_PRODUCTION:
+    # Браузерный интерфейс DRF не нужен в production и дорог в рендеринге
+    REST_FRAMEWORK = {
+        'DEFAULT_RENDERER_CLASSES': [
+            'rest_framework.renderers.JSONRenderer',
+        ],
+    }
+
+# Дублировать ответы в нормализованную таблицу Answer при сохранении
+# (поиск «кто ответил X на вопрос N» по индексу вместо разбора JSON)
+SURVEYS_NORMALIZED_ANSWERS = (
+    os.getenv('SURVEYS_NORMALIZED_ANSWERS', 'True') == 'True'
+)
+
+# На сколько строк разбит каждый счётчик статистики: параллельные
+# сохранения ответов прибавляют к разным строкам (см. surveys/stats.py)
+SURVEYS_STAT_SHARDS = int(os.getenv('SURVEYS_STAT_SHARDS', '8'))
+
+# Общий секрет воркера рассылок бота: claim и progress принимаются только
+# с заголовком X-Worker-Token (см. surveys/permissions.py)
+BROADCAST_WORKER_TOKEN = os.getenv('BROADCAST_WORKER_TOKEN', '')
+
+# Пересылать ответы в Яндекс Формы (фоновый воркер forward_responses)
+SURVEYS_FORWARD_TO_YANDEX = (
+    os.getenv('SURVEYS_FORWARD_TO_YANDEX', 'False') == 'True'
+)
@@ -0,0 +1,37 @@
+"""Конфигурация gunicorn для production.
+
+gunicorn управляет процессами, uvicorn-воркеры обслуживают ASGI-приложение
+(async view не блокируют воркер на время внешних запросов).
+Все параметры переопределяются переменными окружения.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+workers = int(
+    os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)
+)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Соединения от nginx/бота переиспользуются
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+# Периодический перезапуск воркеров защищает от утечек памяти;
+# jitter не даёт всем воркерам перезапуститься одновременно
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", None)
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+def child_exit(server, worker):
+    # Метрики завершённого воркера не должны висеть в /metrics как живые
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
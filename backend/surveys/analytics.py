@@ -0,0 +1,264 @@
+"""Колоночная аналитика ответов: кросс-таблицы и группировки на NumPy.
+
+Ответы опроса один раз читаются из БД и раскладываются по колонкам:
+ответ на каждый вопрос кодируется словарём (строка -> int32, 0 — нет
+ответа), возрастная группа и пол — тоже кодами. Дальше кросс-таблица
+любой пары вопросов с разбивкой по группе — один np.bincount по
+комбинированному индексу, без обхода JSON в Python.
+
+Закодированные колонки кешируются в процессе. Актуальность проверяется
+по счётчику total из SurveyStat (сумма его шардов): если появились новые
+ответы, дочитываются только строки с id больше последнего загруженного.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from django.db.models import Sum
+
+from .metrics import CACHE_REQUESTS
+from .models import SurveyResponse, SurveyStat, User
+from .pagination import keyset_chunks
+from .questions import question_text
+from .stats import (
+    AGE_BUCKET_LAST,
+    AGE_BUCKETS,
+    TOTAL,
+    UNKNOWN,
+    age_bucket,
+    normalize_answer,
+)
+
+
+LOAD_CHUNK_SIZE = 5000
+
+# Сколько опросов держать в кеше и как долго доверять кешу без полной
+# перезагрузки (правки и удаление ответов счётчик total не ловит)
+CACHE_MAXSIZE = 32
+CACHE_TTL = 600
+
+GROUPS = {
+    "age": [title for _, title in AGE_BUCKETS] + [AGE_BUCKET_LAST, UNKNOWN],
+    "gender": [code for code, _ in User.GENDER_CHOICES] + [UNKNOWN],
+}
+
+
+class EncodedAnswers:
+    """Ответы опроса в колоночном виде.
+
+    codes — матрица (ответы × вопросы) кодов ответов; labels[i][code] —
+    строка ответа на вопрос i (labels[i][0] == "" — нет ответа);
+    groups[name] — коды групп из GROUPS для каждого ответа.
+    """
+
+    def __init__(self, question_count):
+        self.question_count = question_count
+        self.codes = np.zeros((0, question_count), dtype=np.int32)
+        self.groups = {name: np.zeros(0, dtype=np.int8) for name in GROUPS}
+        self.labels = [[""] for _ in range(question_count)]
+        self._lookup = [{"": 0} for _ in range(question_count)]
+        self.last_id = 0
+        # Значение счётчика total из SurveyStat на момент загрузки
+        self.total = 0
+        self.loaded_at = time.monotonic()
+
+    @property
+    def size(self):
+        return self.codes.shape[0]
+
+    def extended(self, rows):
+        """Новый объект с дописанными строками (pk, answers, age, gender).
+
+        Исходный объект не меняется: его могут читать параллельные запросы.
+        """
+        result = EncodedAnswers.__new__(EncodedAnswers)
+        result.question_count = self.question_count
+        result.labels = [list(labels) for labels in self.labels]
+        result._lookup = [dict(lookup) for lookup in self._lookup]
+        result.last_id = self.last_id
+        result.total = self.total
+        result.loaded_at = self.loaded_at
+
+        group_index = {
+            name: {label: i for i, label in enumerate(labels)}
+            for name, labels in GROUPS.items()
+        }
+        unknown_gender = group_index["gender"][UNKNOWN]
+        codes = []
+        groups = {name: [] for name in GROUPS}
+        for pk, answers, age, gender in rows:
+            row = [0] * self.question_count
+            for index, answer in enumerate(
+                list(answers or [])[:self.question_count]
+            ):
+                value = normalize_answer(answer)
+                if not value:
+                    continue
+                lookup = result._lookup[index]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(result.labels[index])
+                    result.labels[index].append(value)
+                row[index] = code
+            codes.append(row)
+            groups["age"].append(group_index["age"][age_bucket(age)])
+            groups["gender"].append(
+                group_index["gender"].get(gender, unknown_gender)
+            )
+            result.last_id = max(result.last_id, pk)
+
+        new_codes = np.array(codes, dtype=np.int32).reshape(
+            len(codes), self.question_count
+        )
+        result.codes = np.concatenate([self.codes, new_codes])
+        result.groups = {
+            name: np.concatenate([
+                self.groups[name], np.array(values, dtype=np.int8)
+            ])
+            for name, values in groups.items()
+        }
+        return result
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _stored_total(survey_id):
+    return (
+        SurveyStat.objects.filter(
+            survey_id=survey_id, dimension=TOTAL, bucket="", value=""
+        ).aggregate(total=Sum("count"))["total"]
+        or 0
+    )
+
+
+def _load_rows(survey_id, after_id=0):
+    rows = (
+        SurveyResponse.objects.filter(survey_id=survey_id, pk__gt=after_id)
+        .values_list("pk", "answers", "user__age", "user__gender")
+    )
+    return (
+        row for chunk in keyset_chunks(rows, {"pk": 0}, LOAD_CHUNK_SIZE)
+        for row in chunk
+    )
+
+
+def get_encoded_answers(survey):
+    """Закодированные ответы опроса из кеша, при необходимости дочитанные."""
+    question_count = len(survey.questions)
+    total = _stored_total(survey.pk)
+
+    with _cache_lock:
+        cached = _cache.get(survey.pk)
+        if cached is not None:
+            _cache.move_to_end(survey.pk)
+
+    if (
+        cached is not None
+        and cached.question_count == question_count
+        and time.monotonic() - cached.loaded_at < CACHE_TTL
+    ):
+        if cached.total == total:
+            CACHE_REQUESTS.labels("analytics", "hit").inc()
+            return cached
+        if cached.total < total:
+            # Дочитываем только новые ответы
+            encoded = cached.extended(_load_rows(survey.pk, cached.last_id))
+            if encoded.size - cached.size == total - cached.total:
+                CACHE_REQUESTS.labels("analytics", "extend").inc()
+                encoded.total = total
+                _store(survey.pk, encoded)
+                return encoded
+
+    # Первая загрузка или расхождение со счётчиком — читаем всё заново.
+    # Запоминается значение счётчика, а не число строк: если счётчик
+    # разошёлся с таблицей, кеш всё равно будет использоваться
+    CACHE_REQUESTS.labels("analytics", "miss").inc()
+    encoded = EncodedAnswers(question_count).extended(_load_rows(survey.pk))
+    encoded.total = total
+    _store(survey.pk, encoded)
+    return encoded
+
+
+def _store(survey_id, encoded):
+    with _cache_lock:
+        _cache[survey_id] = encoded
+        _cache.move_to_end(survey_id)
+        while len(_cache) > CACHE_MAXSIZE:
+            _cache.popitem(last=False)
+
+
+def invalidate(survey_id=None):
+    with _cache_lock:
+        if survey_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(survey_id, None)
+
+
+def crosstab(encoded, row, column=None, by=None):
+    """Счётчики по комбинациям ответов.
+
+    row, column — номера вопросов (column может быть None — тогда это
+    распределение ответов на один вопрос), by — имя группы из GROUPS или
+    None. Возвращает массив формы (группы, ответы row, ответы column)
+    без кода «нет ответа»; учитываются ответы, где есть все измерения.
+    """
+    row_codes = encoded.codes[:, row].astype(np.int64)
+    mask = row_codes > 0
+    shape = [1, len(encoded.labels[row]), 1]
+    index = row_codes
+
+    if column is not None:
+        column_codes = encoded.codes[:, column]
+        mask &= column_codes > 0
+        shape[2] = len(encoded.labels[column])
+        index = index * shape[2] + column_codes
+
+    if by is not None:
+        shape[0] = len(GROUPS[by])
+        index = encoded.groups[by].astype(np.int64) * shape[1] * shape[2] + index
+
+    counts = np.bincount(index[mask], minlength=shape[0] * shape[1] * shape[2])
+    counts = counts.reshape(shape)[:, 1:, :]
+    if column is not None:
+        counts = counts[:, :, 1:]
+    return counts
+
+
+def build_crosstab(survey, encoded, row, column=None, by=None):
+    """Ответ API для кросс-таблицы; пустые группы опускаются."""
+    counts = crosstab(encoded, row, column, by)
+    group_labels = GROUPS[by] if by is not None else [None]
+
+    groups = []
+    for group, matrix in zip(group_labels, counts):
+        total = int(matrix.sum())
+        if by is not None and not total:
+            continue
+        values = matrix[:, 0] if column is None else matrix
+        groups.append({
+            "group": group,
+            "total": total,
+            "counts": values.tolist(),
+        })
+
+    def axis(index):
+        if index is None:
+            return None
+        return {
+            "index": index,
+            "question": question_text(survey.questions[index]),
+            "values": encoded.labels[index][1:],
+        }
+
+    return {
+        "survey_id": survey.pk,
+        "responses": encoded.size,
+        "row": axis(row),
+        "column": axis(column),
+        "by": by,
+        "groups": groups,
+    }
@@ -0,0 +1,63 @@
+"""Нормализованное хранение ответов (таблица Answer).
+
+SurveyResponse.answers остаётся основным хранилищем; Answer — индекс
+по отдельным ответам для фильтров вида «кто ответил X на вопрос N».
+"""
+import hashlib
+
+from django.conf import settings
+
+from .models import Answer
+
+
+def value_hash(value):
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def normalize_value(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def build_answers(response):
+    """Строки Answer для сохранённого ответа; пустые ответы пропускаются."""
+    rows = []
+    for index, raw in enumerate(response.answers or []):
+        value = normalize_value(raw)
+        if not value:
+            continue
+        rows.append(Answer(
+            response_id=response.pk,
+            survey_id=response.survey_id,
+            question_index=index,
+            value=value,
+            value_hash=value_hash(value),
+        ))
+    return rows
+
+
+def store_answers(responses, batch_size=1000):
+    """Записывает нормализованные ответы; вызывается в транзакции сохранения.
+
+    Уже записанные ответы (уникальность response + question_index)
+    пропускаются.
+    """
+    if not settings.SURVEYS_NORMALIZED_ANSWERS:
+        return
+    rows = [row for response in responses for row in build_answers(response)]
+    Answer.objects.bulk_create(
+        rows, batch_size=batch_size, ignore_conflicts=True
+    )
+
+
+def filter_by_answer(queryset, survey_id, question_index, value):
+    """Сужает выборку SurveyResponse до ответивших value на вопрос опроса."""
+    value = normalize_value(value)
+    matching = Answer.objects.filter(
+        survey_id=survey_id,
+        question_index=question_index,
+        value_hash=value_hash(value),
+        value=value,
+    )
+    return queryset.filter(pk__in=matching.values("response_id"))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SurveysConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'surveys'
+
+    def ready(self):
+        # Подключает счётчик SQL-запросов до открытия первого соединения
+        from . import metrics  # noqa: F401
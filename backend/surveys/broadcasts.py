@@ -0,0 +1,175 @@
+"""Рассылки приглашений пройти опрос.
+
+Администратор создаёт рассылку (POST /api/broadcasts/) с фильтрами по
+возрасту, полу и тому, отвечал ли пользователь на опрос. Сообщения
+отправляет бот: его воркер «арендует» идущую рассылку на BROADCAST_LEASE
+секунд, получает получателей пачками и после каждой пачки сообщает
+прогресс, продлевая аренду и получая следующую пачку.
+
+Получатели выбираются по индексу первичного ключа (pk > cursor ORDER BY
+pk LIMIT n), без OFFSET и без списка получателей в БД: рассылка на сотни
+тысяч пользователей стоит один запрос на пачку, а прогресс — одно число.
+Прогресс принимается, только если курсор совпадает с ожидаемым, поэтому
+пачка не засчитывается дважды. Воркер, упавший посреди пачки, её
+не подтвердит: после окончания аренды другой воркер повторит только эту
+пачку.
+"""
+import html
+import os
+from datetime import timedelta
+
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .models import Broadcast, SurveyResponse, User
+
+
+# На сколько секунд воркер забирает рассылку себе; продлевается
+# с каждой пачкой
+BROADCAST_LEASE = int(os.getenv("BROADCAST_LEASE", "120"))
+BROADCAST_CHUNK_MAX_SIZE = 1000
+
+
+def segment(broadcast):
+    """Пользователи, которым адресована рассылка."""
+    users = User.objects.filter(telegram_id__isnull=False)
+    if broadcast.age_min is not None:
+        users = users.filter(age__gte=broadcast.age_min)
+    if broadcast.age_max is not None:
+        users = users.filter(age__lte=broadcast.age_max)
+    if broadcast.gender:
+        users = users.filter(gender=broadcast.gender)
+    if broadcast.responded is not None:
+        # По индексу ответов (user, survey)
+        answered = Exists(SurveyResponse.objects.filter(
+            survey_id=broadcast.survey_id, user=OuterRef("pk")
+        ))
+        users = users.filter(answered if broadcast.responded else ~answered)
+    return users
+
+
+def create_broadcast(**fields):
+    broadcast = Broadcast(**fields)
+    broadcast.total = segment(broadcast).count()
+    broadcast.save()
+    return broadcast
+
+
+def next_recipients(broadcast, limit):
+    """Следующая пачка получателей после курсора: [(pk, telegram_id)]."""
+    return list(
+        segment(broadcast)
+        .filter(pk__gt=broadcast.cursor)
+        .order_by("pk")
+        .values_list("pk", "telegram_id")[:limit]
+    )
+
+
+def invitation_text(broadcast):
+    if broadcast.text:
+        return broadcast.text
+    survey = broadcast.survey
+    return (
+        f"Новый опрос: <b>{html.escape(survey.title)}</b>\n\n"
+        f"Чтобы пройти его, нажмите кнопку ниже или отправьте номер "
+        f"{survey.pk}."
+    )
+
+
+def _lease_free(worker, now):
+    return (
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+        | Q(locked_by=worker)
+    )
+
+
+def _job(broadcast, recipients=()):
+    return {
+        "id": broadcast.pk,
+        "survey_id": broadcast.survey_id,
+        "status": broadcast.status,
+        "text": invitation_text(broadcast),
+        "cursor": broadcast.cursor,
+        "recipients": [
+            {"user_id": pk, "telegram_id": telegram_id}
+            for pk, telegram_id in recipients
+        ],
+    }
+
+
+def _next_job(broadcast, limit):
+    """Следующая пачка для воркера; если получателей не осталось,
+    рассылка завершается."""
+    recipients = next_recipients(broadcast, limit)
+    if not recipients:
+        now = timezone.now()
+        Broadcast.objects.filter(pk=broadcast.pk).update(
+            status=Broadcast.STATUS_DONE,
+            finished_at=now,
+            locked_by="",
+            locked_until=None,
+            updated_at=now,
+        )
+        broadcast.status = Broadcast.STATUS_DONE
+    return _job(broadcast, recipients)
+
+
+def claim_broadcast(worker, limit):
+    """Берёт в аренду идущую рассылку и отдаёт первую пачку; None, если
+    рассылок нет или все заняты другими воркерами."""
+    now = timezone.now()
+    candidates = list(
+        Broadcast.objects.filter(status=Broadcast.STATUS_RUNNING)
+        .filter(_lease_free(worker, now))
+        .order_by("pk")
+        .values_list("pk", flat=True)[:10]
+    )
+    for pk in candidates:
+        # Условный UPDATE: из нескольких воркеров аренду получит один
+        taken = (
+            Broadcast.objects
+            .filter(pk=pk, status=Broadcast.STATUS_RUNNING)
+            .filter(_lease_free(worker, now))
+            .update(
+                locked_by=worker,
+                locked_until=now + timedelta(seconds=BROADCAST_LEASE),
+            )
+        )
+        if taken:
+            broadcast = Broadcast.objects.select_related("survey").get(pk=pk)
+            return _next_job(broadcast, limit)
+    return None
+
+
+def report_progress(broadcast_id, worker, after, cursor, sent=0, blocked=0,
+                    failed=0, limit=100, release=False):
+    """Засчитывает отправленную пачку и отдаёт следующую.
+
+    None — воркер потерял аренду или пачка уже засчитана (курсор не равен
+    after): продолжать эту рассылку ему нельзя.
+    """
+    now = timezone.now()
+    updated = Broadcast.objects.filter(
+        pk=broadcast_id, locked_by=worker, cursor=after,
+    ).exclude(status=Broadcast.STATUS_DONE).update(
+        cursor=max(cursor, after),
+        sent=F("sent") + sent,
+        blocked=F("blocked") + blocked,
+        failed=F("failed") + failed,
+        locked_until=now + timedelta(seconds=BROADCAST_LEASE),
+        updated_at=now,
+    )
+    if not updated:
+        return None
+
+    broadcast = Broadcast.objects.select_related("survey").get(
+        pk=broadcast_id
+    )
+    if release or broadcast.status != Broadcast.STATUS_RUNNING:
+        # Пауза, отмена или остановка воркера: аренда освобождается,
+        # продолжит тот, кто первым возьмёт рассылку после возобновления
+        Broadcast.objects.filter(pk=broadcast_id, locked_by=worker).update(
+            locked_by="", locked_until=None
+        )
+        return _job(broadcast)
+    return _next_job(broadcast, limit)
@@ -0,0 +1,66 @@
+"""Черновики ответов: незавершённые прохождения опросов.
+
+Бот сохраняет ответы пачками (каждые N вопросов или после паузы), а не
+на каждый вопрос. Черновик — одна строка на пару (опрос, пользователь
+Telegram), запись — один INSERT ... ON CONFLICT DO UPDATE. При отправке
+ответа черновик удаляется в той же транзакции (см. create_response).
+"""
+from django.db.models import Count, Q
+
+from .models import ResponseDraft
+
+
+# Сколько пар (опрос, пользователь) удалять одним запросом
+DELETE_BATCH_SIZE = 500
+
+
+def save_draft(survey_id, telegram_user_id, answers, telegram_username="",
+               version="", user=None):
+    """Создаёт или обновляет черновик одним запросом."""
+    draft = ResponseDraft(
+        survey_id=survey_id,
+        user=user,
+        telegram_user_id=telegram_user_id,
+        telegram_username=telegram_username,
+        answers=answers,
+        answered=len(answers),
+        version=version,
+    )
+    ResponseDraft.objects.bulk_create(
+        [draft],
+        update_conflicts=True,
+        unique_fields=["survey", "telegram_user_id"],
+        update_fields=[
+            "user", "telegram_username", "answers", "answered", "version",
+            "updated_at",
+        ],
+    )
+    return draft
+
+
+def delete_drafts(pairs):
+    """Удаляет черновики по парам (survey_id, telegram_user_id)."""
+    pairs = [(survey_id, tg_id) for survey_id, tg_id in pairs if tg_id]
+    for start in range(0, len(pairs), DELETE_BATCH_SIZE):
+        condition = Q()
+        for survey_id, tg_id in pairs[start:start + DELETE_BATCH_SIZE]:
+            condition |= Q(survey_id=survey_id, telegram_user_id=tg_id)
+        ResponseDraft.objects.filter(condition).delete()
+
+
+def draft_funnel(survey_id):
+    """Незавершённые прохождения: сколько всего и на каком вопросе стоят."""
+    rows = list(
+        ResponseDraft.objects.filter(survey_id=survey_id)
+        .values("answered")
+        .annotate(count=Count("pk"))
+        .order_by("answered")
+    )
+    return {
+        "survey_id": survey_id,
+        "in_progress": sum(row["count"] for row in rows),
+        "answered": [
+            {"answered": row["answered"], "count": row["count"]}
+            for row in rows
+        ],
+    }
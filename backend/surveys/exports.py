@@ -0,0 +1,173 @@
+"""Потоковая выгрузка ответов на опрос в CSV / NDJSON / XLSX.
+
+Строки читаются из БД порциями по EXPORT_CHUNK_SIZE (keyset-пагинация,
+см. pagination.py), форматируются по одной и сразу отдаются клиенту —
+память не зависит от числа ответов.
+"""
+import csv
+import json
+import tempfile
+from asgiref.sync import sync_to_async
+
+from .answers import filter_by_answer
+from .questions import question_text
+from .models import SurveyResponse
+from .pagination import keyset_chunks
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "xlsx": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    ),
+}
+
+USER_FIELDS = [
+    "user_id", "tg_nickname", "name", "surname", "age", "gender",
+]
+
+_ROW_FIELDS = [
+    "id", "submitted_at", "user_id", "user__tg_nickname", "user__name",
+    "user__surname", "user__age", "user__gender", "telegram_user_id",
+    "telegram_username", "answers",
+]
+
+
+def export_queryset(survey, submitted_from=None, submitted_to=None,
+                    answer_filter=None):
+    """answer_filter — (номер вопроса, ответ): фильтр по таблице Answer."""
+    queryset = SurveyResponse.objects.filter(survey=survey)
+    if answer_filter is not None:
+        queryset = filter_by_answer(queryset, survey.pk, *answer_filter)
+    if submitted_from:
+        queryset = queryset.filter(submitted_at__gte=submitted_from)
+    if submitted_to:
+        queryset = queryset.filter(submitted_at__lt=submitted_to)
+    # Порядок совпадает с индексом (survey, submitted_at)
+    return queryset.order_by("submitted_at", "id").values_list(*_ROW_FIELDS)
+
+
+# Ключ порций выгрузки: позиции submitted_at и id в строке _ROW_FIELDS
+_ROW_KEYS = {"submitted_at": 1, "id": 0}
+
+
+def iter_rows(queryset):
+    """Строки выгрузки порциями по ключу (submitted_at, id)."""
+    return keyset_chunks(queryset, _ROW_KEYS, EXPORT_CHUNK_SIZE)
+
+
+def header(questions):
+    return [
+        "response_id", "submitted_at", *USER_FIELDS,
+        "telegram_user_id", "telegram_username",
+        *(question_text(question) for question in questions),
+    ]
+
+
+def flatten(row, question_count):
+    """Строка выгрузки: служебные поля, поля пользователя, ответы."""
+    *fields, answers = row
+    answers = list(answers or [])[:question_count]
+    answers += [""] * (question_count - len(answers))
+    fields[1] = fields[1].isoformat()
+    return [("" if value is None else value) for value in fields] + answers
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class CsvFormatter:
+    def __init__(self, survey):
+        self.questions = list(survey.questions)
+        self._writer = csv.writer(_Echo())
+
+    def start(self):
+        # BOM — чтобы Excel открыл UTF-8 без мастера импорта
+        return "﻿" + self._writer.writerow(header(self.questions))
+
+    def row(self, row):
+        return self._writer.writerow(flatten(row, len(self.questions)))
+
+
+class NdjsonFormatter:
+    """Первая строка — заголовок с вопросами, далее по объекту на ответ."""
+
+    def __init__(self, survey):
+        self.survey_id = survey.pk
+        self.questions = list(survey.questions)
+
+    def start(self):
+        return self._dump({
+            "survey_id": self.survey_id, "questions": self.questions
+        })
+
+    def row(self, row):
+        values = flatten(row, len(self.questions))
+        fields = header([])
+        record = dict(zip(fields, values[:len(fields)]))
+        record["answers"] = values[len(fields):]
+        return self._dump(record)
+
+    @staticmethod
+    def _dump(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+FORMATTERS = {
+    "csv": CsvFormatter,
+    "ndjson": NdjsonFormatter,
+}
+
+
+def iter_export(survey, fmt, queryset):
+    """Синхронный генератор строк выгрузки (для WSGI)."""
+    formatter = FORMATTERS[fmt](survey)
+    yield formatter.start()
+    for chunk in iter_rows(queryset):
+        for row in chunk:
+            yield formatter.row(row)
+
+
+async def aiter_export(survey, fmt, queryset):
+    """Асинхронный генератор строк выгрузки (для ASGI)."""
+    formatter = FORMATTERS[fmt](survey)
+    yield formatter.start()
+    # Каждая порция — отдельный запрос, он выполняется в потоке
+    chunks = iter_rows(queryset)
+    while True:
+        chunk = await sync_to_async(next)(chunks, None)
+        if chunk is None:
+            break
+        for row in chunk:
+            yield formatter.row(row)
+
+
+def build_xlsx(survey, queryset):
+    """XLSX — zip-архив, и отдавать его по частям нельзя. Книга пишется
+    в режиме write_only во временный файл (память постоянна), а файл
+    отдаётся целиком.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError as e:
+        raise RuntimeError("Для выгрузки в XLSX нужен пакет openpyxl") from e
+
+    questions = list(survey.questions)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title="Ответы")
+    sheet.append(header(questions))
+    for chunk in iter_rows(queryset):
+        for row in chunk:
+            sheet.append(flatten(row, len(questions)))
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,176 @@
+"""Локальный фейковый сервер Яндекс Форм для тестов и разработки.
+
+Отвечает на те же запросы, что делает yandex_forms.py: выдача OAuth-токена
+(POST /token), описание формы (GET /v1/surveys/<id>) с ETag и приём
+ответов (POST /v1/surveys/<id>/answers). Считает запросы, чтобы проверять
+работу кешей токена и форм.
+
+    server = FakeYandexForms(forms={"abc": {"name": "Опрос", ...}})
+    server.start()
+    # YANDEX_OAUTH_URL=server.oauth_url
+    # YANDEX_FORMS_API_URL=server.api_url
+    server.stop()
+
+Или отдельным процессом: python manage.py fake_yandex_forms.
+"""
+import hashlib
+import json
+import threading
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+DEMO_FORMS = {
+    "demo": {
+        "name": "Демо-опрос",
+        "description": "Форма фейкового сервера Яндекс Форм",
+        "pages": [{
+            "items": [
+                {"label": "Как вас зовут?", "type": "short_text"},
+                {"label": "Сколько вам лет?", "type": "integer"},
+                {"label": "Оцените бота от 1 до 5", "type": "enum"},
+            ],
+        }],
+    },
+}
+
+
+class FakeYandexForms:
+    def __init__(self, forms=None, host="127.0.0.1", port=0,
+                 token_ttl=3600):
+        self.forms = dict(DEMO_FORMS if forms is None else forms)
+        self.token_ttl = token_ttl
+        self.tokens = set()
+        self.requests = Counter()
+        # Принятые ответы: (id формы, тело запроса)
+        self.submissions = []
+        # Сколько следующих отправок ответов отклонить с 429
+        self.fail_submissions = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def oauth_url(self):
+        return f"{self.base_url}/token"
+
+    @property
+    def api_url(self):
+        return f"{self.base_url}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def revoke_tokens(self):
+        self.tokens.clear()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body=None, headers=None):
+                raw = b""
+                if body is not None:
+                    raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _authorized(self):
+                header = self.headers.get("Authorization", "")
+                return header.startswith("OAuth ") and (
+                    header[len("OAuth "):] in fake.tokens
+                )
+
+            def do_POST(self):
+                body = self._body()
+                if self.path == "/token":
+                    fake.requests["token"] += 1
+                    params = parse_qs(body.decode("utf-8"))
+                    if not params.get("client_id") or not params.get(
+                        "client_secret"
+                    ):
+                        return self._send(400, {"error": "invalid_client"})
+                    token = uuid.uuid4().hex
+                    fake.tokens.add(token)
+                    return self._send(200, {
+                        "access_token": token,
+                        "token_type": "bearer",
+                        "expires_in": fake.token_ttl,
+                    })
+
+                if self.path.startswith("/v1/surveys/") and self.path.endswith(
+                    "/answers"
+                ):
+                    fake.requests["submit"] += 1
+                    if not self._authorized():
+                        return self._send(401, {"error": "unauthorized"})
+                    form_id = self.path[len("/v1/surveys/"):-len("/answers")]
+                    if form_id not in fake.forms:
+                        return self._send(404, {"error": "not_found"})
+                    if fake.fail_submissions > 0:
+                        fake.fail_submissions -= 1
+                        return self._send(
+                            429, {"error": "too_many_requests"},
+                            headers={"Retry-After": "1"},
+                        )
+                    fake.submissions.append(
+                        (form_id, json.loads(body or b"null"))
+                    )
+                    return self._send(200, {"status": "ok"})
+
+                self._send(404, {"error": "not_found"})
+
+            def do_GET(self):
+                if not self.path.startswith("/v1/surveys/"):
+                    return self._send(404, {"error": "not_found"})
+                fake.requests["form"] += 1
+                if not self._authorized():
+                    return self._send(401, {"error": "unauthorized"})
+
+                form_id = self.path[len("/v1/surveys/"):].strip("/")
+                form = fake.forms.get(form_id)
+                if form is None:
+                    return self._send(404, {"error": "not_found"})
+
+                etag = '"%s"' % hashlib.sha256(
+                    json.dumps(form, sort_keys=True).encode("utf-8")
+                ).hexdigest()[:16]
+                if self.headers.get("If-None-Match") == etag:
+                    fake.requests["not_modified"] += 1
+                    return self._send(304, headers={"ETag": etag})
+                self._send(200, form, headers={"ETag": etag})
+
+        return Handler
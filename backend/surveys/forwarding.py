@@ -0,0 +1,237 @@
+"""Пересылка ответов в Яндекс Формы фоновым воркером.
+
+Запрос на сохранение ответа не ходит во внешний API: ответ записывается
+со статусом pending, а воркер (команда forward_responses) забирает из
+БД пачки созревших ответов, отправляет их с ограничением частоты,
+повторяет неудачи с экспоненциальной задержкой и записывает итоговый
+статус в SurveyResponse.
+
+Очередь — сами строки SurveyResponse (частичный индекс по pending).
+Пачка «арендуется» сдвигом forward_next_at на время, за которое воркер
+успеет её отправить при своей частоте с учётом паузы по Retry-After,
+поэтому несколько воркеров не отправят один ответ дважды, а ответы
+упавшего воркера вернутся в очередь. Ответ, до которого очередь дошла
+уже после окончания аренды, не отправляется: его мог забрать другой
+воркер.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SurveyResponse
+from .yandex_forms import YandexFormsError, submit_answers_to_yandex
+
+
+logger = logging.getLogger(__name__)
+
+FORWARD_BATCH_SIZE = int(os.getenv("YANDEX_FORWARD_BATCH_SIZE", "50"))
+# Квота API: запросов в секунду и допустимый всплеск
+FORWARD_RATE = float(os.getenv("YANDEX_FORWARD_RATE", "5"))
+FORWARD_BURST = int(os.getenv("YANDEX_FORWARD_BURST", "10"))
+FORWARD_MAX_ATTEMPTS = int(os.getenv("YANDEX_FORWARD_MAX_ATTEMPTS", "10"))
+FORWARD_RETRY_BASE = float(os.getenv("YANDEX_FORWARD_RETRY_BASE", "2"))
+FORWARD_RETRY_MAX = float(os.getenv("YANDEX_FORWARD_RETRY_MAX", "600"))
+# Самая долгая общая пауза по Retry-After, секунды: дольше ответы пачки
+# не ждут, а переносятся на потом
+FORWARD_MAX_PAUSE = float(os.getenv("YANDEX_FORWARD_MAX_PAUSE", "60"))
+# Запас аренды на последний запрос пачки (с повтором после 401 и
+# получением токена)
+FORWARD_LEASE_MARGIN = 60
+
+# Ответы API, которые повторять бесполезно
+PERMANENT_ERRORS = {400, 403, 404, 409, 410, 422}
+
+
+def forward_fields():
+    """Начальные поля пересылки для нового ответа."""
+    if not settings.SURVEYS_FORWARD_TO_YANDEX:
+        return {"forward_status": SurveyResponse.FORWARD_SKIPPED}
+    return {
+        "forward_status": SurveyResponse.FORWARD_PENDING,
+        "forward_next_at": timezone.now(),
+    }
+
+
+class RateLimiter:
+    """Token bucket: не больше rate запросов в секунду, всплеск до burst."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Пауза для всех запросов (API ответил 429 с Retry-After).
+
+        Паузы нескольких одновременных 429 не складываются: действует
+        самая долгая.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def backoff(attempts):
+    """Задержка перед следующей попыткой: экспонента с full jitter."""
+    return random.uniform(
+        0, min(FORWARD_RETRY_MAX, FORWARD_RETRY_BASE * 2 ** attempts)
+    )
+
+
+def claim_due(limit, lease):
+    """Забирает созревшие ответы в аренду на lease секунд."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            SurveyResponse.objects
+            .filter(
+                forward_status=SurveyResponse.FORWARD_PENDING,
+                forward_next_at__lte=now,
+            )
+            .order_by("forward_next_at")
+            # Параллельные воркеры пропускают чужие строки, не ожидая их
+            .select_for_update(skip_locked=True, of=("self",))
+            .values_list(
+                "pk", "answers", "forward_attempts",
+                "survey__external_id", "survey__questions",
+            )[:limit]
+        )
+        if jobs:
+            SurveyResponse.objects.filter(
+                pk__in=[job[0] for job in jobs]
+            ).update(forward_next_at=now + timedelta(seconds=lease))
+    return jobs
+
+
+def save_results(results):
+    """Записывает итоги отправки одним bulk_update."""
+    SurveyResponse.objects.bulk_update(
+        results,
+        [
+            "forward_status", "forward_attempts", "forward_next_at",
+            "forward_error", "forwarded_at",
+        ],
+    )
+
+
+class Forwarder:
+    def __init__(self, client_id, client_secret, batch_size=None,
+                 rate=None, burst=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.batch_size = batch_size or FORWARD_BATCH_SIZE
+        self.limiter = RateLimiter(
+            rate or FORWARD_RATE, burst or FORWARD_BURST
+        )
+        # Пачка отправляется за batch_size / rate секунд, плюс пауза
+        # по Retry-After (она может остаться и от прошлой пачки)
+        self.lease = (
+            self.batch_size / self.limiter.rate
+            + FORWARD_MAX_PAUSE + FORWARD_LEASE_MARGIN
+        )
+
+    async def forward_due(self):
+        """Отправляет одну пачку; возвращает число обработанных ответов."""
+        # Начать запрос можно до конца аренды за вычетом запаса на него
+        deadline = time.monotonic() + self.lease - FORWARD_LEASE_MARGIN
+        jobs = await sync_to_async(claim_due)(self.batch_size, self.lease)
+        if not jobs:
+            return 0
+        results = await asyncio.gather(
+            *(self._forward(*job, deadline=deadline) for job in jobs)
+        )
+        # Ответы, не отправленные до конца аренды, не трогаем: аренда
+        # истекла, и их, возможно, уже забрал другой воркер
+        await sync_to_async(save_results)(
+            [result for result in results if result is not None]
+        )
+        return len(jobs)
+
+    async def run(self, poll_interval=1.0):
+        while True:
+            try:
+                processed = await self.forward_due()
+            except Exception as e:  # noqa: BLE001
+                logger.exception("Ошибка воркера пересылки: %s", e)
+                processed = 0
+            if processed < self.batch_size:
+                await asyncio.sleep(poll_interval)
+
+    async def _forward(self, pk, answers, attempts, external_id, questions,
+                       deadline=None):
+        """Отправляет ответ; возвращает строку с итогом для save_results
+        или None, если аренда кончилась раньше, чем подошла очередь."""
+        result = SurveyResponse(pk=pk, forward_attempts=attempts + 1)
+        await self.limiter.acquire()
+        if deadline is not None and time.monotonic() > deadline:
+            logger.warning(
+                "Ответ #%s: аренда истекла до отправки, вернётся в очередь",
+                pk,
+            )
+            return None
+        try:
+            await submit_answers_to_yandex(
+                external_id, questions, answers,
+                self.client_id, self.client_secret,
+            )
+        except YandexFormsError as e:
+            error, status_code, retry_after = str(e), e.status_code, e.retry_after
+        except Exception as e:  # noqa: BLE001
+            error = str(e) or e.__class__.__name__
+            status_code = retry_after = None
+        else:
+            result.forward_status = SurveyResponse.FORWARD_SENT
+            result.forward_next_at = None
+            result.forward_error = ""
+            result.forwarded_at = timezone.now()
+            return result
+
+        if status_code == 429 and retry_after:
+            self.limiter.pause(min(retry_after, FORWARD_MAX_PAUSE))
+
+        result.forward_error = error
+        result.forwarded_at = None
+        if (
+            status_code in PERMANENT_ERRORS
+            or result.forward_attempts >= FORWARD_MAX_ATTEMPTS
+        ):
+            logger.error(
+                "Ответ #%s не переслан в Яндекс Формы: %s", pk, error
+            )
+            result.forward_status = SurveyResponse.FORWARD_FAILED
+            result.forward_next_at = None
+            return result
+
+        delay = max(backoff(result.forward_attempts), retry_after or 0)
+        logger.warning(
+            "Ответ #%s: ошибка пересылки (попытка %d), повтор через %.1f с: %s",
+            pk, result.forward_attempts, delay, error,
+        )
+        result.forward_status = SurveyResponse.FORWARD_PENDING
+        result.forward_next_at = timezone.now() + timedelta(seconds=delay)
+        return result
@@ -0,0 +1,154 @@
+"""Массовый импорт и повторная синхронизация опросов из Яндекс Форм.
+
+Формы запрашиваются параллельно (не больше concurrency одновременно,
+через общий пул соединений и кеш токена yandex_forms.py), затем все
+изменившиеся опросы записываются одним bulk_create с upsert по
+external_id. Формы с тем же хешом содержимого не перезаписываются.
+bulk_create не вызывает валидаторы модели, поэтому вопросы каждой формы
+проверяются здесь же, а формы с ошибками не сохраняются.
+"""
+import asyncio
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+
+from .models import Survey
+from .questions import validate_questions
+from .yandex_forms import get_survey_from_yandex
+
+
+IMPORT_CONCURRENCY = 8
+
+# Сколько форм можно передать в один запрос import-bulk
+IMPORT_BULK_MAX_SIZE = 500
+
+
+def content_hash(data):
+    raw = json.dumps(
+        {
+            "title": data["title"],
+            "description": data["description"],
+            "questions": data["questions"],
+        },
+        sort_keys=True, ensure_ascii=False,
+    ).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def survey_fields(external_id, form):
+    """Поля опроса из описания формы (как в одиночном импорте)."""
+    return {
+        "title": form.get("title") or f"Опрос {external_id}",
+        "description": form.get("description", ""),
+        "questions": form.get("questions") or [],
+    }
+
+
+async def fetch_forms(external_ids, client_id, client_secret,
+                      concurrency=IMPORT_CONCURRENCY):
+    """Описания форм: {external_id: dict | None | Exception}."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(external_id):
+        async with semaphore:
+            try:
+                # Кеш форм не используем: при синхронизации важна
+                # актуальность, а неизменённую форму API подтвердит 304
+                return await get_survey_from_yandex(
+                    external_id, client_id, client_secret, use_cache=False
+                )
+            except Exception as e:  # noqa: BLE001
+                return e
+
+    results = await asyncio.gather(*(fetch(i) for i in external_ids))
+    return dict(zip(external_ids, results))
+
+
+def upsert_surveys(forms):
+    """Сохраняет опросы из {external_id: fields}.
+
+    Возвращает {"created", "updated", "unchanged"} — списки external_id,
+    "errors" — {external_id: текст ошибки} для форм с некорректными
+    вопросами (они не сохраняются) и "surveys" — {external_id: id}.
+    """
+    errors = {}
+    for external_id, fields in list(forms.items()):
+        try:
+            validate_questions(fields["questions"])
+        except ValidationError as e:
+            errors[external_id] = e.messages[0]
+    forms = {
+        external_id: fields for external_id, fields in forms.items()
+        if external_id not in errors
+    }
+
+    existing = {
+        external_id: (pk, digest)
+        for pk, external_id, digest in Survey.objects.filter(
+            external_id__in=list(forms)
+        ).values_list("pk", "external_id", "content_hash")
+    }
+
+    result = {
+        "created": [], "updated": [], "unchanged": [], "errors": errors,
+    }
+    to_save = []
+    for external_id, fields in forms.items():
+        digest = content_hash(fields)
+        if external_id not in existing:
+            result["created"].append(external_id)
+        elif existing[external_id][1] != digest:
+            result["updated"].append(external_id)
+        else:
+            result["unchanged"].append(external_id)
+            continue
+        to_save.append(
+            Survey(external_id=external_id, content_hash=digest, **fields)
+        )
+
+    if to_save:
+        Survey.objects.bulk_create(
+            to_save,
+            update_conflicts=True,
+            unique_fields=["external_id"],
+            update_fields=["title", "description", "questions", "content_hash"],
+        )
+
+    result["surveys"] = dict(
+        Survey.objects.filter(external_id__in=list(forms))
+        .values_list("external_id", "pk")
+    )
+    return result
+
+
+async def import_forms(external_ids, client_id, client_secret,
+                       concurrency=IMPORT_CONCURRENCY):
+    """Загружает формы и сохраняет изменившиеся опросы.
+
+    К результату upsert_surveys добавляются "not_found" и ошибки загрузки
+    в "errors" (сюда же попадают формы без вопросов).
+    """
+    external_ids = list(dict.fromkeys(external_ids))
+    fetched = await fetch_forms(
+        external_ids, client_id, client_secret, concurrency
+    )
+
+    forms = {}
+    not_found = []
+    errors = {}
+    for external_id, form in fetched.items():
+        if isinstance(form, Exception):
+            errors[external_id] = str(form) or form.__class__.__name__
+        elif form is None:
+            not_found.append(external_id)
+        elif not form.get("questions"):
+            errors[external_id] = "Анкета не содержит вопросов"
+        else:
+            forms[external_id] = survey_fields(external_id, form)
+
+    result = await sync_to_async(upsert_surveys)(forms)
+    result["not_found"] = not_found
+    result["errors"].update(errors)
+    return result
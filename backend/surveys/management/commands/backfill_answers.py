@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from surveys.answers import build_answers
+from surveys.models import Answer, SurveyResponse
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет нормализованную таблицу Answer для ответов, сохранённых "
+        "до её появления. Обрабатывает ответы порциями по id, повторный "
+        "запуск продолжает с того же места."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--survey", type=int, action="append",
+            help="ID опроса (можно несколько); по умолчанию — все"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=2000,
+            help="Сколько ответов обрабатывать в одной транзакции"
+        )
+
+    def handle(self, *args, **options):
+        responses = SurveyResponse.objects.filter(
+            normalized_answers__isnull=True
+        ).order_by("pk")
+        if options["survey"]:
+            responses = responses.filter(survey_id__in=options["survey"])
+
+        batch_size = options["batch_size"]
+        last_id = 0
+        processed = 0
+        while True:
+            batch = list(
+                responses.filter(pk__gt=last_id)
+                .only("pk", "survey_id", "answers")[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                Answer.objects.bulk_create(
+                    [row for r in batch for row in build_answers(r)],
+                    batch_size=batch_size,
+                    ignore_conflicts=True,
+                )
+            last_id = batch[-1].pk
+            processed += len(batch)
+            self.stdout.write(f"Обработано ответов: {processed}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово, нормализовано ответов: {processed}"
+        ))
@@ -0,0 +1,135 @@
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+from django.core.management.base import BaseCommand
+
+from surveys.models import Survey, User
+
+
+SCENARIOS = ("lookup", "survey", "submit")
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * q), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "HTTP-бенчмарк API: создаёт тестовые данные в БД и нагружает "
+        "запущенный сервер (runserver, uvicorn или gunicorn) запросами "
+        "lookup / survey / submit с заданной конкурентностью."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url", default="http://localhost:8000",
+            help="Базовый адрес сервера"
+        )
+        parser.add_argument(
+            "-c", "--concurrency", type=int, default=32,
+            help="Число одновременных клиентов"
+        )
+        parser.add_argument(
+            "-n", "--requests", type=int, default=2000,
+            help="Число запросов на сценарий"
+        )
+        parser.add_argument(
+            "--scenario", choices=SCENARIOS, action="append",
+            help="Сценарий (можно несколько); по умолчанию — все"
+        )
+        parser.add_argument(
+            "--users", type=int, default=100,
+            help="Сколько тестовых пользователей создать"
+        )
+
+    def handle(self, *args, **options):
+        nicknames = self._seed_users(options["users"])
+        survey = Survey.objects.create(
+            external_id=f"bench-{uuid.uuid4().hex[:8]}",
+            title="Benchmark",
+            questions=[f"Вопрос {i}" for i in range(1, 11)],
+        )
+        scenarios = options["scenario"] or list(SCENARIOS)
+
+        self.stdout.write(
+            f"{'scenario':<10}{'requests':>10}{'errors':>8}{'rps':>10}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+        for scenario in scenarios:
+            result = asyncio.run(self._run(
+                options["url"].rstrip("/"), scenario, survey.id, nicknames,
+                options["concurrency"], options["requests"],
+            ))
+            self.stdout.write(
+                f"{scenario:<10}{result['requests']:>10}{result['errors']:>8}"
+                f"{result['rps']:>10.1f}{result['p50']:>10.1f}"
+                f"{result['p95']:>10.1f}{result['p99']:>10.1f}"
+            )
+
+    def _seed_users(self, count):
+        prefix = f"bench_{uuid.uuid4().hex[:6]}"
+        users = [
+            User(
+                tg_nickname=f"{prefix}_{i}", name="Bench", surname="User",
+                age=18 + i % 60, gender="MF"[i % 2],
+            )
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users)
+        return [user.tg_nickname for user in users]
+
+    async def _run(self, base, scenario, survey_id, nicknames,
+                   concurrency, total):
+        latencies = []
+        errors = 0
+        counter = iter(range(total))
+        limits = httpx.Limits(
+            max_connections=concurrency,
+            max_keepalive_connections=concurrency,
+        )
+
+        async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+
+            def build_request(i):
+                if scenario == "lookup":
+                    nickname = nicknames[i % len(nicknames)]
+                    return "GET", f"{base}/api/users/by-nickname/{nickname}/", None
+                if scenario == "survey":
+                    return "GET", f"{base}/api/surveys/{survey_id}/", None
+                return "POST", f"{base}/api/surveys/{survey_id}/submit/", {
+                    "answers": [f"ответ {j}" for j in range(10)],
+                    "telegram_username": nicknames[i % len(nicknames)],
+                }
+
+            async def worker():
+                nonlocal errors
+                for i in counter:
+                    method, url, payload = build_request(i)
+                    started = time.perf_counter()
+                    try:
+                        resp = await client.request(method, url, json=payload)
+                        if resp.status_code >= 400:
+                            errors += 1
+                    except httpx.HTTPError:
+                        errors += 1
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50": statistics.median(latencies) if latencies else 0.0,
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+        }
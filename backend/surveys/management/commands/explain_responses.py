@@ -0,0 +1,220 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from surveys.models import Survey, SurveyResponse, User
+
+
+SEED_PREFIX = "explain"
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет БД синтетическими ответами (по умолчанию миллион) и "
+        "выводит планы EXPLAIN ANALYZE основных запросов к SurveyResponse."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=1_000_000,
+            help="Сколько ответов сгенерировать"
+        )
+        parser.add_argument("--surveys", type=int, default=50)
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument(
+            "--days", type=int, default=90,
+            help="За сколько дней раскидать submitted_at"
+        )
+        parser.add_argument(
+            "--skip-seed", action="store_true",
+            help="Не генерировать данные, использовать уже созданные"
+        )
+        parser.add_argument(
+            "--cleanup", action="store_true",
+            help="Удалить синтетические данные после прогона"
+        )
+
+    def handle(self, *args, **options):
+        if not options["skip_seed"]:
+            self._seed(options)
+
+        surveys = list(
+            Survey.objects.filter(external_id__startswith=f"{SEED_PREFIX}-")
+            .values_list("pk", flat=True)
+        )
+        if not surveys:
+            self.stderr.write("Нет синтетических данных, запустите без --skip-seed")
+            return
+
+        survey_id = surveys[len(surveys) // 2]
+        sample = (
+            SurveyResponse.objects.filter(survey_id=survey_id)
+            .exclude(user=None)
+            .values("user_id", "telegram_user_id")
+            .first()
+        )
+        if sample is None:
+            self.stderr.write("В выбранном опросе нет ответов")
+            return
+        now = timezone.now()
+        week_ago = now - timedelta(days=7)
+
+        queries = {
+            "Ответы опроса за неделю (выгрузка)": (
+                SurveyResponse.objects
+                .filter(survey_id=survey_id, submitted_at__gte=week_ago)
+                .order_by("submitted_at")
+                .values("id", "answers", "submitted_at")
+            ),
+            "Последние 100 ответов опроса": (
+                SurveyResponse.objects
+                .filter(survey_id=survey_id)
+                .order_by("-submitted_at")[:100]
+            ),
+            "Число ответов опроса по дням": (
+                SurveyResponse.objects
+                .filter(survey_id=survey_id)
+                .annotate(day=TruncDate("submitted_at"))
+                .values("day")
+                .annotate(total=Count("id"))
+            ),
+            "Проходил ли пользователь опрос": (
+                SurveyResponse.objects
+                .filter(user_id=sample["user_id"], survey_id=survey_id)
+            ),
+            "Все ответы пользователя": (
+                SurveyResponse.objects.filter(user_id=sample["user_id"])
+            ),
+            "Ответы по telegram_user_id": (
+                SurveyResponse.objects
+                .filter(telegram_user_id=sample["telegram_user_id"])
+            ),
+        }
+
+        explain_options = {}
+        if connection.vendor == "postgresql":
+            explain_options = {"analyze": True, "buffers": True}
+
+        for title, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {title}"))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
+
+        if options["cleanup"]:
+            self._cleanup()
+
+    def _seed(self, options):
+        started = time.perf_counter()
+        prefix = f"{SEED_PREFIX}-{uuid.uuid4().hex[:6]}"
+
+        surveys = Survey.objects.bulk_create([
+            Survey(
+                external_id=f"{prefix}-{i}",
+                title=f"Synthetic {i}",
+                questions=[f"Вопрос {q}" for q in range(1, 11)],
+            )
+            for i in range(options["surveys"])
+        ])
+        users = User.objects.bulk_create(
+            [
+                User(
+                    tg_nickname=f"{prefix}_{i}", name="Synthetic",
+                    surname="User", age=random.randint(14, 80),
+                    gender=random.choice("MFO"),
+                )
+                for i in range(options["users"])
+            ],
+            batch_size=10_000,
+        )
+        survey_ids = [survey.pk for survey in surveys]
+        user_ids = [user.pk for user in users]
+
+        if connection.vendor == "postgresql":
+            self._seed_responses_postgres(options, survey_ids, user_ids)
+        else:
+            self._seed_responses_generic(options, survey_ids, user_ids)
+
+        self.stdout.write(
+            f"Сгенерировано {options['rows']} ответов за "
+            f"{time.perf_counter() - started:.1f} с"
+        )
+
+    def _seed_responses_postgres(self, options, survey_ids, user_ids):
+        # generate_series на стороне сервера на порядки быстрее,
+        # чем передавать миллионы строк из Python
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO surveys_surveyresponse
+                    (survey_id, user_id, answers, telegram_user_id,
+                     telegram_username, submitted_at)
+                SELECT
+                    (%(survey_ids)s::bigint[])[1 + (g %% %(n_surveys)s)],
+                    u.user_id,
+                    '["да", "нет", "не знаю"]'::jsonb,
+                    (1000000000 + u.user_id)::text,
+                    '',
+                    now() - random() * make_interval(days => %(days)s)
+                FROM generate_series(1, %(rows)s) AS g
+                -- Ссылка на g делает подзапрос коррелированным,
+                -- и случайный пользователь выбирается для каждой строки
+                CROSS JOIN LATERAL (
+                    SELECT (%(user_ids)s::bigint[])[
+                        1 + floor(random() * %(n_users)s)::int
+                    ] AS user_id
+                    WHERE g IS NOT NULL
+                ) AS u
+                """,
+                {
+                    "survey_ids": survey_ids,
+                    "n_surveys": len(survey_ids),
+                    "user_ids": user_ids,
+                    "n_users": len(user_ids),
+                    "days": options["days"],
+                    "rows": options["rows"],
+                },
+            )
+            cursor.execute("ANALYZE surveys_surveyresponse")
+
+    def _seed_responses_generic(self, options, survey_ids, user_ids):
+        now = timezone.now()
+        period = options["days"] * 86400
+        batch = []
+        for i in range(options["rows"]):
+            user_id = random.choice(user_ids)
+            batch.append(SurveyResponse(
+                survey_id=survey_ids[i % len(survey_ids)],
+                user_id=user_id,
+                answers=["да", "нет", "не знаю"],
+                telegram_user_id=str(1_000_000_000 + user_id),
+            ))
+            if len(batch) == 10_000:
+                self._insert_batch(batch, now, period)
+                batch = []
+        if batch:
+            self._insert_batch(batch, now, period)
+
+    def _insert_batch(self, batch, now, period):
+        created = SurveyResponse.objects.bulk_create(batch)
+        # submitted_at — auto_now_add, поэтому время раскидываем отдельно
+        for response in created:
+            response.submitted_at = now - timedelta(
+                seconds=random.uniform(0, period)
+            )
+        SurveyResponse.objects.bulk_update(created, ["submitted_at"])
+
+    def _cleanup(self):
+        Survey.objects.filter(
+            external_id__startswith=f"{SEED_PREFIX}-"
+        ).delete()
+        User.objects.filter(
+            tg_nickname__startswith=f"{SEED_PREFIX}-"
+        ).delete()
+        self.stdout.write("Синтетические данные удалены")
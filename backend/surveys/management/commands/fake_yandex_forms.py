@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from surveys.fake_yandex import FakeYandexForms
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает локальный фейковый сервер Яндекс Форм с демо-формой "
+        "'demo'. Бэкенд направляется на него переменными YANDEX_OAUTH_URL "
+        "и YANDEX_FORMS_API_URL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **options):
+        server = FakeYandexForms(host=options["host"], port=options["port"])
+        self.stdout.write(
+            f"YANDEX_OAUTH_URL={server.oauth_url}\n"
+            f"YANDEX_FORMS_API_URL={server.api_url}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,63 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys.forwarding import Forwarder
+from surveys.yandex_forms import close_clients, get_credentials
+
+
+class Command(BaseCommand):
+    help = (
+        "Фоновый воркер: пересылает сохранённые ответы в Яндекс Формы "
+        "пачками, с ограничением частоты и повторами при ошибках."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Обработать созревшие ответы и выйти"
+        )
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--rate", type=float, help="Запросов к API в секунду"
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0,
+            help="Пауза между проверками пустой очереди, секунды"
+        )
+
+    def handle(self, *args, **options):
+        client_id, client_secret = get_credentials()
+        if not client_id or not client_secret:
+            raise CommandError(
+                "YANDEX_CLIENT_ID или YANDEX_CLIENT_SECRET не установлены"
+            )
+
+        forwarder = Forwarder(
+            client_id, client_secret,
+            batch_size=options["batch_size"], rate=options["rate"],
+        )
+        try:
+            asyncio.run(self._run(forwarder, options))
+        except KeyboardInterrupt:
+            pass
+
+    async def _run(self, forwarder, options):
+        try:
+            await self._forward(forwarder, options)
+        finally:
+            await close_clients()
+
+    async def _forward(self, forwarder, options):
+        if not options["once"]:
+            self.stdout.write("Воркер пересылки в Яндекс Формы запущен")
+            await forwarder.run(options["poll_interval"])
+            return
+
+        total = 0
+        while True:
+            processed = await forwarder.forward_due()
+            total += processed
+            if processed < forwarder.batch_size:
+                break
+        self.stdout.write(f"Обработано ответов: {total}")
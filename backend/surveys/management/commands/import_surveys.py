@@ -0,0 +1,65 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys.importing import IMPORT_CONCURRENCY, import_forms
+from surveys.models import Survey
+from surveys.yandex_forms import close_clients, get_credentials
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует или повторно синхронизирует опросы из Яндекс Форм. "
+        "Формы загружаются параллельно, изменившиеся опросы сохраняются "
+        "одним upsert по external_id, неизменённые пропускаются. "
+        "Для периодической синхронизации запускайте с --all из cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "external_ids", nargs="*", help="ID форм в Яндекс Формах"
+        )
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Синхронизировать все уже импортированные опросы"
+        )
+        parser.add_argument(
+            "--file", help="Файл со списком ID форм, по одному в строке"
+        )
+        parser.add_argument(
+            "-c", "--concurrency", type=int, default=IMPORT_CONCURRENCY,
+            help="Сколько форм запрашивать одновременно"
+        )
+
+    def handle(self, *args, **options):
+        external_ids = list(options["external_ids"])
+        if options["file"]:
+            with open(options["file"], encoding="utf-8") as f:
+                external_ids += [line.strip() for line in f if line.strip()]
+        if options["all"]:
+            external_ids += list(
+                Survey.objects.values_list("external_id", flat=True)
+            )
+        if not external_ids:
+            raise CommandError("Укажите ID форм, --file или --all")
+
+        client_id, client_secret = get_credentials()
+        if not client_id or not client_secret:
+            raise CommandError(
+                "YANDEX_CLIENT_ID или YANDEX_CLIENT_SECRET не установлены"
+            )
+
+        result = asyncio.run(self._import(
+            external_ids, client_id, client_secret, options["concurrency"]
+        ))
+
+        for key in ("created", "updated", "unchanged", "not_found"):
+            self.stdout.write(f"{key}: {len(result[key])}")
+        for external_id, error in result["errors"].items():
+            self.stderr.write(f"{external_id}: {error}")
+
+    async def _import(self, *args):
+        try:
+            return await import_forms(*args)
+        finally:
+            await close_clients()
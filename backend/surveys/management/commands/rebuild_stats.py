@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from surveys.models import Survey
+from surveys.stats import rebuild_survey_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает агрегаты статистики (SurveyStat) по сохранённым "
+        "ответам. Нужен для первичного заполнения и периодической сверки, "
+        "например из cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--survey", type=int, action="append",
+            help="ID опроса (можно несколько); по умолчанию — все"
+        )
+
+    def handle(self, *args, **options):
+        surveys = Survey.objects.order_by("pk")
+        if options["survey"]:
+            surveys = surveys.filter(pk__in=options["survey"])
+
+        for survey_id in surveys.values_list("pk", flat=True):
+            total = rebuild_survey_stats(survey_id)
+            self.stdout.write(f"Опрос #{survey_id}: {total} ответов")
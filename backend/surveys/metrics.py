@@ -0,0 +1,173 @@
+"""Метрики бэкенда в формате Prometheus.
+
+MetricsMiddleware замеряет каждый запрос по имени view: время ответа,
+число SQL-запросов и суммарное время в БД. SQL считается обёрткой
+connection.execute_wrapper, которая ставится на каждое новое соединение
+и пишет в статистику текущего запроса через contextvar — так учитываются
+и запросы async-view, выполненные в потоках sync_to_async.
+
+Под gunicorn с несколькими воркерами задайте PROMETHEUS_MULTIPROC_DIR:
+значения пишутся в общие файлы, а /metrics собирает их со всех процессов.
+"""
+import contextvars
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+REQUEST_LATENCY = Histogram(
+    "backend_request_seconds",
+    "Время обработки запроса",
+    ["view", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    "backend_requests_total",
+    "Обработанные запросы",
+    ["view", "method", "status"],
+)
+EXCEPTIONS = Counter(
+    "backend_exceptions_total",
+    "Необработанные исключения во view",
+    ["view", "error"],
+)
+DB_QUERIES = Histogram(
+    "backend_db_queries_per_request",
+    "Число SQL-запросов за один HTTP-запрос",
+    ["view"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME = Histogram(
+    "backend_db_seconds_per_request",
+    "Суммарное время SQL-запросов за один HTTP-запрос",
+    ["view"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "backend_cache_requests_total",
+    "Обращения к кешам в памяти процесса",
+    ["cache", "result"],
+)
+
+# Запросы к самому /metrics не замеряются
+SKIP_VIEWS = {"metrics"}
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+_request_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    # В начало списка: connection.execute_wrapper() снимает обёртки
+    # с конца, и наша не должна попасть под чужой pop()
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_queries)
+
+
+connection_created.connect(_install_wrapper)
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    """Время, статус и SQL-запросы каждого запроса по имени view."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, started = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self._finish(request, response, stats, started)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self._finish(request, response, stats, started)
+        return response
+
+    def process_exception(self, request, exception):
+        EXCEPTIONS.labels(
+            _view_name(request), exception.__class__.__name__
+        ).inc()
+
+    def _start(self):
+        stats = RequestStats()
+        return stats, _request_stats.set(stats), time.perf_counter()
+
+    def _finish(self, request, response, stats, started):
+        view = _view_name(request)
+        if view in SKIP_VIEWS:
+            return
+        REQUEST_LATENCY.labels(view, request.method).observe(
+            time.perf_counter() - started
+        )
+        REQUESTS.labels(view, request.method, response.status_code).inc()
+        DB_QUERIES.labels(view).observe(stats.queries)
+        DB_TIME.labels(view).observe(stats.db_time)
+
+
+def metrics_view(request):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
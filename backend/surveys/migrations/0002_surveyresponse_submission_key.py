@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-16 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveyresponse',
+            name='submission_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.24 on 2026-10-16 20:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0002_surveyresponse_submission_key'),
+    ]
+
+    operations = [
+        # Сначала составные индексы, затем удаление одиночных индексов FK,
+        # чтобы запросы по survey/user ни в какой момент не остались без индекса
+        migrations.AddIndex(
+            model_name='surveyresponse',
+            index=models.Index(fields=['survey', 'submitted_at'], name='response_survey_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='surveyresponse',
+            index=models.Index(fields=['user', 'survey'], name='response_user_survey_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='surveyresponse',
+            index=models.Index(fields=['telegram_user_id'], name='response_tg_user_idx'),
+        ),
+        migrations.AlterField(
+            model_name='surveyresponse',
+            name='survey',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='surveys.survey'),
+        ),
+        migrations.AlterField(
+            model_name='surveyresponse',
+            name='user',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='surveys.user'),
+        ),
+    ]
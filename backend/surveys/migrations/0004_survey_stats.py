@@ -0,0 +1,29 @@
+# Generated by Django 4.2.24 on 2026-10-16 20:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0003_response_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=16)),
+                ('bucket', models.CharField(blank=True, default='', max_length=32)),
+                ('value', models.CharField(blank=True, default='', max_length=255)),
+                ('count', models.BigIntegerField(default=0)),
+                ('survey', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='surveys.survey')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='surveystat',
+            constraint=models.UniqueConstraint(fields=('survey', 'dimension', 'bucket', 'value'), name='survey_stat_key'),
+        ),
+    ]
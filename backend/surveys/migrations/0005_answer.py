@@ -0,0 +1,28 @@
+# Generated by Django 4.2.24 on 2026-10-16 20:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0004_survey_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Answer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_index', models.PositiveSmallIntegerField()),
+                ('value', models.TextField()),
+                ('value_hash', models.CharField(max_length=16)),
+                ('response', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='normalized_answers', to='surveys.surveyresponse')),
+                ('survey', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='surveys.survey')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['survey', 'question_index', 'value_hash'], name='answer_question_value_idx')],
+            },
+        ),
+    ]
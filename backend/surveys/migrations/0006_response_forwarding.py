@@ -0,0 +1,42 @@
+# Generated by Django 4.2.24 on 2026-10-16 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0005_answer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveyresponse',
+            name='forward_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='surveyresponse',
+            name='forward_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='surveyresponse',
+            name='forward_next_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='surveyresponse',
+            name='forward_status',
+            field=models.CharField(choices=[('skipped', 'Не пересылается'), ('pending', 'Ожидает отправки'), ('sent', 'Отправлен'), ('failed', 'Ошибка отправки')], default='skipped', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='surveyresponse',
+            name='forwarded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='surveyresponse',
+            index=models.Index(condition=models.Q(('forward_status', 'pending')), fields=['forward_next_at'], name='response_forward_due_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.24 on 2026-10-16 21:02
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicates(apps, schema_editor):
+    # До уникального ограничения повторный импорт создавал дубликаты.
+    # Самый старый опрос сохраняет external_id, у остальных к нему
+    # дописывается id: ответы на них не теряются, а ограничение создаётся
+    Survey = apps.get_model('surveys', 'Survey')
+    duplicated = (
+        Survey.objects.values('external_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .values_list('external_id', flat=True)
+    )
+    for external_id in list(duplicated):
+        surveys = Survey.objects.filter(external_id=external_id).order_by('pk')
+        for survey in surveys[1:]:
+            suffix = f'~{survey.pk}'
+            survey.external_id = external_id[:128 - len(suffix)] + suffix
+            survey.save(update_fields=['external_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0006_response_forwarding'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='survey',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='survey',
+            name='external_id',
+            field=models.CharField(max_length=128, unique=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.24 on 2026-10-16 21:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0007_survey_external_id_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponseDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('telegram_user_id', models.CharField(max_length=128)),
+                ('telegram_username', models.CharField(blank=True, default='', max_length=128)),
+                ('answers', models.JSONField(default=list)),
+                ('answered', models.PositiveSmallIntegerField(default=0)),
+                ('version', models.CharField(blank=True, default='', max_length=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('survey', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='drafts', to='surveys.survey')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='drafts', to='surveys.user')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='responsedraft',
+            constraint=models.UniqueConstraint(fields=('survey', 'telegram_user_id'), name='draft_survey_tg_user'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.24 on 2026-10-16 21:13
+
+from django.db import migrations, models
+import surveys.questions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0008_response_draft'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='survey',
+            name='questions',
+            field=models.JSONField(default=list, validators=[surveys.questions.validate_questions]),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.24 on 2026-10-16 21:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_telegram_ids(apps, schema_editor):
+    # Пользователям, зарегистрированным до появления поля, берём id из
+    # их последнего ответа, где бот его передал
+    User = apps.get_model('surveys', 'User')
+    SurveyResponse = apps.get_model('surveys', 'SurveyResponse')
+    ids = {}
+    rows = (
+        SurveyResponse.objects.filter(user__isnull=False)
+        .exclude(telegram_user_id='')
+        .order_by('pk')
+        .values_list('user_id', 'telegram_user_id')
+    )
+    for user_id, telegram_user_id in rows.iterator(chunk_size=2000):
+        if telegram_user_id.isdigit():
+            ids[user_id] = int(telegram_user_id)
+    user_ids = list(ids)
+    for start in range(0, len(user_ids), 1000):
+        users = list(
+            User.objects.filter(pk__in=user_ids[start:start + 1000]).only('pk')
+        )
+        for user in users:
+            user.telegram_id = ids[user.pk]
+        User.objects.bulk_update(users, ['telegram_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0009_typed_questions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='telegram_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_telegram_ids, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(blank=True, default='')),
+                ('age_min', models.PositiveIntegerField(blank=True, null=True)),
+                ('age_max', models.PositiveIntegerField(blank=True, null=True)),
+                ('gender', models.CharField(blank=True, choices=[('M', 'Мужской'), ('F', 'Женский'), ('O', 'Другой')], default='', max_length=1)),
+                ('responded', models.BooleanField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('running', 'Идёт'), ('paused', 'Приостановлена'), ('done', 'Завершена'), ('cancelled', 'Отменена')], default='running', max_length=16)),
+                ('cursor', models.BigIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('blocked', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('locked_by', models.CharField(blank=True, default='', max_length=64)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcasts', to='surveys.survey')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'running')), fields=['status'], name='broadcast_running_idx')],
+            },
+        ),
+    ]
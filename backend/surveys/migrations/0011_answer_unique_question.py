@@ -0,0 +1,41 @@
+# Generated by Django 4.2.24 on 2026-10-16 22:05
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+import django.db.models.deletion
+
+
+def drop_duplicate_answers(apps, schema_editor):
+    # До появления ограничения повторная доставка ответа могла записать
+    # его строки Answer дважды — оставляем первую копию
+    Answer = apps.get_model('surveys', 'Answer')
+    duplicates = (
+        Answer.objects.values('response_id', 'question_index')
+        .annotate(copies=Count('id'), keep=Min('id'))
+        .filter(copies__gt=1)
+    )
+    for row in duplicates.iterator():
+        Answer.objects.filter(
+            response_id=row['response_id'],
+            question_index=row['question_index'],
+        ).exclude(pk=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0010_broadcast'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='answer',
+            constraint=models.UniqueConstraint(fields=('response', 'question_index'), name='answer_response_question'),
+        ),
+        migrations.AlterField(
+            model_name='answer',
+            name='response',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='normalized_answers', to='surveys.surveyresponse'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.24 on 2026-10-16 22:38
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+CATEGORICAL_TYPES = ('single', 'multiple', 'scale')
+
+
+def split_answer_stats(apps, schema_editor):
+    # Число ответивших на вопрос теперь отдельный счётчик, а распределения
+    # ведутся только по вопросам с вариантами и шкалам — переносим
+    # первое из старых строк answer и удаляем строки свободного текста
+    Survey = apps.get_model('surveys', 'Survey')
+    SurveyStat = apps.get_model('surveys', 'SurveyStat')
+    for survey_id, questions in Survey.objects.values_list('pk', 'questions'):
+        answer_rows = SurveyStat.objects.filter(
+            survey_id=survey_id, dimension='answer'
+        )
+        answered = (
+            answer_rows.values('bucket')
+            .annotate(total=Sum('count'))
+            .values_list('bucket', 'total')
+        )
+        SurveyStat.objects.bulk_create([
+            SurveyStat(
+                survey_id=survey_id, dimension='answered', bucket=bucket,
+                count=total,
+            )
+            for bucket, total in answered
+        ])
+        text_buckets = [
+            str(index) for index, question in enumerate(questions or [])
+            if not (
+                isinstance(question, dict)
+                and question.get('type') in CATEGORICAL_TYPES
+            )
+        ]
+        answer_rows.filter(bucket__in=text_buckets).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0011_answer_unique_question'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='surveystat',
+            name='survey_stat_key',
+        ),
+        migrations.AddField(
+            model_name='surveystat',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='surveystat',
+            constraint=models.UniqueConstraint(fields=('survey', 'dimension', 'bucket', 'value', 'shard'), name='survey_stat_key'),
+        ),
+        migrations.RunPython(split_answer_stats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .questions import validate_questions
+
 
 class User(models.Model):
     GENDER_CHOICES = [
@@ -13,6 +15,10 @@ class User(models.Model):
     surname = models.CharField(max_length=255)
     age = models.PositiveIntegerField()
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES)
+    # Числовой id в Telegram — адрес для рассылок (username меняется и
+    # для отправки сообщения не годится). Передаётся при регистрации,
+    # у прежних пользователей заполняется по их ответам
+    telegram_id = models.BigIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -24,13 +30,18 @@ class Survey(models.Model):
     """
     Опрос, загруженный из внешнего источника (Яндекс Формы).
     """
-    # Внешний идентификатор формы (из Яндекс Форм)
-    external_id = models.CharField(max_length=128, db_index=True)
+    # Внешний идентификатор формы (из Яндекс Форм); ключ upsert при импорте
+    external_id = models.CharField(max_length=128, unique=True)
     title = models.CharField(max_length=255, help_text="Название опроса")
     description = models.TextField(blank=True, help_text="Описание опроса")
 
-    # Вопросы анкеты как список строк
-    questions = models.JSONField(default=list)
+    # Вопросы анкеты: строки (свободный ответ) или объекты с типом
+    # и вариантами ответа (см. questions.py)
+    questions = models.JSONField(default=list, validators=[validate_questions])
+
+    # Хеш title/description/questions: неизменённые формы при повторном
+    # импорте не перезаписываются
+    content_hash = models.CharField(max_length=64, blank=True, default="")
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -40,12 +51,15 @@ class Survey(models.Model):
 
 class SurveyResponse(models.Model):
     """Ответы пользователя на конкретный опрос."""
+    # Отдельные индексы по FK не нужны: их покрывают составные индексы
+    # ниже (survey, submitted_at) и (user, survey)
     survey = models.ForeignKey(
-        Survey, on_delete=models.CASCADE, related_name="responses"
+        Survey, on_delete=models.CASCADE, related_name="responses",
+        db_index=False
     )
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="responses", 
-        null=True, blank=True
+        null=True, blank=True, db_index=False
     )
     # Произвольные ответы в виде списка строк (по порядку вопросов)
     answers = models.JSONField(default=list)
@@ -54,8 +68,250 @@ class SurveyResponse(models.Model):
     telegram_user_id = models.CharField(max_length=128, blank=True, default="")
     telegram_username = models.CharField(max_length=128, blank=True, default="")
 
+    # Ключ идемпотентности, генерируется клиентом: повторная отправка
+    # того же ключа не создаёт дубликат
+    submission_key = models.CharField(
+        max_length=64, unique=True, null=True, blank=True
+    )
+
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    # Пересылка в Яндекс Формы (см. forwarding.py). Строки со статусом
+    # pending и есть очередь фонового воркера
+    FORWARD_SKIPPED = "skipped"
+    FORWARD_PENDING = "pending"
+    FORWARD_SENT = "sent"
+    FORWARD_FAILED = "failed"
+    FORWARD_STATUS_CHOICES = [
+        (FORWARD_SKIPPED, "Не пересылается"),
+        (FORWARD_PENDING, "Ожидает отправки"),
+        (FORWARD_SENT, "Отправлен"),
+        (FORWARD_FAILED, "Ошибка отправки"),
+    ]
+    forward_status = models.CharField(
+        max_length=8, choices=FORWARD_STATUS_CHOICES, default=FORWARD_SKIPPED
+    )
+    forward_attempts = models.PositiveSmallIntegerField(default=0)
+    # Когда воркеру взять ответ в работу (следующая попытка)
+    forward_next_at = models.DateTimeField(null=True, blank=True)
+    forward_error = models.TextField(blank=True, default="")
+    forwarded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Выборки и выгрузки ответов опроса за период
+            models.Index(
+                fields=["survey", "submitted_at"],
+                name="response_survey_time_idx",
+            ),
+            # «Проходил ли пользователь опрос», ответы пользователя
+            models.Index(
+                fields=["user", "survey"], name="response_user_survey_idx"
+            ),
+            models.Index(
+                fields=["telegram_user_id"], name="response_tg_user_idx"
+            ),
+            # Очередь пересылки: частичный индекс только по ожидающим,
+            # отправленные ответы его не раздувают
+            models.Index(
+                fields=["forward_next_at"],
+                condition=models.Q(forward_status="pending"),
+                name="response_forward_due_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Response to survey #{self.survey_id} at {self.submitted_at:%Y-%m-%d %H:%M}"
 
+
+
+class ResponseDraft(models.Model):
+    """
+    Незавершённое прохождение опроса: ответы, сохранённые ботом по ходу
+    анкеты (см. drafts.py). По черновику пользователь продолжает анкету
+    с места остановки; при отправке ответа черновик удаляется, так что
+    оставшиеся черновики — это брошенные и идущие прохождения.
+    """
+    # Отдельный индекс по опросу не нужен: его покрывает ключ уникальности
+    survey = models.ForeignKey(
+        Survey, on_delete=models.CASCADE, related_name="drafts",
+        db_index=False
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="drafts",
+        null=True, blank=True
+    )
+    telegram_user_id = models.CharField(max_length=128)
+    telegram_username = models.CharField(max_length=128, blank=True, default="")
+    answers = models.JSONField(default=list)
+    # Число ответов — для воронки «на каком вопросе бросают» без разбора JSON
+    answered = models.PositiveSmallIntegerField(default=0)
+    # Версия вопросов, на которые даны ответы (задаёт клиент)
+    version = models.CharField(max_length=16, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Один черновик на пользователя и опрос; ключ upsert
+            models.UniqueConstraint(
+                fields=["survey", "telegram_user_id"],
+                name="draft_survey_tg_user",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"Draft of survey #{self.survey_id} by {self.telegram_user_id}: "
+            f"{self.answered} answers"
+        )
+
+
+class Answer(models.Model):
+    """
+    Ответ на один вопрос — нормализованная копия SurveyResponse.answers.
+    Заполняется при сохранении ответа (если включено
+    SURVEYS_NORMALIZED_ANSWERS) и командой backfill_answers.
+
+    value_hash — короткий хеш значения: индекс по нему компактен и для
+    длинных свободных ответов, а сравнение с value отсекает коллизии.
+    """
+    # Отдельный индекс по FK не нужен: его покрывает уникальность
+    # (response, question_index)
+    response = models.ForeignKey(
+        SurveyResponse, on_delete=models.CASCADE,
+        related_name="normalized_answers", db_index=False
+    )
+    # Денормализовано из response, чтобы фильтр по опросу шёл по индексу
+    survey = models.ForeignKey(
+        Survey, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    question_index = models.PositiveSmallIntegerField()
+    value = models.TextField()
+    value_hash = models.CharField(max_length=16)
+
+    class Meta:
+        constraints = [
+            # Один ответ на вопрос: повторная запись того же ответа
+            # (гонка доставок, backfill) не создаёт копий
+            models.UniqueConstraint(
+                fields=["response", "question_index"],
+                name="answer_response_question",
+            ),
+        ]
+        indexes = [
+            # «Кто ответил X на вопрос N» и распределения по вопросу
+            models.Index(
+                fields=["survey", "question_index", "value_hash"],
+                name="answer_question_value_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Answer #{self.response_id}[{self.question_index}]: {self.value}"
+
+
+class SurveyStat(models.Model):
+    """
+    Агрегированный счётчик статистики опроса. Обновляется инкрементально
+    при сохранении ответов (см. stats.py), поэтому статистика читается
+    без сканирования SurveyResponse.
+
+    dimension — срез: total, answer (bucket — номер вопроса, value —
+    ответ), answered (bucket — номер вопроса), day (bucket — дата),
+    age (bucket — возрастная группа), gender (bucket — пол).
+    Счётчик разбит на шарды (shard), значение — их сумма.
+    """
+    survey = models.ForeignKey(
+        Survey, on_delete=models.CASCADE, related_name="stats",
+        db_index=False
+    )
+    dimension = models.CharField(max_length=16)
+    bucket = models.CharField(max_length=32, blank=True, default="")
+    value = models.CharField(max_length=255, blank=True, default="")
+    shard = models.PositiveSmallIntegerField(default=0)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Ключ для INSERT ... ON CONFLICT; покрывает и выборку по опросу
+            models.UniqueConstraint(
+                fields=["survey", "dimension", "bucket", "value", "shard"],
+                name="survey_stat_key",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"Stat #{self.survey_id} {self.dimension}:{self.bucket}:"
+            f"{self.value} = {self.count}"
+        )
+
+
+class Broadcast(models.Model):
+    """
+    Рассылка приглашения пройти опрос сегменту пользователей (см.
+    broadcasts.py). Получатели выбираются по фильтрам в порядке User.pk,
+    cursor — pk последнего обработанного, поэтому прерванная рассылка
+    продолжается с места остановки. Рассылку ведёт один воркер бота
+    за раз: он «арендует» её до locked_until.
+    """
+    STATUS_RUNNING = "running"
+    STATUS_PAUSED = "paused"
+    STATUS_DONE = "done"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Идёт"),
+        (STATUS_PAUSED, "Приостановлена"),
+        (STATUS_DONE, "Завершена"),
+        (STATUS_CANCELLED, "Отменена"),
+    ]
+
+    survey = models.ForeignKey(
+        Survey, on_delete=models.CASCADE, related_name="broadcasts"
+    )
+    # Текст приглашения (HTML); пустой — стандартный с названием опроса
+    text = models.TextField(blank=True, default="")
+
+    # Сегмент: пустые фильтры не ограничивают выборку
+    age_min = models.PositiveIntegerField(null=True, blank=True)
+    age_max = models.PositiveIntegerField(null=True, blank=True)
+    gender = models.CharField(
+        max_length=1, choices=User.GENDER_CHOICES, blank=True, default=""
+    )
+    # True — только ответившие на опрос, False — только не ответившие
+    responded = models.BooleanField(null=True, blank=True)
+
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=STATUS_RUNNING
+    )
+    cursor = models.BigIntegerField(default=0)
+    # Размер сегмента на момент создания — для прогресса
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    # Пользователь заблокировал бота или чат недоступен
+    blocked = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+
+    locked_by = models.CharField(max_length=64, blank=True, default="")
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Поиск рассылки для воркера: идущих единицы
+            models.Index(
+                fields=["status"],
+                condition=models.Q(status="running"),
+                name="broadcast_running_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"Broadcast #{self.pk} of survey #{self.survey_id}: "
+            f"{self.status}, {self.sent}/{self.total}"
+        )
@@ -0,0 +1,42 @@
+"""Чтение больших выборок порциями по ключу (keyset-пагинация).
+
+QuerySet.iterator(chunk_size=...) держит память постоянной только
+с серверным курсором. За PgBouncer в режиме transaction pooling они
+выключены (DISABLE_SERVER_SIDE_CURSORS), и iterator() молча загружает
+всю выборку в память клиента. Здесь каждая порция — отдельный запрос
+WHERE (ключ) > (последний ключ) ORDER BY ключ LIMIT n, который работает
+одинаково при любых настройках курсоров.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+
+def _after(fields, values):
+    """Условие «строка идёт после values» в порядке сортировки по fields."""
+    conditions = []
+    for i, field in enumerate(fields):
+        equal = {fields[j]: values[j] for j in range(i)}
+        conditions.append(Q(**equal, **{f"{field}__gt": values[i]}))
+    return reduce(or_, conditions)
+
+
+def keyset_chunks(queryset, keys, chunk_size):
+    """Порции (списки) строк values_list-выборки.
+
+    keys — {поле: номер в строке} в порядке сортировки; последнее поле
+    должно быть уникальным (обычно pk). Собственная сортировка queryset
+    заменяется сортировкой по keys.
+    """
+    fields = list(keys)
+    ordered = queryset.order_by(*fields)
+    last = None
+    while True:
+        page = ordered if last is None else ordered.filter(_after(fields, last))
+        rows = list(page[:chunk_size])
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        last = [rows[-1][keys[field]] for field in fields]
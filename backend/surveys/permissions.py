@@ -0,0 +1,20 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+class HasWorkerToken(BasePermission):
+    """
+    Запросы воркера бота: заголовок X-Worker-Token должен совпадать
+    с BROADCAST_WORKER_TOKEN. Пока токен не задан, доступ закрыт.
+    """
+
+    message = "Неверный токен воркера"
+
+    def has_permission(self, request, view):
+        expected = settings.BROADCAST_WORKER_TOKEN
+        token = request.headers.get("X-Worker-Token", "")
+        return bool(expected) and hmac.compare_digest(
+            token.encode(), expected.encode()
+        )
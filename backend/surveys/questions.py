@@ -0,0 +1,154 @@
+"""Типы вопросов опроса.
+
+Survey.questions — список, элемент которого либо строка (вопрос со
+свободным ответом, прежний формат), либо объект:
+
+    {"text": "Оцените бота", "type": "scale", "min": 1, "max": 5}
+    {"text": "Пол", "type": "single", "options": ["M", "F"]}
+    {"text": "Что понравилось?", "type": "multiple", "options": [...]}
+
+Ответ на любой вопрос хранится строкой: для single — текст варианта,
+для scale — число, для multiple — выбранные варианты в порядке списка
+options через MULTIPLE_SEPARATOR. Одинаковый выбор даёт одинаковую
+строку, поэтому ответы на вопросы с вариантами сразу агрегируются
+счётчиками статистики без нормализации свободного текста.
+"""
+from django.core.exceptions import ValidationError
+
+
+TEXT = "text"
+SINGLE = "single"
+MULTIPLE = "multiple"
+SCALE = "scale"
+
+QUESTION_TYPES = (TEXT, SINGLE, MULTIPLE, SCALE)
+CHOICE_TYPES = (SINGLE, MULTIPLE)
+# Вопросы с ограниченным набором ответов: по ним считаются счётчики
+# статистики и кросс-таблицы (свободный текст дал бы строку на ответ)
+CATEGORICAL_TYPES = (SINGLE, MULTIPLE, SCALE)
+
+MULTIPLE_SEPARATOR = "; "
+
+# Ограничения Telegram на inline-клавиатуру, с запасом
+MAX_OPTIONS = 20
+MAX_SCALE_SIZE = 11
+
+
+def question_text(question):
+    """Текст вопроса в любом из форматов."""
+    if isinstance(question, dict):
+        return str(question.get("text") or "")
+    return str(question)
+
+
+def question_type(question):
+    if isinstance(question, dict):
+        return question.get("type") or TEXT
+    return TEXT
+
+
+def is_categorical(question):
+    return question_type(question) in CATEGORICAL_TYPES
+
+
+def validate_question(question):
+    """Проверяет вопрос; ValueError с описанием ошибки."""
+    if isinstance(question, str):
+        if not question.strip():
+            raise ValueError("Пустой текст вопроса")
+        return
+    if not isinstance(question, dict):
+        raise ValueError("Вопрос должен быть строкой или объектом")
+    if not question_text(question).strip():
+        raise ValueError("Пустой текст вопроса")
+
+    kind = question_type(question)
+    if kind not in QUESTION_TYPES:
+        raise ValueError(f"Неизвестный тип вопроса: {kind}")
+    if kind in CHOICE_TYPES:
+        options = question.get("options")
+        if not isinstance(options, list) or not options:
+            raise ValueError("Для вопроса с вариантами нужен список options")
+        if len(options) > MAX_OPTIONS:
+            raise ValueError(f"Не больше {MAX_OPTIONS} вариантов ответа")
+        labels = [str(option).strip() for option in options]
+        if not all(labels) or len(set(labels)) != len(labels):
+            raise ValueError("Варианты ответа должны быть непустыми и разными")
+        if kind == MULTIPLE and any(
+            MULTIPLE_SEPARATOR.strip() in label for label in labels
+        ):
+            raise ValueError(
+                f"Варианты не должны содержать «{MULTIPLE_SEPARATOR.strip()}»"
+            )
+    if kind == SCALE:
+        low, high = question.get("min", 1), question.get("max", 5)
+        if (
+            not isinstance(low, int) or not isinstance(high, int)
+            or isinstance(low, bool) or isinstance(high, bool)
+        ):
+            raise ValueError("Границы шкалы min и max должны быть числами")
+        if not 1 < high - low + 1 <= MAX_SCALE_SIZE:
+            raise ValueError(
+                f"В шкале должно быть от 2 до {MAX_SCALE_SIZE} значений"
+            )
+
+
+def validate_questions(value):
+    """Валидатор поля Survey.questions."""
+    if not isinstance(value, list):
+        raise ValidationError("Вопросы должны быть списком")
+    for index, question in enumerate(value):
+        try:
+            validate_question(question)
+        except ValueError as e:
+            raise ValidationError(f"Вопрос {index + 1}: {e}")
+
+
+def question_options(question):
+    """Допустимые ответы вопроса с вариантами или шкалы; для текста — []."""
+    kind = question_type(question)
+    if kind in CHOICE_TYPES:
+        return [str(option).strip() for option in question.get("options")]
+    if kind == SCALE:
+        low, high = question.get("min", 1), question.get("max", 5)
+        return [str(value) for value in range(low, high + 1)]
+    return []
+
+
+def clean_answer(question, value):
+    """Ответ в том виде, в каком он хранится; ValueError, если ответа нет
+    среди вариантов. Пустой ответ (вопрос пропущен) допустим для любого
+    типа; выбранные варианты multiple приводятся к порядку options."""
+    options = question_options(question)
+    if not options:
+        return value
+    value = "" if value is None else str(value).strip()
+    if not value:
+        return value
+    if question_type(question) == MULTIPLE:
+        separator = MULTIPLE_SEPARATOR.strip()
+        chosen = [part.strip() for part in value.split(separator)]
+        unknown = [part for part in chosen if part not in options]
+        if unknown:
+            raise ValueError(f"Нет такого варианта: {unknown[0]}")
+        return MULTIPLE_SEPARATOR.join(
+            option for option in options if option in chosen
+        )
+    if value not in options:
+        raise ValueError(f"Нет такого варианта: {value}")
+    return value
+
+
+def clean_answers(questions, answers):
+    """Проверяет ответы по вопросам опроса (см. clean_answer).
+
+    Ответы сверх числа вопросов не проверяются — они хранятся как
+    свободный текст.
+    """
+    cleaned = list(answers)
+    for index, question in enumerate(questions[:len(cleaned)]):
+        try:
+            cleaned[index] = clean_answer(question, cleaned[index])
+        except ValueError as e:
+            raise ValueError(f"Вопрос {index + 1}: {e}")
+    return cleaned
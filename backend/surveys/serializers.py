@@ -1,12 +1,16 @@
 from rest_framework import serializers
 
-from .models import Survey, SurveyResponse, User
+from .broadcasts import BROADCAST_CHUNK_MAX_SIZE
+from .importing import IMPORT_BULK_MAX_SIZE
+from .models import Broadcast, ResponseDraft, Survey, SurveyResponse, User
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['tg_nickname', 'name', 'surname', 'age', 'gender']
+        fields = [
+            'tg_nickname', 'name', 'surname', 'age', 'gender', 'telegram_id'
+        ]
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -22,21 +26,48 @@ class SurveyImportSerializer(serializers.Serializer):
     external_id = serializers.CharField()
 
 
+class SurveyBulkImportSerializer(serializers.Serializer):
+    external_ids = serializers.ListField(
+        child=serializers.CharField(max_length=128),
+        allow_empty=False,
+        max_length=IMPORT_BULK_MAX_SIZE,
+    )
+
+
 class SurveyImportResultSerializer(serializers.ModelSerializer):
     class Meta:
         model = Survey
         fields = ["id", "external_id", "title", "description", "questions"]
 
 
+class SurveySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Survey
+        fields = ["id", "external_id", "title", "description", "questions"]
+
+
 class SurveyResponseSerializer(serializers.Serializer):
+    # Пустой ответ допустим (вопрос пропущен), см. questions.clean_answer
     answers = serializers.ListField(
-        child=serializers.CharField(), allow_empty=False
+        child=serializers.CharField(allow_blank=True), allow_empty=False
     )
     user_id = serializers.IntegerField(
         required=False, help_text="ID пользователя из базы"
     )
     telegram_user_id = serializers.CharField(required=False, allow_blank=True)
-    telegram_username = serializers.CharField(required=False, allow_blank=True)
+    telegram_username = serializers.CharField(
+        required=False, allow_blank=True,
+        help_text="Username в Telegram; по нему ищется пользователь, "
+                  "если user_id не передан",
+    )
+    submission_key = serializers.CharField(
+        required=False, max_length=64,
+        help_text="Ключ идемпотентности, сгенерированный клиентом"
+    )
+
+
+class SurveyBatchResponseSerializer(SurveyResponseSerializer):
+    survey_id = serializers.IntegerField(help_text="ID опроса")
 
 
 class SurveyResponseResultSerializer(serializers.ModelSerializer):
@@ -44,7 +75,75 @@ class SurveyResponseResultSerializer(serializers.ModelSerializer):
         model = SurveyResponse
         fields = [
             "id", "survey", "answers", "user", "telegram_user_id", 
-            "telegram_username", "submitted_at"
+            "telegram_username", "submission_key", "submitted_at"
+        ]
+
+
+class SurveyDraftSerializer(serializers.Serializer):
+    telegram_user_id = serializers.CharField(max_length=128)
+    telegram_username = serializers.CharField(
+        required=False, allow_blank=True, max_length=128
+    )
+    answers = serializers.ListField(
+        child=serializers.CharField(allow_blank=True), allow_empty=True
+    )
+    version = serializers.CharField(
+        required=False, allow_blank=True, max_length=16,
+        help_text="Версия вопросов, на которые даны ответы"
+    )
+
+
+class ResponseDraftSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ResponseDraft
+        fields = [
+            "survey", "user", "telegram_user_id", "telegram_username",
+            "answers", "answered", "version", "updated_at",
+        ]
+
+
+class BroadcastCreateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Broadcast
+        fields = ["survey", "text", "age_min", "age_max", "gender", "responded"]
+
+    def validate(self, attrs):
+        age_min, age_max = attrs.get("age_min"), attrs.get("age_max")
+        if age_min is not None and age_max is not None and age_min > age_max:
+            raise serializers.ValidationError(
+                "age_min не может быть больше age_max"
+            )
+        return attrs
+
+
+class BroadcastSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Broadcast
+        fields = [
+            "id", "survey", "text", "age_min", "age_max", "gender",
+            "responded", "status", "total", "sent", "blocked", "failed",
+            "cursor", "created_at", "updated_at", "finished_at",
         ]
 
 
+class BroadcastClaimSerializer(serializers.Serializer):
+    worker = serializers.CharField(max_length=64, help_text="ID воркера бота")
+    limit = serializers.IntegerField(
+        min_value=1, max_value=BROADCAST_CHUNK_MAX_SIZE, default=100,
+        help_text="Размер пачки получателей"
+    )
+
+
+class BroadcastProgressSerializer(BroadcastClaimSerializer):
+    after = serializers.IntegerField(
+        min_value=0, help_text="Курсор, с которого выдана пачка"
+    )
+    cursor = serializers.IntegerField(
+        min_value=0, help_text="pk последнего обработанного получателя"
+    )
+    sent = serializers.IntegerField(min_value=0, default=0)
+    blocked = serializers.IntegerField(min_value=0, default=0)
+    failed = serializers.IntegerField(min_value=0, default=0)
+    release = serializers.BooleanField(
+        default=False, help_text="Освободить рассылку (воркер остановлен)"
+    )
@@ -0,0 +1,260 @@
+"""Агрегированная статистика опросов.
+
+Счётчики хранятся в SurveyStat и увеличиваются при каждом сохранении
+ответа одним запросом INSERT ... ON CONFLICT DO UPDATE, в той же
+транзакции, что и сам ответ. Чтение статистики — выборка нескольких
+сотен строк по опросу, а не сканирование всех ответов.
+
+Распределения ответов считаются только для вопросов с вариантами и шкал:
+у свободного текста по нему ведётся лишь число ответивших, иначе таблица
+росла бы со строкой на каждый ответ. Каждый счётчик разбит на
+SURVEYS_STAT_SHARDS строк (shard): транзакция сохранения прибавляет
+к случайной из них, поэтому параллельные записи не выстраиваются
+в очередь за блокировкой одной строки total, а чтение суммирует шарды.
+
+rebuild_survey_stats пересчитывает счётчики с нуля (первичное заполнение
+и периодическая сверка, см. команду rebuild_stats).
+"""
+import random
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Survey, SurveyResponse, SurveyStat, User
+from .pagination import keyset_chunks
+from .questions import is_categorical, question_text, question_type
+
+
+TOTAL = "total"
+ANSWER = "answer"
+# Сколько ответили на вопрос (bucket — номер вопроса), для любого типа
+ANSWERED = "answered"
+DAY = "day"
+AGE = "age"
+GENDER = "gender"
+
+UNKNOWN = "unknown"
+
+# Верхние границы возрастных групп (не включительно)
+AGE_BUCKETS = [
+    (18, "<18"),
+    (25, "18-24"),
+    (35, "25-34"),
+    (45, "35-44"),
+    (55, "45-54"),
+    (65, "55-64"),
+]
+AGE_BUCKET_LAST = "65+"
+
+VALUE_MAX_LENGTH = SurveyStat._meta.get_field("value").max_length
+
+# Число строк в одном INSERT при пересчёте
+UPSERT_BATCH_SIZE = 500
+
+# Сколько ответов читать одним запросом при пересчёте
+REBUILD_CHUNK_SIZE = 2000
+
+
+def age_bucket(age):
+    if age is None:
+        return UNKNOWN
+    for upper, title in AGE_BUCKETS:
+        if age < upper:
+            return title
+    return AGE_BUCKET_LAST
+
+
+def normalize_answer(value):
+    if value is None:
+        return ""
+    return str(value).strip()[:VALUE_MAX_LENGTH]
+
+
+def response_counters(answers, submitted_at, questions, age=None,
+                      gender=None):
+    """Ключи счётчиков (dimension, bucket, value), которые задевает ответ."""
+    keys = [
+        (TOTAL, "", ""),
+        (DAY, timezone.localdate(submitted_at).isoformat(), ""),
+        (AGE, age_bucket(age), ""),
+        (GENDER, gender or UNKNOWN, ""),
+    ]
+    for index, answer in enumerate(answers or []):
+        value = normalize_answer(answer)
+        if not value or index >= len(questions):
+            continue
+        keys.append((ANSWERED, str(index), ""))
+        if is_categorical(questions[index]):
+            keys.append((ANSWER, str(index), value))
+    return keys
+
+
+def survey_questions(survey_ids):
+    """{survey_id: questions} одним запросом."""
+    return dict(
+        Survey.objects.filter(pk__in=set(survey_ids))
+        .values_list("pk", "questions")
+    )
+
+
+def apply_counters(counters, shard=0):
+    """Прибавляет счётчики: {survey_id: Counter({(dimension, bucket, value): n})}.
+
+    Один запрос на пачку строк; ON CONFLICT поддерживают и PostgreSQL,
+    и SQLite >= 3.24. Строки идут в одном порядке во всех транзакциях,
+    чтобы блокировки брались последовательно и не было взаимоблокировок.
+    """
+    rows = sorted(
+        (survey_id, dimension, bucket, value, shard, count)
+        for survey_id, counter in counters.items()
+        for (dimension, bucket, value), count in counter.items()
+        if count
+    )
+    if not rows:
+        return
+
+    table = connection.ops.quote_name(SurveyStat._meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            placeholders = ", ".join(
+                ["(%s, %s, %s, %s, %s, %s)"] * len(batch)
+            )
+            cursor.execute(
+                f"INSERT INTO {table}"
+                " (survey_id, dimension, bucket, value, shard, count)"
+                f" VALUES {placeholders}"
+                " ON CONFLICT (survey_id, dimension, bucket, value, shard)"
+                f" DO UPDATE SET count = {table}.count + EXCLUDED.count",
+                [field for row in batch for field in row],
+            )
+
+
+def record_responses(responses, questions=None):
+    """Учитывает только что сохранённые ответы в агрегатах.
+
+    Вызывается внутри транзакции, в которой ответы созданы. Возраст и пол
+    берутся из уже загруженного response.user или одним запросом по user_id;
+    вопросы — из questions ({survey_id: questions}) или тоже запросом.
+    """
+    if not responses:
+        return
+    if questions is None:
+        questions = survey_questions(r.survey_id for r in responses)
+    user_ids = {
+        r.user_id for r in responses
+        if r.user_id and not SurveyResponse.user.is_cached(r)
+    }
+    demographics = {
+        pk: (age, gender)
+        for pk, age, gender in User.objects.filter(pk__in=user_ids)
+        .values_list("pk", "age", "gender")
+    } if user_ids else {}
+
+    counters = defaultdict(Counter)
+    for response in responses:
+        if response.user_id and SurveyResponse.user.is_cached(response):
+            age, gender = response.user.age, response.user.gender
+        else:
+            age, gender = demographics.get(response.user_id, (None, None))
+        counters[response.survey_id].update(response_counters(
+            response.answers, response.submitted_at,
+            questions.get(response.survey_id) or [], age, gender,
+        ))
+    apply_counters(
+        counters, shard=random.randrange(max(settings.SURVEYS_STAT_SHARDS, 1))
+    )
+
+
+def rebuild_survey_stats(survey_id):
+    """Пересчитывает агрегаты опроса по всем ответам.
+
+    Выполняется в транзакции с блокировкой строки опроса, чтобы
+    параллельные вставки ответов не потерялись между удалением
+    и записью счётчиков.
+    """
+    counter = Counter()
+    rows = (
+        SurveyResponse.objects.filter(survey_id=survey_id)
+        .values_list(
+            "answers", "submitted_at", "user__age", "user__gender", "pk"
+        )
+    )
+    with transaction.atomic():
+        # FOR UPDATE конфликтует с блокировкой, которую берёт вставка
+        # строки с внешним ключом на опрос
+        questions = (
+            Survey.objects.select_for_update()
+            .filter(pk=survey_id).values_list("questions", flat=True).first()
+        ) or []
+        for chunk in keyset_chunks(rows, {"pk": 4}, REBUILD_CHUNK_SIZE):
+            for answers, submitted_at, age, gender, _ in chunk:
+                counter.update(response_counters(
+                    answers, submitted_at, questions, age, gender
+                ))
+        SurveyStat.objects.filter(survey_id=survey_id).delete()
+        apply_counters({survey_id: counter})
+    return counter[(TOTAL, "", "")]
+
+
+def stat_rows(survey_id):
+    """Строки (dimension, bucket, value, count) опроса с суммой по шардам."""
+    return (
+        SurveyStat.objects.filter(survey_id=survey_id)
+        .values("dimension", "bucket", "value")
+        .annotate(total=Sum("count"))
+        .values_list("dimension", "bucket", "value", "total")
+    )
+
+
+def build_stats(survey, rows):
+    """Собирает ответ API из строк SurveyStat (dimension, bucket, value, count)."""
+    questions = list(survey.questions)
+    total = 0
+    answers = defaultdict(list)
+    answered = {}
+    by_day, by_age, by_gender = [], [], []
+
+    for dimension, bucket, value, count in rows:
+        if dimension == TOTAL:
+            total = count
+        elif dimension == ANSWER:
+            answers[int(bucket)].append({"value": value, "count": count})
+        elif dimension == ANSWERED:
+            answered[int(bucket)] = count
+        elif dimension == DAY:
+            by_day.append({"date": bucket, "count": count})
+        elif dimension == AGE:
+            by_age.append({"bucket": bucket, "count": count})
+        elif dimension == GENDER:
+            by_gender.append({"gender": bucket, "count": count})
+
+    age_order = {title: i for i, (_, title) in enumerate(AGE_BUCKETS)}
+    age_order[AGE_BUCKET_LAST] = len(AGE_BUCKETS)
+
+    result_questions = []
+    for index, question in enumerate(questions):
+        distribution = sorted(
+            answers.get(index, []), key=lambda a: (-a["count"], a["value"])
+        )
+        result_questions.append({
+            "index": index,
+            "question": question_text(question),
+            "type": question_type(question),
+            "answered": answered.get(index, 0),
+            "answers": distribution,
+        })
+
+    return {
+        "survey_id": survey.pk,
+        "total_responses": total,
+        "questions": result_questions,
+        "by_day": sorted(by_day, key=lambda d: d["date"]),
+        "by_age": sorted(
+            by_age, key=lambda a: age_order.get(a["bucket"], len(age_order))
+        ),
+        "by_gender": sorted(by_gender, key=lambda g: g["gender"]),
+    }
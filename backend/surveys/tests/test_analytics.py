@@ -0,0 +1,75 @@
+from django.test import TestCase
+
+from surveys import analytics
+from surveys.models import Survey, SurveyResponse, User
+from surveys.stats import rebuild_survey_stats
+
+
+class CrosstabTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.survey = Survey.objects.create(
+            external_id="form-1",
+            title="Опрос",
+            questions=[
+                {"text": "Пол", "type": "single", "options": ["a", "b"]},
+                {"text": "Оценка", "type": "scale", "min": 1, "max": 3},
+                "Комментарий",
+            ],
+        )
+        cls.user = User.objects.create(
+            tg_nickname="u", name="N", surname="S", age=30, gender="F"
+        )
+        for answers, user in [
+            (["a", "1", "x"], cls.user),
+            (["a", "3", "y"], None),
+            (["b", "3", "z"], None),
+            (["b", "", "z"], None),
+        ]:
+            SurveyResponse.objects.create(
+                survey=cls.survey, user=user, answers=answers
+            )
+        rebuild_survey_stats(cls.survey.pk)
+
+    def setUp(self):
+        analytics.invalidate()
+
+    def test_counts_pairs_of_answers(self):
+        encoded = analytics.get_encoded_answers(self.survey)
+        result = analytics.build_crosstab(self.survey, encoded, 0, 1)
+
+        self.assertEqual(result["row"]["values"], ["a", "b"])
+        self.assertEqual(result["column"]["values"], ["1", "3"])
+        self.assertEqual(result["groups"][0]["counts"], [[1, 1], [0, 1]])
+        self.assertEqual(result["groups"][0]["total"], 3)
+
+    def test_groups_by_gender(self):
+        encoded = analytics.get_encoded_answers(self.survey)
+        result = analytics.build_crosstab(self.survey, encoded, 0, by="gender")
+
+        groups = {group["group"]: group["counts"] for group in result["groups"]}
+        self.assertEqual(groups, {"F": [1, 0], "unknown": [1, 2]})
+
+    def test_reads_only_new_responses(self):
+        analytics.get_encoded_answers(self.survey)
+        SurveyResponse.objects.create(survey=self.survey, answers=["a", "1"])
+        rebuild_survey_stats(self.survey.pk)
+
+        encoded = analytics.get_encoded_answers(self.survey)
+
+        self.assertEqual(encoded.size, 5)
+
+    def test_view_rejects_free_text_questions(self):
+        url = f"/api/surveys/{self.survey.pk}/crosstab/"
+
+        response = self.client.get(url, {"row": 0, "column": 2})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_view_returns_table(self):
+        url = f"/api/surveys/{self.survey.pk}/crosstab/"
+
+        response = self.client.get(url, {"row": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["groups"][0]["counts"], [1, 2])
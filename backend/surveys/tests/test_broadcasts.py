@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from surveys.broadcasts import claim_broadcast, create_broadcast, report_progress
+from surveys.models import Broadcast, Survey, User
+
+
+class BroadcastTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.survey = Survey.objects.create(
+            external_id="form-1", title="Опрос", questions=["Q1"]
+        )
+        cls.users = [
+            User.objects.create(
+                tg_nickname=f"u{i}", name="N", surname="S", age=20 + i,
+                gender="M", telegram_id=1000 + i,
+            )
+            for i in range(5)
+        ]
+        # Без telegram_id пользователю не написать
+        User.objects.create(tg_nickname="nobody", name="N", surname="S", age=30)
+
+    def progress(self, job, worker="w1", **fields):
+        recipients = job["recipients"]
+        return report_progress(
+            job["id"], worker, after=job["cursor"],
+            cursor=recipients[-1]["user_id"], sent=len(recipients),
+            limit=2, **fields
+        )
+
+    def test_sends_segment_in_chunks_until_done(self):
+        broadcast = create_broadcast(survey=self.survey, age_min=21)
+        self.assertEqual(broadcast.total, 4)
+
+        job = claim_broadcast("w1", 2)
+        seen = []
+        while job["recipients"]:
+            seen += [r["telegram_id"] for r in job["recipients"]]
+            job = self.progress(job)
+
+        self.assertEqual(seen, [1001, 1002, 1003, 1004])
+        self.assertEqual(job["status"], Broadcast.STATUS_DONE)
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.sent, 4)
+        self.assertEqual(broadcast.locked_by, "")
+
+    def test_lease_is_exclusive(self):
+        create_broadcast(survey=self.survey)
+
+        self.assertIsNotNone(claim_broadcast("w1", 2))
+        self.assertIsNone(claim_broadcast("w2", 2))
+
+    def test_chunk_is_counted_once(self):
+        create_broadcast(survey=self.survey)
+        job = claim_broadcast("w1", 2)
+
+        self.assertIsNotNone(self.progress(job))
+        # Повтор того же отчёта (after уже сдвинут)
+        self.assertIsNone(self.progress(job))
+        # Чужой воркер
+        self.assertIsNone(self.progress(job, worker="w2"))
+
+    def test_release_frees_lease(self):
+        create_broadcast(survey=self.survey)
+        job = claim_broadcast("w1", 2)
+
+        job = self.progress(job, release=True)
+
+        self.assertEqual(job["recipients"], [])
+        self.assertEqual(claim_broadcast("w2", 2)["cursor"], job["cursor"])
+
+
+@override_settings(BROADCAST_WORKER_TOKEN="secret")
+class BroadcastPermissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.survey = Survey.objects.create(
+            external_id="form-1", title="Опрос", questions=["Q1"]
+        )
+        cls.admin = get_user_model().objects.create_user(
+            "admin", password="pass", is_staff=True
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_admin_actions_require_staff(self):
+        self.assertEqual(self.client.get("/api/broadcasts/").status_code, 403)
+        response = self.client.post(
+            "/api/broadcasts/", {"survey": self.survey.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Broadcast.objects.exists())
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            "/api/broadcasts/", {"survey": self.survey.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_worker_actions_require_token(self):
+        payload = {"worker": "w1", "limit": 10}
+
+        response = self.client.post(
+            "/api/broadcasts/claim/", payload, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post(
+            "/api/broadcasts/claim/", payload, format="json",
+            HTTP_X_WORKER_TOKEN="wrong",
+        )
+        self.assertEqual(response.status_code, 403)
+        # Администратору без токена воркерские действия тоже закрыты
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            "/api/broadcasts/claim/", payload, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(
+            "/api/broadcasts/claim/", payload, format="json",
+            HTTP_X_WORKER_TOKEN="secret",
+        )
+        self.assertEqual(response.status_code, 204)
+
+    @override_settings(BROADCAST_WORKER_TOKEN="")
+    def test_worker_actions_closed_without_configured_token(self):
+        response = self.client.post(
+            "/api/broadcasts/claim/", {"worker": "w1"}, format="json",
+            HTTP_X_WORKER_TOKEN="",
+        )
+        self.assertEqual(response.status_code, 403)
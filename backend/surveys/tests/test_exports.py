@@ -0,0 +1,85 @@
+import csv
+import io
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from surveys import exports
+from surveys.models import Survey, SurveyResponse
+from surveys.pagination import keyset_chunks
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.survey = Survey.objects.create(
+            external_id="form-1", title="Опрос", questions=["Q1", "Q2"]
+        )
+        moment = timezone.now()
+        responses = SurveyResponse.objects.bulk_create([
+            SurveyResponse(survey=cls.survey, answers=[f"a{i}", f"b{i}"])
+            for i in range(7)
+        ])
+        # Одинаковое время у нескольких ответов: порядок держится на id
+        for i, response in enumerate(responses):
+            response.submitted_at = moment + timedelta(seconds=i // 3)
+        SurveyResponse.objects.bulk_update(responses, ["submitted_at"])
+        cls.ids = [response.pk for response in responses]
+
+    def test_keyset_chunks_cover_every_row_once(self):
+        queryset = exports.export_queryset(self.survey)
+
+        chunks = list(keyset_chunks(queryset, {"submitted_at": 1, "id": 0}, 3))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+        self.assertEqual([row[0] for chunk in chunks for row in chunk], self.ids)
+
+    @mock.patch.object(exports, "EXPORT_CHUNK_SIZE", 2)
+    def test_csv_streams_all_rows(self):
+        content = "".join(exports.iter_export(
+            self.survey, "csv", exports.export_queryset(self.survey)
+        ))
+
+        rows = list(csv.reader(io.StringIO(content.lstrip("﻿"))))
+        self.assertEqual(rows[0][-2:], ["Q1", "Q2"])
+        self.assertEqual([row[-2] for row in rows[1:]],
+                         [f"a{i}" for i in range(7)])
+
+    @mock.patch.object(exports, "EXPORT_CHUNK_SIZE", 2)
+    def test_async_export_matches_sync(self):
+        queryset = exports.export_queryset(self.survey)
+
+        async def collect():
+            return [
+                line async for line in
+                exports.aiter_export(self.survey, "ndjson", queryset)
+            ]
+
+        self.assertEqual(
+            async_to_sync(collect)(),
+            list(exports.iter_export(self.survey, "ndjson", queryset)),
+        )
+
+    def test_export_endpoint_requires_staff(self):
+        client = APIClient()
+        url = f"/api/surveys/{self.survey.pk}/export/?format=ndjson"
+
+        self.assertEqual(client.get(url).status_code, 403)
+        client.force_authenticate(
+            get_user_model().objects.create_user("user")
+        )
+        self.assertEqual(client.get(url).status_code, 403)
+
+        client.force_authenticate(
+            get_user_model().objects.create_user("admin", is_staff=True)
+        )
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).splitlines()
+        # Заголовок с вопросами и по строке на ответ
+        self.assertEqual(len(lines), 8)
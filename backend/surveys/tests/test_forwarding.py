@@ -0,0 +1,101 @@
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from django.utils import timezone
+
+from surveys import forwarding
+from surveys.forwarding import Forwarder, RateLimiter, claim_due
+from surveys.models import Survey, SurveyResponse
+from surveys.yandex_forms import YandexFormsError
+
+
+class ForwardingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.survey = Survey.objects.create(
+            external_id="form-1", title="Опрос", questions=["Q1"]
+        )
+        SurveyResponse.objects.bulk_create([
+            SurveyResponse(
+                survey=cls.survey, answers=[f"a{i}"],
+                forward_status=SurveyResponse.FORWARD_PENDING,
+                forward_next_at=timezone.now() - timedelta(seconds=1),
+            )
+            for i in range(3)
+        ])
+
+    def forward(self, forwarder, submit):
+        with mock.patch.object(forwarding, "submit_answers_to_yandex", submit):
+            return async_to_sync(forwarder.forward_due)()
+
+    def test_pauses_do_not_add_up(self):
+        limiter = RateLimiter(rate=5, burst=10)
+
+        limiter.pause(30)
+        limiter.pause(30)
+
+        self.assertAlmostEqual(limiter.tokens, -150, delta=1)
+
+    def test_lease_covers_batch_and_pause(self):
+        forwarder = Forwarder("id", "secret", batch_size=50, rate=5)
+
+        self.assertGreaterEqual(
+            forwarder.lease, 50 / 5 + forwarding.FORWARD_MAX_PAUSE
+        )
+        claim_due(10, forwarder.lease)
+        self.assertFalse(SurveyResponse.objects.filter(
+            forward_next_at__lt=timezone.now()
+            + timedelta(seconds=forwarder.lease - 5)
+        ).exists())
+
+    def test_sends_due_responses(self):
+        submit = mock.AsyncMock()
+
+        processed = self.forward(Forwarder("id", "secret", rate=100), submit)
+
+        self.assertEqual(processed, 3)
+        self.assertEqual(submit.await_count, 3)
+        self.assertEqual(
+            SurveyResponse.objects.filter(
+                forward_status=SurveyResponse.FORWARD_SENT
+            ).count(),
+            3,
+        )
+
+    def test_retry_after_is_capped_and_rescheduled(self):
+        submit = mock.AsyncMock(side_effect=YandexFormsError(
+            "HTTP 429", status_code=429, retry_after=3600
+        ))
+        forwarder = Forwarder("id", "secret", rate=100)
+
+        with mock.patch.object(forwarder.limiter, "pause") as pause, \
+                self.assertLogs("surveys.forwarding", "WARNING"):
+            self.forward(forwarder, submit)
+
+        pause.assert_called_with(forwarding.FORWARD_MAX_PAUSE)
+        response = SurveyResponse.objects.first()
+        self.assertEqual(response.forward_status, SurveyResponse.FORWARD_PENDING)
+        self.assertGreater(
+            response.forward_next_at,
+            timezone.now() + timedelta(seconds=3500),
+        )
+
+    def test_skips_responses_after_lease_ends(self):
+        submit = mock.AsyncMock()
+        forwarder = Forwarder("id", "secret", rate=100)
+        # Аренда кончилась, пока ответы ждали своей очереди
+        forwarder.lease = forwarding.FORWARD_LEASE_MARGIN - 1
+
+        with self.assertLogs("surveys.forwarding", "WARNING"):
+            processed = self.forward(forwarder, submit)
+
+        self.assertEqual(processed, 3)
+        submit.assert_not_awaited()
+        self.assertFalse(SurveyResponse.objects.exclude(
+            forward_status=SurveyResponse.FORWARD_PENDING
+        ).exists())
+        self.assertFalse(
+            SurveyResponse.objects.filter(forward_attempts__gt=0).exists()
+        )
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+
+from surveys import yandex_forms
+from surveys.fake_yandex import FakeYandexForms
+from surveys.importing import import_forms, upsert_surveys
+from surveys.models import Survey
+
+
+def fields(title="Опрос", questions=("Q1",)):
+    return {"title": title, "description": "", "questions": list(questions)}
+
+
+class UpsertSurveysTests(TestCase):
+    def test_creates_updates_and_skips_unchanged(self):
+        first = upsert_surveys({"a": fields(), "b": fields()})
+        self.assertEqual(sorted(first["created"]), ["a", "b"])
+
+        second = upsert_surveys({
+            "a": fields(), "b": fields("Новое название"), "c": fields(),
+        })
+
+        self.assertEqual(second["created"], ["c"])
+        self.assertEqual(second["updated"], ["b"])
+        self.assertEqual(second["unchanged"], ["a"])
+        self.assertEqual(second["errors"], {})
+        # Повторный импорт обновляет опрос, а не создаёт новый
+        self.assertEqual(Survey.objects.count(), 3)
+        self.assertEqual(second["surveys"]["a"], first["surveys"]["a"])
+        self.assertEqual(
+            Survey.objects.get(external_id="b").title, "Новое название"
+        )
+
+    def test_invalid_questions_are_not_saved(self):
+        result = upsert_surveys({
+            "ok": fields(),
+            "bad": fields(questions=[{"text": "?", "type": "single"}]),
+        })
+
+        self.assertEqual(result["created"], ["ok"])
+        self.assertIn("bad", result["errors"])
+        self.assertNotIn("bad", result["surveys"])
+        self.assertFalse(Survey.objects.filter(external_id="bad").exists())
+
+
+class ImportFormsTests(TestCase):
+    def setUp(self):
+        server = FakeYandexForms(forms={
+            "f1": {"name": "Опрос", "questions": ["Q1", "Q2"]},
+            "empty": {"name": "Пустой"},
+        }).start()
+        self.addCleanup(server.stop)
+        for name, value in (
+            ("YANDEX_OAUTH_URL", server.oauth_url),
+            ("YANDEX_FORMS_API_URL", server.api_url),
+        ):
+            patcher = mock.patch.object(yandex_forms, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        yandex_forms.invalidate_form()
+
+    def test_imports_forms_from_api(self):
+        async def main():
+            try:
+                return await import_forms(
+                    ["f1", "missing", "empty", "f1"], "id", "secret"
+                )
+            finally:
+                await yandex_forms.close_clients()
+
+        result = async_to_sync(main)()
+
+        self.assertEqual(result["created"], ["f1"])
+        self.assertEqual(result["not_found"], ["missing"])
+        self.assertEqual(list(result["errors"]), ["empty"])
+        survey = Survey.objects.get(external_id="f1")
+        self.assertEqual(survey.questions, ["Q1", "Q2"])
+        self.assertEqual(result["surveys"], {"f1": survey.pk})
@@ -0,0 +1,132 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Прогоняет миграцию migrate_to на данных, созданных в setUpBeforeMigration
+    по схеме migrate_from."""
+
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("surveys", self.migrate_from)])
+        old_apps = executor.loader.project_state(
+            [("surveys", self.migrate_from)]
+        ).apps
+        self.setUpBeforeMigration(old_apps)
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([("surveys", self.migrate_to)])
+        self.apps = executor.loader.project_state(
+            [("surveys", self.migrate_to)]
+        ).apps
+
+    def tearDown(self):
+        # Возвращаем схему к последней миграции для следующих тестов
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def setUpBeforeMigration(self, apps):
+        pass
+
+
+class ExternalIdUniqueMigrationTests(MigrationTestCase):
+    migrate_from = "0006_response_forwarding"
+    migrate_to = "0007_survey_external_id_unique"
+
+    def setUpBeforeMigration(self, apps):
+        Survey = apps.get_model("surveys", "Survey")
+        self.ids = [
+            Survey.objects.create(
+                external_id=external_id, title="Опрос", questions=["Q1"]
+            ).pk
+            for external_id in ("form-1", "form-1", "form-1", "form-2")
+        ]
+
+    def test_renames_duplicates_keeping_oldest(self):
+        Survey = self.apps.get_model("surveys", "Survey")
+        first, second, third, other = self.ids
+
+        self.assertEqual(
+            dict(Survey.objects.values_list("pk", "external_id")),
+            {
+                first: "form-1",
+                second: f"form-1~{second}",
+                third: f"form-1~{third}",
+                other: "form-2",
+            },
+        )
+
+
+class AnswerUniqueMigrationTests(MigrationTestCase):
+    migrate_from = "0010_broadcast"
+    migrate_to = "0011_answer_unique_question"
+
+    def setUpBeforeMigration(self, apps):
+        Survey = apps.get_model("surveys", "Survey")
+        SurveyResponse = apps.get_model("surveys", "SurveyResponse")
+        Answer = apps.get_model("surveys", "Answer")
+        survey = Survey.objects.create(
+            external_id="form-1", title="Опрос", questions=["Q1", "Q2"]
+        )
+        response = SurveyResponse.objects.create(
+            survey=survey, answers=["a", "b"]
+        )
+        # Повторная доставка записала строки ответа дважды
+        self.kept = [
+            Answer.objects.create(
+                response=response, survey=survey, question_index=index,
+                value=value, value_hash=value,
+            ).pk
+            for index, value in ((0, "a"), (1, "b"), (0, "a"))
+        ][:2]
+
+    def test_drops_duplicate_answers(self):
+        Answer = self.apps.get_model("surveys", "Answer")
+
+        self.assertEqual(
+            sorted(Answer.objects.values_list("pk", flat=True)), self.kept
+        )
+
+
+class StatShardsMigrationTests(MigrationTestCase):
+    migrate_from = "0011_answer_unique_question"
+    migrate_to = "0012_stat_shards"
+
+    def setUpBeforeMigration(self, apps):
+        Survey = apps.get_model("surveys", "Survey")
+        SurveyStat = apps.get_model("surveys", "SurveyStat")
+        survey = Survey.objects.create(
+            external_id="form-1", title="Опрос",
+            questions=[
+                {"text": "Вариант", "type": "single", "options": ["a", "b"]},
+                "Комментарий",
+            ],
+        )
+        self.survey_id = survey.pk
+        for bucket, value, count in [
+            ("0", "a", 3), ("0", "b", 1), ("1", "x", 1), ("1", "y", 2),
+        ]:
+            SurveyStat.objects.create(
+                survey=survey, dimension="answer", bucket=bucket,
+                value=value, count=count,
+            )
+
+    def test_moves_answered_counts_and_drops_free_text(self):
+        SurveyStat = self.apps.get_model("surveys", "SurveyStat")
+        rows = set(
+            SurveyStat.objects.filter(survey_id=self.survey_id)
+            .values_list("dimension", "bucket", "value", "count")
+        )
+
+        self.assertEqual(rows, {
+            ("answer", "0", "a", 3),
+            ("answer", "0", "b", 1),
+            ("answered", "0", "", 4),
+            ("answered", "1", "", 3),
+        })
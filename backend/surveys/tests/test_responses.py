@@ -0,0 +1,191 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from surveys.models import Answer, ResponseDraft, Survey, SurveyResponse, User
+from surveys.stats import build_stats, stat_rows
+from surveys.views import create_response, insert_responses
+
+
+QUESTIONS = [
+    {"text": "Вариант", "type": "single", "options": ["a", "b"]},
+    "Комментарий",
+]
+
+
+class ResponseTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.survey = Survey.objects.create(
+            external_id="form-1", title="Опрос", questions=QUESTIONS
+        )
+        cls.user = User.objects.create(
+            tg_nickname="old", name="N", surname="S", age=30, gender="M"
+        )
+        cls.other = User.objects.create(
+            tg_nickname="other", name="N", surname="S", age=40, gender="F",
+            telegram_id=222,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def stats(self):
+        return build_stats(self.survey, list(stat_rows(self.survey.pk)))
+
+
+class CreateResponseTests(ResponseTestCase):
+    def submit(self, **fields):
+        return create_response(
+            survey_id=self.survey.pk, answers=["a", "текст"], **fields
+        )
+
+    def test_remembers_telegram_id_of_user_found_by_username(self):
+        response = self.submit(telegram_user_id="111", telegram_username="old")
+
+        self.assertEqual(response.user, self.user)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.telegram_id, 111)
+        # Дальше пользователь находится по id, даже со сменой username
+        response = self.submit(telegram_user_id="111", telegram_username="new")
+        self.assertEqual(response.user, self.user)
+
+    def test_finds_user_by_telegram_id_before_username(self):
+        response = self.submit(telegram_user_id="222", telegram_username="old")
+
+        self.assertEqual(response.user, self.other)
+
+    def test_rejects_unknown_user(self):
+        with self.assertRaises(User.DoesNotExist):
+            self.submit(telegram_user_id="999", telegram_username="ghost")
+
+        self.assertFalse(SurveyResponse.objects.exists())
+
+    def test_records_stats_answers_and_drops_draft(self):
+        ResponseDraft.objects.create(
+            survey=self.survey, telegram_user_id="222", answers=["a"]
+        )
+
+        response = self.submit(telegram_user_id="222")
+
+        self.assertEqual(self.stats()["total_responses"], 1)
+        self.assertEqual(
+            list(Answer.objects.filter(response=response)
+                 .values_list("question_index", "value")),
+            [(0, "a"), (1, "текст")],
+        )
+        self.assertFalse(ResponseDraft.objects.exists())
+
+    def test_rejects_answer_outside_options(self):
+        with self.assertRaises(ValueError):
+            create_response(
+                survey_id=self.survey.pk, answers=["c", ""],
+                telegram_user_id="222",
+            )
+
+
+class SubmitEndpointTests(ResponseTestCase):
+    def test_unknown_user_gets_403(self):
+        response = self.client.post(
+            f"/api/surveys/{self.survey.pk}/submit/",
+            {"answers": ["a", "x"], "telegram_user_id": "999"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["code"], "not_registered")
+
+    def test_repeated_submission_key_returns_stored_response(self):
+        payload = {
+            "answers": ["b", "x"], "telegram_user_id": "222",
+            "submission_key": "k1",
+        }
+        url = f"/api/surveys/{self.survey.pk}/submit/"
+
+        first = self.client.post(url, payload, format="json")
+        second = self.client.post(url, payload, format="json")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json()["id"], second.json()["id"])
+        self.assertEqual(self.stats()["total_responses"], 1)
+
+
+    def test_blank_answers_are_accepted(self):
+        response = self.client.post(
+            f"/api/surveys/{self.survey.pk}/submit/",
+            {"answers": ["", ""], "telegram_user_id": "222"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["answers"], ["", ""])
+
+
+class SubmitBatchTests(ResponseTestCase):
+    url = "/api/surveys/submit-batch/"
+
+    def item(self, **fields):
+        return {
+            "survey_id": self.survey.pk, "answers": ["a", "x"],
+            "telegram_user_id": "222", **fields,
+        }
+
+    def test_saves_batch_once_per_key(self):
+        items = [
+            self.item(submission_key="k1"),
+            self.item(),
+            self.item(submission_key="k1"),
+            self.item(telegram_user_id="111", telegram_username="old",
+                      submission_key="k2"),
+        ]
+
+        response = self.client.post(self.url, items, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body["created"], 3)
+        ids = body["ids"]
+        self.assertEqual(ids[0], ids[2])
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(self.stats()["total_responses"], 3)
+        self.assertEqual(
+            SurveyResponse.objects.get(pk=ids[3]).user, self.user
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.telegram_id, 111)
+
+        # Повторная доставка той же пачки ничего не создаёт
+        again = self.client.post(self.url, items[:1], format="json")
+        self.assertEqual(again.json(), {"created": 0, "ids": [ids[0]]})
+        self.assertEqual(self.stats()["total_responses"], 3)
+
+    def test_unknown_user_rejects_batch(self):
+        items = [self.item(), self.item(telegram_user_id="999")]
+
+        response = self.client.post(self.url, items, format="json")
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["index"], 1)
+        self.assertFalse(SurveyResponse.objects.exists())
+
+    def test_concurrent_delivery_of_same_key_is_skipped(self):
+        # Параллельная доставка сохранила k1 после того, как пачка
+        # прочитала известные ключи
+        other = SurveyResponse.objects.create(
+            survey=self.survey, answers=["a", "x"], submission_key="k1"
+        )
+        responses = [
+            SurveyResponse(survey=self.survey, answers=["b", "y"],
+                           submission_key=key)
+            for key in ("k1", "k2", None)
+        ]
+        known = {}
+
+        created = insert_responses(responses, known)
+
+        self.assertEqual(
+            [r.submission_key for r in created], ["k2", None]
+        )
+        self.assertTrue(all(r.pk for r in created))
+        self.assertEqual(known, {"k1": other.pk})
+        self.assertEqual(SurveyResponse.objects.count(), 3)
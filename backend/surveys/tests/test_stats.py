@@ -0,0 +1,89 @@
+from django.test import TestCase, override_settings
+
+from surveys.models import Survey, SurveyResponse, SurveyStat, User
+from surveys.stats import (
+    ANSWER,
+    ANSWERED,
+    build_stats,
+    rebuild_survey_stats,
+    record_responses,
+    stat_rows,
+)
+
+
+QUESTIONS = [
+    {"text": "Вариант", "type": "single", "options": ["a", "b"]},
+    "Комментарий",
+]
+
+
+class StatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.survey = Survey.objects.create(
+            external_id="form-1", title="Опрос", questions=QUESTIONS
+        )
+        cls.user = User.objects.create(
+            tg_nickname="u", name="N", surname="S", age=30, gender="M"
+        )
+
+    def respond(self, answers, user=None):
+        response = SurveyResponse.objects.create(
+            survey=self.survey, user=user, answers=answers
+        )
+        record_responses([response])
+        return response
+
+    def stats(self):
+        return build_stats(self.survey, list(stat_rows(self.survey.pk)))
+
+    def test_counts_distribution_only_for_choice_questions(self):
+        self.respond(["a", "первый"], self.user)
+        self.respond(["a", "второй"])
+        self.respond(["b", ""])
+
+        stats = self.stats()
+
+        self.assertEqual(stats["total_responses"], 3)
+        choice, text = stats["questions"]
+        self.assertEqual(
+            choice["answers"],
+            [{"value": "a", "count": 2}, {"value": "b", "count": 1}],
+        )
+        self.assertEqual(choice["answered"], 3)
+        self.assertEqual(text["answers"], [])
+        self.assertEqual(text["answered"], 2)
+        self.assertFalse(
+            SurveyStat.objects.filter(dimension=ANSWER, bucket="1").exists()
+        )
+        self.assertEqual(
+            stats["by_gender"],
+            [{"gender": "M", "count": 1}, {"gender": "unknown", "count": 2}],
+        )
+
+    @override_settings(SURVEYS_STAT_SHARDS=4)
+    def test_sums_counter_shards(self):
+        for _ in range(20):
+            self.respond(["a", "текст"])
+
+        stats = self.stats()
+
+        self.assertEqual(stats["total_responses"], 20)
+        self.assertEqual(stats["questions"][0]["answers"][0]["count"], 20)
+        self.assertEqual(stats["questions"][1]["answered"], 20)
+        self.assertLessEqual(
+            SurveyStat.objects.filter(dimension="total").count(), 4
+        )
+
+    def test_rebuild_matches_incremental_counters(self):
+        self.respond(["a", "x"], self.user)
+        self.respond(["b", "y"])
+        incremental = self.stats()
+
+        total = rebuild_survey_stats(self.survey.pk)
+
+        self.assertEqual(total, 2)
+        self.assertEqual(self.stats(), incremental)
+        self.assertEqual(
+            SurveyStat.objects.filter(dimension=ANSWERED).count(), 2
+        )
@@ -0,0 +1,142 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from surveys import yandex_forms
+from surveys.fake_yandex import FakeYandexForms
+from surveys.yandex_forms import (
+    YandexFormsError,
+    close_clients,
+    get_http_client,
+    get_survey_from_yandex,
+    submit_answers_to_yandex,
+)
+
+
+FORMS = {
+    "f1": {
+        "name": "Опрос",
+        "pages": [{"items": [
+            {"label": "Имя", "type": "short_text"},
+            {"label": "Цвет", "options": ["красный", "синий"]},
+        ]}],
+    },
+}
+
+
+class YandexFormsClientTests(SimpleTestCase):
+    """Клиент API против фейкового сервера fake_yandex.py."""
+
+    def setUp(self):
+        self.server = FakeYandexForms(forms=FORMS).start()
+        self.addCleanup(self.server.stop)
+        for name, value in (
+            ("YANDEX_OAUTH_URL", self.server.oauth_url),
+            ("YANDEX_FORMS_API_URL", self.server.api_url),
+        ):
+            patcher = mock.patch.object(yandex_forms, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        yandex_forms.invalidate_token("id")
+        yandex_forms.invalidate_form()
+
+    def run_async(self, coroutine_function, *args, **kwargs):
+        async def main():
+            try:
+                return await coroutine_function(*args, **kwargs)
+            finally:
+                await close_clients()
+        return async_to_sync(main)()
+
+    def fetch(self, external_id="f1", **kwargs):
+        return self.run_async(
+            get_survey_from_yandex, external_id, "id", "secret", **kwargs
+        )
+
+    def test_parses_form_and_reuses_token_and_cache(self):
+        form = self.fetch()
+        self.assertEqual(form["title"], "Опрос")
+        self.assertEqual(form["questions"], [
+            "Имя",
+            {"text": "Цвет", "type": "single",
+             "options": ["красный", "синий"]},
+        ])
+
+        # Свежий кеш — без запроса, перепроверка — условный запрос (304)
+        self.assertEqual(self.fetch(), form)
+        self.assertEqual(self.fetch(use_cache=False), form)
+
+        self.assertEqual(self.server.requests["token"], 1)
+        self.assertEqual(self.server.requests["form"], 2)
+        self.assertEqual(self.server.requests["not_modified"], 1)
+
+    def test_missing_form_is_none(self):
+        self.assertIsNone(self.fetch("nope"))
+
+    def test_revoked_token_is_refreshed_once(self):
+        self.fetch()
+        self.server.revoke_tokens()
+
+        self.fetch(use_cache=False)
+
+        self.assertEqual(self.server.requests["token"], 2)
+
+    def test_submit_and_rate_limit(self):
+        self.run_async(
+            submit_answers_to_yandex, "f1", self.fetch()["questions"],
+            ["Аня", "синий"], "id", "secret",
+        )
+        self.assertEqual(self.server.submissions, [("f1", {"answers": [
+            {"question": "Имя", "value": "Аня"},
+            {"question": "Цвет", "value": "синий"},
+        ]})])
+
+        self.server.fail_submissions = 1
+        with self.assertRaises(YandexFormsError) as raised:
+            self.run_async(
+                submit_answers_to_yandex, "f1", ["Имя"], ["Аня"],
+                "id", "secret",
+            )
+        self.assertEqual(raised.exception.status_code, 429)
+        self.assertEqual(raised.exception.retry_after, 1.0)
+
+    def test_close_clients_closes_client_of_loop(self):
+        async def main():
+            client = get_http_client()
+            self.assertIs(get_http_client(), client)
+            await close_clients()
+            return client
+
+        client = asyncio.run(main())
+
+        self.assertTrue(client.is_closed)
+        self.assertEqual(len(yandex_forms._clients), 0)
+
+    def test_asgi_lifespan_shutdown_closes_client(self):
+        from backend.asgi import application
+
+        async def main():
+            client = get_http_client()
+            messages = iter([
+                {"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}
+            ])
+            sent = []
+
+            async def receive():
+                return next(messages)
+
+            async def send(message):
+                sent.append(message["type"])
+
+            await application({"type": "lifespan"}, receive, send)
+            return client, sent
+
+        client, sent = asyncio.run(main())
+
+        self.assertEqual(
+            sent,
+            ["lifespan.startup.complete", "lifespan.shutdown.complete"],
+        )
+        self.assertTrue(client.is_closed)
@@ -1,16 +1,19 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import SurveyViewSet, UserViewSet
+from .metrics import metrics_view
+from .views import BroadcastViewSet, SurveyViewSet, UserViewSet
 
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet, basename="users")
 router.register(r"surveys", SurveyViewSet, basename="surveys")
+router.register(r"broadcasts", BroadcastViewSet, basename="broadcasts")
 
 
 urlpatterns = [
     path("api/", include(router.urls)),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 
@@ -1,40 +1,84 @@
-import asyncio
+import functools
+import hashlib
+import json
 import os
+from datetime import datetime, time
 
+from adrf import viewsets
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework import status, viewsets
+from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
-from .models import Survey, SurveyResponse, User
+from . import analytics
+from .answers import store_answers
+from .broadcasts import claim_broadcast, create_broadcast, report_progress
+from .drafts import delete_drafts, draft_funnel, save_draft
+from .exports import (
+    EXPORT_FORMATS,
+    aiter_export,
+    build_xlsx,
+    export_queryset,
+    iter_export,
+)
+from .forwarding import forward_fields
+from .importing import import_forms, survey_fields, upsert_surveys
+from .models import (
+    Broadcast,
+    ResponseDraft,
+    Survey,
+    SurveyResponse,
+    User,
+)
+from .permissions import HasWorkerToken
 from .serializers import (
+    BroadcastClaimSerializer,
+    BroadcastCreateSerializer,
+    BroadcastProgressSerializer,
+    BroadcastSerializer,
+    ResponseDraftSerializer,
+    SurveyBatchResponseSerializer,
+    SurveyBulkImportSerializer,
+    SurveyDraftSerializer,
     SurveyImportResultSerializer,
     SurveyImportSerializer,
     SurveyResponseResultSerializer,
     SurveyResponseSerializer,
+    SurveySerializer,
     UserRegistrationSerializer,
     UserSerializer,
 )
+from .questions import clean_answers, is_categorical
+from .stats import build_stats, record_responses, stat_rows
+from .yandex_forms import close_clients, get_credentials
 
 
 @method_decorator(csrf_exempt, name='dispatch')
 class UserViewSet(viewsets.ViewSet):
     """
     ViewSet для регистрации и управления пользователями.
+    Асинхронные действия не занимают поток воркера под ASGI.
     """
 
     @action(detail=False, methods=["post"], url_path="register")
-    def register_user(self, request):
+    async def register_user(self, request):
         """
         POST /api/users/register
         Регистрация нового пользователя.
         """
         serializer = UserRegistrationSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        # Валидатор уникальности tg_nickname ходит в БД
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
 
         try:
-            user = serializer.save()
+            user = await sync_to_async(serializer.save)()
             return Response(
                 UserSerializer(user).data,
                 status=status.HTTP_201_CREATED,
@@ -50,13 +94,13 @@ class UserViewSet(viewsets.ViewSet):
         methods=["get"], 
         url_path="by-nickname/(?P<nickname>[^/.]+)"
     )
-    def get_by_nickname(self, request, nickname=None):
+    async def get_by_nickname(self, request, nickname=None):
         """
         GET /api/users/by-nickname/<nickname>
         Получить пользователя по Telegram nickname.
         """
         try:
-            user = User.objects.get(tg_nickname=nickname)
+            user = await User.objects.aget(tg_nickname=nickname)
             return Response(UserSerializer(user).data)
         except User.DoesNotExist:
             return Response(
@@ -65,14 +109,215 @@ class UserViewSet(viewsets.ViewSet):
             )
 
 
+# Максимальное число ответов в одном запросе submit-batch
+SUBMIT_BATCH_MAX_SIZE = 1000
+
+
+def make_etag(data):
+    """Строгий ETag по содержимому сериализованного объекта."""
+    raw = json.dumps(
+        data, sort_keys=True, ensure_ascii=False, default=str
+    ).encode("utf-8")
+    return f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+
+def parse_moment(value):
+    """Дата-время или дата из query-параметра; None, если не задано."""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _telegram_id(item):
+    value = item.get("telegram_user_id") or ""
+    return int(value) if value.isdigit() else None
+
+
+def resolve_users(items):
+    """Пользователи ответов items в том же порядке; None — не найден.
+
+    Пользователь ищется по user_id, затем по числовому telegram_user_id
+    (он, в отличие от username, не меняется), затем по telegram_username.
+    Найденному без telegram_id он запоминается — адрес для рассылок.
+    На пачку уходит не больше трёх SELECT; загружаются только поля,
+    нужные статистике (возраст и пол). Вызывается в транзакции записи.
+    """
+    users = User.objects.only("pk", "tg_nickname", "age", "gender",
+                              "telegram_id")
+    user_ids = {item["user_id"] for item in items if item.get("user_id")}
+    telegram_ids = {_telegram_id(item) for item in items} - {None}
+    by_pk = users.in_bulk(user_ids) if user_ids else {}
+    by_telegram_id = {
+        user.telegram_id: user
+        for user in users.filter(telegram_id__in=telegram_ids)
+    } if telegram_ids else {}
+
+    def known(item):
+        return (
+            by_pk.get(item.get("user_id"))
+            or by_telegram_id.get(_telegram_id(item))
+        )
+
+    usernames = {
+        item["telegram_username"] for item in items
+        if item.get("telegram_username") and known(item) is None
+    }
+    by_username = {
+        user.tg_nickname: user
+        for user in users.filter(tg_nickname__in=usernames)
+    } if usernames else {}
+
+    result = []
+    for item in items:
+        user = known(item) or by_username.get(item.get("telegram_username"))
+        telegram_id = _telegram_id(item)
+        if user is not None and user.telegram_id is None and telegram_id:
+            # Пользователь зарегистрирован до появления telegram_id
+            User.objects.filter(
+                pk=user.pk, telegram_id__isnull=True
+            ).update(telegram_id=telegram_id)
+            user.telegram_id = telegram_id
+        result.append(user)
+    return result
+
+
+def create_response(user_id=None, **fields):
+    """Сохраняет ответ вместе со статистикой и нормализованными ответами.
+
+    Ответы проверяются по вопросам опроса (questions.clean_answers):
+    ValueError, если ответ не входит в варианты, Survey.DoesNotExist,
+    если опроса нет, User.DoesNotExist, если пользователь не
+    зарегистрирован (см. resolve_users).
+
+    Вопросы читаются, а пользователь ищется в одной транзакции с записью
+    ответа и удалением черновика.
+    """
+    with transaction.atomic():
+        questions = (
+            Survey.objects.filter(pk=fields["survey_id"])
+            .values_list("questions", flat=True).first()
+        )
+        if questions is None:
+            raise Survey.DoesNotExist
+        fields["answers"] = clean_answers(questions, fields["answers"])
+
+        [user] = resolve_users([{"user_id": user_id, **fields}])
+        if user is None:
+            raise User.DoesNotExist
+        response = SurveyResponse.objects.create(
+            user=user, **fields, **forward_fields()
+        )
+        record_responses([response], {response.survey_id: questions})
+        store_answers([response])
+        delete_drafts([(response.survey_id, response.telegram_user_id)])
+    return response
+
+
+def insert_responses(responses, known):
+    """bulk_create ответов, ключей которых нет в known ({ключ: pk}).
+
+    id приходят из RETURNING в порядке вставки. Если параллельная доставка
+    успела сохранить ответ с тем же ключом, вставка откатывается до
+    точки сохранения, known дополняется её ключами и вставка повторяется
+    без них. Возвращает сохранённые этим вызовом ответы.
+    """
+    while True:
+        fresh = [r for r in responses if r.submission_key not in known]
+        try:
+            with transaction.atomic():
+                return SurveyResponse.objects.bulk_create(fresh)
+        except IntegrityError:
+            before = len(known)
+            known.update(
+                SurveyResponse.objects.filter(
+                    submission_key__in=[
+                        r.submission_key for r in fresh if r.submission_key
+                    ]
+                ).values_list("submission_key", "pk")
+            )
+            if len(known) == before:
+                raise
+
+
+def not_registered(**extra):
+    """Ответ на отправку от незарегистрированного пользователя: бот по
+    code отправляет его на регистрацию."""
+    return Response(
+        {"detail": "Пользователь не зарегистрирован",
+         "code": "not_registered", **extra},
+        status=status.HTTP_403_FORBIDDEN,
+    )
+
+
+def closes_yandex_client(view):
+    """Под WSGI async view выполняется в собственном цикле async_to_sync,
+    который завершится вместе с запросом, поэтому HTTP-клиент Яндекс Форм
+    этого цикла закрывается в конце запроса. Под ASGI цикл общий, и клиент
+    закрывается при остановке сервера (backend/asgi.py)."""
+    @functools.wraps(view)
+    async def wrapper(self, request, *args, **kwargs):
+        try:
+            return await view(self, request, *args, **kwargs)
+        finally:
+            if "wsgi.input" in request.META:
+                await close_clients()
+    return wrapper
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match", "")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class SurveyViewSet(viewsets.ViewSet):
     """
     ViewSet для импорта опросов и приёма ответов.
+    Обращения к Яндекс Формам и запись ответов — асинхронные.
     """
 
+    def perform_content_negotiation(self, request, force=False):
+        # У export параметр ?format= — формат выгрузки, а не рендерер DRF
+        if self.action == "export":
+            force = True
+        return super().perform_content_negotiation(request, force=force)
+
+    async def retrieve(self, request, pk=None):
+        """
+        GET /api/surveys/<id>
+        Возвращает опрос с вопросами. Поддерживает условные запросы:
+        при совпадении If-None-Match отвечает 304 без тела.
+        """
+        try:
+            survey = await Survey.objects.aget(pk=pk)
+        except Survey.DoesNotExist:
+            return Response(
+                {"detail": "Survey not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        data = SurveySerializer(survey).data
+        etag = make_etag(data)
+        if etag_matches(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        return Response(data, headers={"ETag": etag})
+
     @action(detail=False, methods=["post"], url_path="import")
-    def import_survey(self, request):
+    @closes_yandex_client
+    async def import_survey(self, request):
         """
         POST /api/surveys/import
         Принимает external_id (id формы в Яндекс), опционально метаданные 
@@ -99,8 +344,8 @@ class SurveyViewSet(viewsets.ViewSet):
             )
 
         try:
-            survey_data = asyncio.run(
-                get_survey_from_yandex(external_id, client_id, client_secret)
+            survey_data = await get_survey_from_yandex(
+                external_id, client_id, client_secret, use_cache=False
             )
         except Exception as e:
             return Response(
@@ -117,30 +362,59 @@ class SurveyViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        title = survey_data.get("title") or f"Опрос {external_id}"
-        description = survey_data.get("description", "")
-        questions = survey_data.get("questions") or []
-
-        if not questions:
+        fields = survey_fields(external_id, survey_data)
+        if not fields["questions"]:
             return Response(
                 {"detail": "Анкета из Яндекс Форм не содержит вопросов."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        survey = Survey.objects.create(
-            external_id=external_id,
-            title=title,
-            description=description,
-            questions=questions,
-        )
+        # Повторный импорт той же формы обновляет опрос, а не создаёт новый
+        result = await sync_to_async(upsert_surveys)({external_id: fields})
+        if external_id in result["errors"]:
+            return Response(
+                {"detail": result["errors"][external_id]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        survey = await Survey.objects.aget(pk=result["surveys"][external_id])
 
         return Response(
             SurveyImportResultSerializer(survey).data,
-            status=status.HTTP_201_CREATED,
+            status=(
+                status.HTTP_201_CREATED if result["created"]
+                else status.HTTP_200_OK
+            ),
         )
 
+    @action(detail=False, methods=["post"], url_path="import-bulk")
+    @closes_yandex_client
+    async def import_bulk(self, request):
+        """
+        POST /api/surveys/import-bulk
+        Принимает список external_ids, загружает формы параллельно
+        и сохраняет изменившиеся опросы одним upsert. Возвращает списки
+        created / updated / unchanged / not_found, ошибки по формам
+        и соответствие external_id -> id опроса.
+        """
+        serializer = SurveyBulkImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        client_id, client_secret = get_credentials()
+        if not (client_id and client_secret):
+            return Response(
+                {"detail": "Интеграция с Яндекс Формами не настроена."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        result = await import_forms(
+            serializer.validated_data["external_ids"],
+            client_id, client_secret,
+        )
+        return Response(result)
+
     @action(detail=False, methods=["get"], url_path="test-yandex")
-    def test_yandex_connection(self, request):
+    @closes_yandex_client
+    async def test_yandex_connection(self, request):
         """
         GET /api/surveys/test-yandex
         Тестирует подключение к Яндекс Формам
@@ -167,8 +441,8 @@ class SurveyViewSet(viewsets.ViewSet):
         # Тестируем с тестовым ID
         test_id = "test_form_id"
         try:
-            result = asyncio.run(
-                get_survey_from_yandex(test_id, client_id, client_secret)
+            result = await get_survey_from_yandex(
+                test_id, client_id, client_secret
             )
             return Response({
                 "client_id": client_id,
@@ -187,46 +461,580 @@ class SurveyViewSet(viewsets.ViewSet):
             )
 
     @action(detail=True, methods=["post"], url_path="submit")
-    def submit_answers(self, request, pk=None):
+    async def submit_answers(self, request, pk=None):
         """
         POST /api/surveys/<id>/submit
         Принимает ответы пользователя и сохраняет их. 
-        Возвращает сохранённый объект.
-        Тут надо дописать отправку ответов в Яндекс Формы.
+        Возвращает сохранённый объект. Повторная отправка с тем же
+        submission_key возвращает ранее сохранённый ответ (200).
+
+        Пользователь определяется по user_id, telegram_user_id или
+        telegram_username — клиенту не нужно искать его заранее;
+        незарегистрированному — 403 с code=not_registered.
+        Ответы на вопросы с вариантами и шкалы должны быть из вариантов
+        вопроса, иначе 400.
         """
         try:
-            survey = Survey.objects.get(pk=pk)
-        except Survey.DoesNotExist:
+            survey_id = int(pk)
+        except ValueError:
             return Response(
-                {"detail": "Survey not found"}, 
-                status=status.HTTP_404_NOT_FOUND
+                {"detail": "Survey not found"},
+                status=status.HTTP_404_NOT_FOUND,
             )
 
         serializer = SurveyResponseSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
-        # Найти пользователя по ID если передан
-        user = None
-        if data.get("user_id"):
+        submission_key = data.get("submission_key") or None
+        try:
+            response = await sync_to_async(create_response)(
+                survey_id=survey_id,
+                user_id=data.get("user_id"),
+                answers=data["answers"],
+                telegram_user_id=data.get("telegram_user_id", ""),
+                telegram_username=data.get("telegram_username", ""),
+                submission_key=submission_key,
+            )
+        except Survey.DoesNotExist:
+            return Response(
+                {"detail": "Survey not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        except User.DoesNotExist:
+            return not_registered()
+        except ValueError as e:
+            return Response(
+                {"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        except IntegrityError:
+            # Повторная или параллельная доставка с тем же ключом —
+            # отдаём уже сохранённый ответ
+            existing = None
+            if submission_key:
+                existing = await SurveyResponse.objects.filter(
+                    submission_key=submission_key
+                ).afirst()
+            if existing:
+                return Response(SurveyResponseResultSerializer(existing).data)
+            if not await Survey.objects.filter(pk=survey_id).aexists():
+                return Response(
+                    {"detail": "Survey not found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            raise
+
+        # В Яндекс Формы ответ отправит фоновый воркер (forwarding.py)
+        return Response(
+            SurveyResponseResultSerializer(response).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["post"], url_path="submit-batch")
+    async def submit_batch(self, request):
+        """
+        POST /api/surveys/submit-batch
+        Принимает список ответов (каждый со своим survey_id) и сохраняет
+        их одной транзакцией через bulk_create. Ответы с уже сохранённым
+        submission_key повторно не создаются.
+        Возвращает id записей в порядке запроса. Пользователь ищется как
+        в submit; незарегистрированный отклоняет пачку (403, index).
+        """
+        serializer = SurveyBatchResponseSerializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=SUBMIT_BATCH_MAX_SIZE,
+        )
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+
+        def save():
+            with transaction.atomic():
+                survey_ids = {item["survey_id"] for item in items}
+                questions = dict(
+                    Survey.objects.filter(pk__in=survey_ids)
+                    .values_list("pk", "questions")
+                )
+                missing = sorted(survey_ids - set(questions))
+                if missing:
+                    return Response(
+                        {"detail": "Survey not found", "survey_ids": missing},
+                        status=status.HTTP_404_NOT_FOUND,
+                    )
+
+                # Ответ не из вариантов отклоняет всю пачку, как и
+                # несуществующий опрос или незарегистрированный
+                # пользователь: клиент досылает ответы по одному и узнаёт,
+                # какой неверен
+                for index, item in enumerate(items):
+                    try:
+                        item["answers"] = clean_answers(
+                            questions[item["survey_id"]], item["answers"]
+                        )
+                    except ValueError as e:
+                        return Response(
+                            {"detail": str(e), "index": index},
+                            status=status.HTTP_400_BAD_REQUEST,
+                        )
+
+                users = resolve_users(items)
+                if None in users:
+                    return not_registered(index=users.index(None))
+
+                # Ответы с уже известным ключом идемпотентности не создаём
+                # повторно
+                keys = [
+                    item["submission_key"] for item in items
+                    if item.get("submission_key")
+                ]
+                known = dict(
+                    SurveyResponse.objects.filter(submission_key__in=keys)
+                    .values_list("submission_key", "pk")
+                )
+
+                # Повтор ключа внутри пачки сохраняется один раз
+                responses = []
+                seen = set()
+                for item, user in zip(items, users):
+                    key = item.get("submission_key")
+                    if key:
+                        if key in known or key in seen:
+                            continue
+                        seen.add(key)
+                    responses.append(SurveyResponse(
+                        survey_id=item["survey_id"],
+                        user=user,
+                        answers=item["answers"],
+                        telegram_user_id=item.get("telegram_user_id", ""),
+                        telegram_username=item.get("telegram_username", ""),
+                        submission_key=key or None,
+                        **forward_fields(),
+                    ))
+
+                created = insert_responses(responses, known)
+                record_responses(created, questions)
+                store_answers(created)
+                delete_drafts(
+                    (r.survey_id, r.telegram_user_id) for r in created
+                )
+
+            created_ids = iter(r.pk for r in created if not r.submission_key)
+            known.update(
+                (r.submission_key, r.pk) for r in created if r.submission_key
+            )
+            ids = [
+                known[item["submission_key"]]
+                if item.get("submission_key")
+                else next(created_ids)
+                for item in items
+            ]
+            return Response(
+                {"created": len(created), "ids": ids},
+                status=status.HTTP_201_CREATED,
+            )
+
+        return await sync_to_async(save)()
+
+    @action(detail=True, methods=["get", "put", "delete"], url_path="draft")
+    async def draft(self, request, pk=None):
+        """
+        GET|PUT|DELETE /api/surveys/<id>/draft
+        Черновик прохождения опроса пользователем Telegram.
+        PUT сохраняет ответы, данные до сих пор (одна строка на пару
+        опрос–пользователь, повторный PUT перезаписывает её), GET с
+        ?telegram_user_id= возвращает черновик, чтобы продолжить анкету,
+        DELETE с тем же параметром удаляет его.
+        """
+        try:
+            survey_id = int(pk)
+        except ValueError:
+            return Response(
+                {"detail": "Survey not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if request.method == "PUT":
+            serializer = SurveyDraftSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            data = serializer.validated_data
+
+            def save():
+                [user] = resolve_users([data])
+                return save_draft(
+                    survey_id,
+                    data["telegram_user_id"],
+                    data["answers"],
+                    telegram_username=data.get("telegram_username", ""),
+                    version=data.get("version", ""),
+                    user=user,
+                )
+
             try:
-                user = User.objects.get(id=data["user_id"])
-            except User.DoesNotExist:
-                pass
+                draft = await sync_to_async(save)()
+            except IntegrityError:
+                return Response(
+                    {"detail": "Survey not found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            return Response(ResponseDraftSerializer(draft).data)
 
-        response = SurveyResponse.objects.create(
-            survey=survey,
-            user=user,
-            answers=data["answers"],
-            telegram_user_id=data.get("telegram_user_id", ""),
-            telegram_username=data.get("telegram_username", ""),
+        telegram_user_id = request.query_params.get("telegram_user_id")
+        if not telegram_user_id:
+            return Response(
+                {"detail": "Укажите telegram_user_id"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        drafts = ResponseDraft.objects.filter(
+            survey_id=survey_id, telegram_user_id=telegram_user_id
+        )
+        if request.method == "DELETE":
+            await drafts.adelete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        draft = await drafts.afirst()
+        if draft is None:
+            return Response(
+                {"detail": "Draft not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(ResponseDraftSerializer(draft).data)
+
+    @action(detail=True, methods=["get"], url_path="drafts")
+    async def drafts(self, request, pk=None):
+        """
+        GET /api/surveys/<id>/drafts
+        Незавершённые прохождения: сколько их и сколько вопросов
+        отвечено — воронка «на каком вопросе бросают анкету».
+        """
+        try:
+            survey = await Survey.objects.aget(pk=pk)
+        except (Survey.DoesNotExist, ValueError):
+            return Response(
+                {"detail": "Survey not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(await sync_to_async(draft_funnel)(survey.pk))
+
+    @action(detail=True, methods=["get"], url_path="stats")
+    async def stats(self, request, pk=None):
+        """
+        GET /api/surveys/<id>/stats
+        Распределения ответов по вопросам, число ответов по дням,
+        разбивка по возрасту и полу. Читается из агрегатов SurveyStat,
+        поддерживает If-None-Match для частого опроса дашбордами.
+        """
+        try:
+            survey = await Survey.objects.aget(pk=pk)
+        except Survey.DoesNotExist:
+            return Response(
+                {"detail": "Survey not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        rows = [row async for row in stat_rows(survey.pk)]
+        data = build_stats(survey, rows)
+        etag = make_etag(data)
+        if etag_matches(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        return Response(data, headers={"ETag": etag})
+
+    @action(detail=True, methods=["get"], url_path="crosstab")
+    async def crosstab(self, request, pk=None):
+        """
+        GET /api/surveys/<id>/crosstab?row=0&column=2&by=age|gender
+        Кросс-таблица ответов на два вопроса (или распределение ответов
+        на один, если column не задан) с разбивкой по группе. Вопросы —
+        только с вариантами ответа или шкалой.
+        Считается по закодированным колонкам из кеша (analytics.py).
+        """
+        try:
+            survey = await Survey.objects.aget(pk=pk)
+        except Survey.DoesNotExist:
+            return Response(
+                {"detail": "Survey not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        params = request.query_params
+        by = params.get("by") or None
+        try:
+            row = int(params.get("row", ""))
+            column = int(params["column"]) if params.get("column") else None
+        except ValueError:
+            return Response(
+                {"detail": "row и column — номера вопросов"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        question_count = len(survey.questions)
+        if any(
+            index is not None and not 0 <= index < question_count
+            for index in (row, column)
+        ):
+            return Response(
+                {"detail": f"В опросе {question_count} вопросов"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if any(
+            index is not None and not is_categorical(survey.questions[index])
+            for index in (row, column)
+        ):
+            # У вопроса со свободным ответом столько значений, сколько
+            # ответов, — таблица по нему квадратична по числу ответов
+            return Response(
+                {"detail": "Кросс-таблица строится только по вопросам "
+                           "с вариантами ответа или шкалой"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if by is not None and by not in analytics.GROUPS:
+            return Response(
+                {"detail": f"Неизвестная группировка: {by}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def compute():
+            encoded = analytics.get_encoded_answers(survey)
+            return analytics.build_crosstab(survey, encoded, row, column, by)
+
+        return Response(await sync_to_async(compute)())
+
+    # В выгрузке персональные данные участников — только администратору
+    @action(detail=True, methods=["get"], url_path="export",
+            permission_classes=[IsAdminUser])
+    async def export(self, request, pk=None):
+        """
+        GET /api/surveys/<id>/export?format=csv|ndjson|xlsx&from=...&to=...
+        Потоковая выгрузка ответов (только для администратора). CSV и NDJSON начинают отдаваться сразу
+        и читаются из БД порциями; from/to — границы submitted_at
+        (дата или дата-время, to не включается); question/answer —
+        только ответившие answer на вопрос с номером question.
+        """
+        fmt = request.query_params.get("format", "csv").lower()
+        if fmt not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Неизвестный формат: {fmt}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            submitted_from = parse_moment(request.query_params.get("from"))
+            submitted_to = parse_moment(request.query_params.get("to"))
+        except ValueError as e:
+            return Response(
+                {"detail": f"Некорректная дата: {e}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        answer_filter = None
+        if request.query_params.get("question"):
+            try:
+                answer_filter = (
+                    int(request.query_params["question"]),
+                    request.query_params.get("answer", ""),
+                )
+            except ValueError:
+                return Response(
+                    {"detail": "question — номер вопроса"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        try:
+            survey = await Survey.objects.aget(pk=pk)
+        except Survey.DoesNotExist:
+            return Response(
+                {"detail": "Survey not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        queryset = export_queryset(
+            survey, submitted_from, submitted_to, answer_filter
+        )
+        filename = f"survey_{survey.pk}.{fmt}"
+
+        if fmt == "xlsx":
+            try:
+                output = await sync_to_async(build_xlsx)(survey, queryset)
+            except RuntimeError as e:
+                return Response(
+                    {"detail": str(e)},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+            return FileResponse(
+                output, as_attachment=True, filename=filename,
+                content_type=EXPORT_FORMATS[fmt],
+            )
+
+        # Под ASGI Django буферизует синхронные итераторы целиком,
+        # под WSGI — асинхронные, поэтому генератор выбирается по серверу.
+        # wsgi.input есть в окружении любого WSGI-запроса и отсутствует
+        # в META запроса ASGI
+        if "wsgi.input" not in request.META:
+            content = aiter_export(survey, fmt, queryset)
+        else:
+            content = iter_export(survey, fmt, queryset)
+        response = StreamingHttpResponse(
+            content, content_type=EXPORT_FORMATS[fmt]
         )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+# Сколько последних рассылок отдаёт список
+BROADCAST_LIST_LIMIT = 50
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class BroadcastViewSet(viewsets.ViewSet):
+    """
+    Рассылки приглашений пройти опрос (см. broadcasts.py).
+    Администратор создаёт рассылку и управляет ею, воркер бота забирает
+    получателей пачками через claim и progress.
+    """
 
-        # Отправка в Яндекс Формы:
-        #########################################################
+    # claim и progress вызывает бот с общим секретом, остальное — только
+    # администратор (staff)
+    WORKER_ACTIONS = ("claim", "progress")
 
+    def get_permissions(self):
+        if self.action in self.WORKER_ACTIONS:
+            return [HasWorkerToken()]
+        return [IsAdminUser()]
 
+    async def list(self, request):
+        """
+        GET /api/broadcasts
+        Последние рассылки с прогрессом.
+        """
+        broadcasts = [
+            broadcast async for broadcast in
+            Broadcast.objects.order_by("-pk")[:BROADCAST_LIST_LIMIT]
+        ]
+        return Response(BroadcastSerializer(broadcasts, many=True).data)
+
+    async def create(self, request):
+        """
+        POST /api/broadcasts
+        Создаёт и сразу запускает рассылку по опросу. Фильтры сегмента:
+        age_min, age_max, gender, responded (true — ответившие на опрос,
+        false — не ответившие). Получатели — пользователи с известным
+        telegram_id.
+        """
+        serializer = BroadcastCreateSerializer(data=request.data)
+        # Проверка существования опроса ходит в БД
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        broadcast = await sync_to_async(create_broadcast)(
+            **serializer.validated_data
+        )
         return Response(
-            SurveyResponseResultSerializer(response).data,
+            BroadcastSerializer(broadcast).data,
             status=status.HTTP_201_CREATED,
         )
+
+    async def retrieve(self, request, pk=None):
+        """
+        GET /api/broadcasts/<id>
+        """
+        try:
+            broadcast = await Broadcast.objects.aget(pk=pk)
+        except (Broadcast.DoesNotExist, ValueError):
+            return Response(
+                {"detail": "Broadcast not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(BroadcastSerializer(broadcast).data)
+
+    async def _set_status(self, pk, new_status, allowed):
+        try:
+            broadcast_id = int(pk)
+        except ValueError:
+            broadcast_id = None
+        updated = await Broadcast.objects.filter(
+            pk=broadcast_id, status__in=allowed
+        ).aupdate(status=new_status, updated_at=timezone.now())
+        if not updated:
+            exists = await Broadcast.objects.filter(pk=broadcast_id).aexists()
+            if not exists:
+                return Response(
+                    {"detail": "Broadcast not found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            return Response(
+                {"detail": "Рассылку в текущем статусе так изменить нельзя"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        broadcast = await Broadcast.objects.aget(pk=broadcast_id)
+        return Response(BroadcastSerializer(broadcast).data)
+
+    @action(detail=True, methods=["post"], url_path="pause")
+    async def pause(self, request, pk=None):
+        """
+        POST /api/broadcasts/<id>/pause
+        Приостанавливает рассылку; воркер остановится после текущей пачки.
+        """
+        return await self._set_status(
+            pk, Broadcast.STATUS_PAUSED, [Broadcast.STATUS_RUNNING]
+        )
+
+    @action(detail=True, methods=["post"], url_path="resume")
+    async def resume(self, request, pk=None):
+        """
+        POST /api/broadcasts/<id>/resume
+        Продолжает приостановленную рассылку с места остановки.
+        """
+        return await self._set_status(
+            pk, Broadcast.STATUS_RUNNING, [Broadcast.STATUS_PAUSED]
+        )
+
+    @action(detail=True, methods=["post"], url_path="cancel")
+    async def cancel(self, request, pk=None):
+        """
+        POST /api/broadcasts/<id>/cancel
+        """
+        return await self._set_status(
+            pk, Broadcast.STATUS_CANCELLED,
+            [Broadcast.STATUS_RUNNING, Broadcast.STATUS_PAUSED],
+        )
+
+    @action(detail=False, methods=["post"], url_path="claim")
+    async def claim(self, request):
+        """
+        POST /api/broadcasts/claim
+        Для воркера бота: берёт в аренду идущую рассылку и возвращает
+        текст приглашения и первую пачку получателей. 204 — рассылок нет.
+        """
+        serializer = BroadcastClaimSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        job = await sync_to_async(claim_broadcast)(data["worker"], data["limit"])
+        if job is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(job)
+
+    @action(detail=True, methods=["post"], url_path="progress")
+    async def progress(self, request, pk=None):
+        """
+        POST /api/broadcasts/<id>/progress
+        Для воркера бота: засчитывает отправленную пачку (after — курсор,
+        с которого она выдана, cursor — новый) и возвращает следующую.
+        Пустая пачка — рассылка завершена или остановлена. 409 — аренда
+        потеряна или пачка уже засчитана.
+        """
+        try:
+            broadcast_id = int(pk)
+        except ValueError:
+            return Response(
+                {"detail": "Broadcast not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        serializer = BroadcastProgressSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = await sync_to_async(report_progress)(
+            broadcast_id, **serializer.validated_data
+        )
+        if job is None:
+            return Response(
+                {"detail": "Рассылка занята другим воркером"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(job)
@@ -0,0 +1,316 @@
+"""Клиент API Яндекс Форм.
+
+Импорт и повторная синхронизация десятков форм не должны каждый раз
+заново авторизоваться и открывать соединение, поэтому:
+
+- OAuth-токен (client_credentials) кешируется до истечения срока;
+- HTTP-клиент общий, с пулом keep-alive соединений;
+- описания форм кешируются по external_id и перепроверяются условным
+  запросом (If-None-Match), если API отдал ETag.
+
+Адреса API задаются переменными окружения — так клиент направляется
+на локальный фейковый сервер (fake_yandex.py).
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+import httpx
+
+from .metrics import CACHE_REQUESTS
+from .questions import MULTIPLE, SINGLE, question_text
+
+
+YANDEX_OAUTH_URL = os.getenv(
+    "YANDEX_OAUTH_URL", "https://oauth.yandex.ru/token"
+)
+YANDEX_FORMS_API_URL = os.getenv(
+    "YANDEX_FORMS_API_URL", "https://api.forms.yandex.net/v1"
+).rstrip("/")
+
+# Сколько секунд описание формы считается свежим без перепроверки
+FORM_CACHE_TTL = float(os.getenv("YANDEX_FORMS_CACHE_TTL", "300"))
+FORM_CACHE_MAXSIZE = 512
+
+# Токен обновляется заранее, чтобы не отправить запрос с истекающим
+TOKEN_REFRESH_MARGIN = 60.0
+
+
+def get_credentials():
+    """(client_id, client_secret) из окружения; пустые строки, если не заданы."""
+    return (
+        os.environ.get("YANDEX_CLIENT_ID", "").strip(),
+        os.environ.get("YANDEX_CLIENT_SECRET", "").strip(),
+    )
+
+
+class YandexFormsError(Exception):
+    """Ошибка API Яндекс Форм или авторизации.
+
+    status_code — HTTP-статус ответа (None при сетевой ошибке),
+    retry_after — пауза из заголовка Retry-After, секунды.
+    """
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+# Общий HTTP-клиент для запросов к Яндекс Формам.
+# Под ASGI цикл событий один на процесс, и соединения переиспользуются
+# между запросами; клиент закрывается при остановке сервера (lifespan
+# в backend/asgi.py). Под WSGI и в management-командах каждый вызов
+# async_to_sync / asyncio.run создаёт свой цикл, поэтому клиент хранится
+# отдельно для каждого цикла, а закрывает его close_clients() в конце
+# работы цикла.
+# loop -> client
+_clients = weakref.WeakKeyDictionary()
+_token_locks = weakref.WeakKeyDictionary()
+
+# client_id -> (access_token, expires_at по time.monotonic())
+_tokens = {}
+# external_id -> {"data", "etag", "checked_at"}
+_forms = {}
+_cache_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=50, max_keepalive_connections=10
+            ),
+        )
+    return client
+
+
+async def close_clients():
+    """Закрывает HTTP-клиент текущего цикла событий, если он создан.
+
+    Вызывается перед завершением цикла: при остановке ASGI-сервера,
+    в конце management-команды и запроса, обработанного под WSGI.
+    """
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _get_token_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _token_locks.get(loop)
+    if lock is None:
+        lock = _token_locks[loop] = asyncio.Lock()
+    return lock
+
+
+def _cached_token(client_id):
+    with _cache_lock:
+        cached = _tokens.get(client_id)
+    if cached and cached[1] - TOKEN_REFRESH_MARGIN > time.monotonic():
+        return cached[0]
+    return None
+
+
+def invalidate_token(client_id):
+    with _cache_lock:
+        _tokens.pop(client_id, None)
+
+
+async def get_access_token(client_id, client_secret) -> str:
+    """OAuth-токен приложения; запрашивается, только если кеш истёк."""
+    token = _cached_token(client_id)
+    if token:
+        return token
+
+    # Одновременные запросы ждут одного обновления токена
+    async with _get_token_lock():
+        token = _cached_token(client_id)
+        if token:
+            return token
+
+        response = await get_http_client().post(
+            YANDEX_OAUTH_URL,
+            data={
+                "grant_type": "client_credentials",
+                "client_id": client_id,
+                "client_secret": client_secret,
+            },
+        )
+        if response.status_code != 200:
+            raise YandexFormsError(
+                f"Не удалось получить OAuth-токен: HTTP {response.status_code}"
+            )
+        payload = response.json()
+        token = payload["access_token"]
+        expires_in = float(payload.get("expires_in", 3600))
+        with _cache_lock:
+            _tokens[client_id] = (token, time.monotonic() + expires_in)
+        return token
+
+
+def _parse_question(item):
+    """Вопрос формы -> строка (свободный ответ) или вопрос с вариантами
+    (см. questions.py); None, если у вопроса нет текста."""
+    if not isinstance(item, dict):
+        return str(item).strip() or None
+    label = item.get("label") or item.get("name") or item.get("text")
+    if not label:
+        return None
+    label = str(label).strip()
+
+    options = []
+    for option in item.get("options") or item.get("choices") or []:
+        if isinstance(option, dict):
+            option = option.get("label") or option.get("text")
+        if option:
+            options.append(str(option).strip())
+    if not options:
+        return label
+    return {
+        "text": label,
+        "type": MULTIPLE if item.get("multiple") else SINGLE,
+        "options": options,
+    }
+
+
+def parse_form(data) -> dict:
+    """Описание формы из ответа API -> {"title", "description", "questions"}.
+
+    Вопросы берутся из страниц формы (pages[].items[]); плоский список
+    questions тоже поддерживается. Вопросы с вариантами ответа (options
+    или choices) становятся вопросами типа single/multiple.
+    """
+    questions = []
+    for page in data.get("pages") or []:
+        for item in page.get("items") or []:
+            question = _parse_question(item)
+            if question:
+                questions.append(question)
+    if not questions:
+        for item in data.get("questions") or []:
+            question = _parse_question(item)
+            if question:
+                questions.append(question)
+
+    return {
+        "title": data.get("name") or data.get("title") or "",
+        "description": data.get("description") or "",
+        "questions": questions,
+    }
+
+
+def _remember_form(external_id, data, etag):
+    with _cache_lock:
+        _forms.pop(external_id, None)
+        _forms[external_id] = {
+            "data": data, "etag": etag, "checked_at": time.monotonic()
+        }
+        # Словарь хранит порядок вставки — удаляем самые старые записи
+        while len(_forms) > FORM_CACHE_MAXSIZE:
+            _forms.pop(next(iter(_forms)))
+
+
+def invalidate_form(external_id=None):
+    with _cache_lock:
+        if external_id is None:
+            _forms.clear()
+        else:
+            _forms.pop(external_id, None)
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+async def _authorized_request(method, url, client_id, client_secret, **kwargs):
+    """Запрос с OAuth-токеном. 401 означает, что токен отозван раньше
+    срока: он запрашивается заново, и запрос повторяется один раз.
+    """
+    headers = kwargs.pop("headers", {})
+    for attempt in range(2):
+        token = await get_access_token(client_id, client_secret)
+        response = await get_http_client().request(
+            method, url,
+            headers={**headers, "Authorization": f"OAuth {token}"},
+            **kwargs,
+        )
+        if response.status_code == 401 and attempt == 0:
+            invalidate_token(client_id)
+            continue
+        return response
+
+
+async def get_survey_from_yandex(
+    external_id, client_id, client_secret, use_cache=True
+):
+    """Описание формы по её id в Яндекс Формах.
+
+    Возвращает {"title", "description", "questions"} или None, если форма
+    не найдена. use_cache=False — перепроверить форму, даже если кеш свежий
+    (при повторной синхронизации).
+    """
+    with _cache_lock:
+        cached = _forms.get(external_id)
+    if (
+        use_cache and cached
+        and time.monotonic() - cached["checked_at"] < FORM_CACHE_TTL
+    ):
+        CACHE_REQUESTS.labels("yandex_form", "hit").inc()
+        return cached["data"]
+
+    headers = {}
+    if cached and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    response = await _authorized_request(
+        "GET", f"{YANDEX_FORMS_API_URL}/surveys/{external_id}",
+        client_id, client_secret, headers=headers,
+    )
+
+    if response.status_code == 304 and cached:
+        CACHE_REQUESTS.labels("yandex_form", "not_modified").inc()
+        _remember_form(external_id, cached["data"], cached["etag"])
+        return cached["data"]
+    if response.status_code == 404:
+        invalidate_form(external_id)
+        return None
+    if response.status_code != 200:
+        raise YandexFormsError(
+            f"Яндекс Формы ответили HTTP {response.status_code}",
+            status_code=response.status_code,
+        )
+
+    CACHE_REQUESTS.labels("yandex_form", "miss").inc()
+    data = parse_form(response.json())
+    _remember_form(external_id, data, response.headers.get("ETag"))
+    return data
+
+
+async def submit_answers_to_yandex(
+    external_id, questions, answers, client_id, client_secret
+):
+    """Отправляет ответы в форму; YandexFormsError, если API не принял их."""
+    payload = {
+        "answers": [
+            {"question": question_text(question), "value": answer}
+            for question, answer in zip(questions, answers)
+        ],
+    }
+    response = await _authorized_request(
+        "POST", f"{YANDEX_FORMS_API_URL}/surveys/{external_id}/answers",
+        client_id, client_secret, json=payload,
+    )
+    if response.status_code not in (200, 201, 202, 204):
+        raise YandexFormsError(
+            f"Яндекс Формы ответили HTTP {response.status_code}",
+            status_code=response.status_code,
+            retry_after=_retry_after(response),
+        )
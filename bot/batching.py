@@ -0,0 +1,71 @@
+import asyncio
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Накопитель запросов: собирает элементы в пачку и отправляет её,
+    когда набралось max_size элементов или прошло max_delay секунд
+    с момента появления первого элемента.
+
+    flush — корутина, принимающая список элементов и возвращающая
+    список результатов той же длины (None для неудачных элементов;
+    исключение в списке пробрасывается ожидающему этот элемент).
+    """
+
+    def __init__(self, flush, max_size: int, max_delay: float) -> None:
+        self._flush = flush
+        self.max_size = max(max_size, 1)
+        self.max_delay = max_delay
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, item):
+        """Добавляет элемент в пачку и ждёт результат его отправки."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_delay, self._flush_pending
+            )
+        return await future
+
+    async def close(self) -> None:
+        """Отправляет накопленное и дожидается всех отправок."""
+        self._flush_pending()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _flush_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = await self._flush(items)
+        except Exception as e:  # noqa: BLE001
+            logger.warning(
+                "Не удалось отправить пачку из %d элементов: %s", len(items), e
+            )
+            results = []
+        results = list(results) + [None] * (len(batch) - len(results))
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from keyboards import invitation_keyboard
+from metrics import BROADCAST_MESSAGES
+from ratelimit import wait_for_token
+
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastWorker:
+    """Фоновая отправка рассылок, созданных на бэкенде.
+
+    Воркер берёт в аренду идущую рассылку (claim) и получает
+    получателей пачками; пачка отправляется не больше чем concurrency
+    сообщениями одновременно и не чаще rate в секунду. Поверх этого
+    каждое сообщение проходит SendRateLimitMiddleware, то есть лимиты
+    Telegram на чат и на бота общие с ответами пользователям. После
+    пачки воркер сообщает прогресс (report) и получает следующую —
+    прерванная рассылка продолжится с последней подтверждённой пачки.
+
+    claim(limit) и report(job_id, progress) — корутины запросов к
+    бэкенду, возвращают задание ({"id", "text", "survey_id", "cursor",
+    "recipients"}) или None.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        claim,
+        report,
+        limiter,
+        rate: float = 20.0,
+        concurrency: int = 10,
+        chunk_size: int = 100,
+        poll_interval: float = 30.0,
+    ) -> None:
+        self.bot = bot
+        self._claim = claim
+        self._report = report
+        self.limiter = limiter
+        self.rate = rate
+        self.concurrency = max(concurrency, 1)
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Останавливает воркер, дав дослать и подтвердить текущую пачку."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            # Неподтверждённую пачку после окончания аренды повторит
+            # следующий воркер
+            logger.warning("Рассылка прервана посреди пачки")
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await self._claim(self.chunk_size)
+                if job is not None:
+                    await self._process(job)
+                    continue
+            except Exception as e:  # noqa: BLE001
+                logger.exception("Ошибка воркера рассылок: %s", e)
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(), timeout=self.poll_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _process(self, job: dict) -> None:
+        logger.info("Рассылка #%s: продолжаем с pk > %s", job["id"], job["cursor"])
+        while job is not None and job["recipients"]:
+            recipients = job["recipients"]
+            results = await self._send_chunk(job, recipients)
+            progress = {
+                "after": job["cursor"],
+                "cursor": recipients[-1]["user_id"],
+                "sent": results.count("sent"),
+                "blocked": results.count("blocked"),
+                "failed": results.count("failed"),
+                "limit": self.chunk_size,
+                "release": self._stopping.is_set(),
+            }
+            job = await self._report(job["id"], progress)
+        if job is not None:
+            logger.info("Рассылка #%s: %s", job["id"], job["status"])
+
+    async def _send_chunk(self, job: dict, recipients: list) -> list:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        keyboard = invitation_keyboard(job["survey_id"])
+
+        async def send(recipient):
+            async with semaphore:
+                return await self._send_one(
+                    recipient["telegram_id"], job["text"], keyboard
+                )
+
+        return await asyncio.gather(*(send(r) for r in recipients))
+
+    async def _send_one(self, chat_id: int, text: str, keyboard) -> str:
+        if self.rate > 0:
+            await wait_for_token(
+                self.limiter, "broadcast", self.rate, max(int(self.rate), 1)
+            )
+        try:
+            await self.bot.send_message(chat_id, text, reply_markup=keyboard)
+            result = "sent"
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Бот заблокирован, аккаунт удалён или чата нет — повторять
+            # бесполезно
+            logger.info("Рассылка: чат %s недоступен: %s", chat_id, e)
+            result = "blocked"
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Рассылка: не удалось отправить в %s: %s", chat_id, e)
+            result = "failed"
+        BROADCAST_MESSAGES.labels(result).inc()
+        return result
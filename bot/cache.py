@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Кеш в памяти процесса с ограничением размера (LRU) и временем жизни.
+
+    Поддерживает «отрицательные» записи — запоминание того, что значения
+    нет (например, API вернул 404), с отдельным, более коротким TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float = 0.0):
+        self.maxsize = max(maxsize, 0)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=_MISSING):
+        """Возвращает значение или default, если записи нет или она устарела.
+
+        Для отрицательной записи возвращается None.
+        """
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value) -> None:
+        self._store(key, value, self.ttl)
+
+    def set_negative(self, key) -> None:
+        if self.negative_ttl > 0:
+            self._store(key, None, self.negative_ttl)
+
+    def invalidate(self, key) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    def __contains__(self, key) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _store(self, key, value, ttl: float) -> None:
+        if self.maxsize == 0 or ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
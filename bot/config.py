@@ -26,3 +26,294 @@ def get_user_service_timeout() -> float:
         return float(raw)
     except ValueError:
         return 5.0
+
+
+def _get_int_env(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+def _get_float_env(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    try:
+        return float(raw)
+    except ValueError:
+        return default
+
+
+def _get_bool_env(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw in ("1", "true", "yes", "on")
+
+
+# ---- HTTP-клиент (общий пул соединений) ----
+
+def get_http_max_connections() -> int:
+    return _get_int_env("HTTP_MAX_CONNECTIONS", 100)
+
+
+def get_http_max_keepalive_connections() -> int:
+    return _get_int_env("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+
+
+def get_http_keepalive_expiry() -> float:
+    return _get_float_env("HTTP_KEEPALIVE_EXPIRY", 30.0)
+
+
+def get_http2_enabled() -> bool:
+    return _get_bool_env("HTTP2_ENABLED", True)
+
+
+# ---- Кеш пользователей ----
+
+def get_user_cache_maxsize() -> int:
+    return _get_int_env("USER_CACHE_MAXSIZE", 10000)
+
+
+def get_user_cache_ttl() -> float:
+    return _get_float_env("USER_CACHE_TTL", 300.0)
+
+
+def get_user_cache_negative_ttl() -> float:
+    return _get_float_env("USER_CACHE_NEGATIVE_TTL", 10.0)
+
+
+# ---- Кеш опросов ----
+
+def get_survey_cache_maxsize() -> int:
+    return _get_int_env("SURVEY_CACHE_MAXSIZE", 1000)
+
+
+def get_survey_cache_fresh_ttl() -> float:
+    """Сколько секунд опрос считается свежим без повторной проверки."""
+    return _get_float_env("SURVEY_CACHE_FRESH_TTL", 30.0)
+
+
+def get_survey_cache_ttl() -> float:
+    """Сколько секунд опрос хранится для условной перепроверки (ETag)."""
+    return _get_float_env("SURVEY_CACHE_TTL", 3600.0)
+
+
+def get_survey_cache_negative_ttl() -> float:
+    """Сколько секунд помнить, что опроса нет (404)."""
+    return _get_float_env("SURVEY_CACHE_NEGATIVE_TTL", 10.0)
+
+
+# ---- FSM-хранилище ----
+
+def get_fsm_storage_backend() -> str:
+    """memory | redis | fakeredis | file"""
+    return os.environ.get("FSM_STORAGE", "memory").strip().lower() or "memory"
+
+
+def get_redis_url() -> str:
+    return os.environ.get("REDIS_URL", "redis://localhost:6379/0").strip()
+
+
+def get_fsm_storage_path() -> str:
+    return os.environ.get("FSM_STORAGE_PATH", "fsm_storage.json").strip()
+
+
+def get_fsm_state_ttl() -> int:
+    """TTL записей состояния в секундах (0 — без ограничения)."""
+    return _get_int_env("FSM_STATE_TTL", 0)
+
+
+def get_fsm_data_ttl() -> int:
+    """TTL данных состояния в секундах (0 — без ограничения)."""
+    return _get_int_env("FSM_DATA_TTL", 0)
+
+
+# ---- Режим запуска (polling / webhook) ----
+
+def get_bot_run_mode() -> str:
+    """polling | webhook"""
+    return os.environ.get("BOT_RUN_MODE", "polling").strip().lower() or "polling"
+
+
+def get_webhook_base_url() -> str:
+    url = os.environ.get("WEBHOOK_BASE_URL", "").strip()
+    if not url:
+        raise RuntimeError("Не задан адрес вебхука (WEBHOOK_BASE_URL)")
+    return url
+
+
+def get_webhook_path() -> str:
+    return os.environ.get("WEBHOOK_PATH", "/webhook").strip() or "/webhook"
+
+
+def get_webhook_secret() -> str:
+    secret = os.environ.get("WEBHOOK_SECRET", "").strip()
+    if not secret:
+        raise RuntimeError("Не задан секрет вебхука (WEBHOOK_SECRET)")
+    return secret
+
+
+def get_webhook_max_connections() -> int:
+    """Сколько одновременных соединений Telegram открывает к вебхуку (1-100)."""
+    return min(max(_get_int_env("WEBHOOK_MAX_CONNECTIONS", 40), 1), 100)
+
+
+def get_webapp_host() -> str:
+    return os.environ.get("WEBAPP_HOST", "0.0.0.0").strip() or "0.0.0.0"
+
+
+def get_webapp_port() -> int:
+    return _get_int_env("WEBAPP_PORT", 8080)
+
+
+def get_max_concurrent_updates() -> int:
+    """Максимум одновременно обрабатываемых апдейтов (0 — без ограничения)."""
+    return _get_int_env("MAX_CONCURRENT_UPDATES", 100)
+
+
+# ---- Пакетная отправка ответов ----
+
+def get_submit_batch_enabled() -> bool:
+    return _get_bool_env("SUBMIT_BATCH_ENABLED", False)
+
+
+def get_submit_batch_size() -> int:
+    return _get_int_env("SUBMIT_BATCH_SIZE", 50)
+
+
+def get_submit_batch_delay() -> float:
+    """Максимальное ожидание перед отправкой неполной пачки, секунды."""
+    return _get_float_env("SUBMIT_BATCH_DELAY", 0.2)
+
+
+# ---- Outbox (надёжная доставка ответов) ----
+
+def get_outbox_enabled() -> bool:
+    return _get_bool_env("OUTBOX_ENABLED", True)
+
+
+def get_outbox_path() -> str:
+    return os.environ.get("OUTBOX_PATH", "outbox.sqlite3").strip()
+
+
+def get_outbox_retry_base() -> float:
+    return _get_float_env("OUTBOX_RETRY_BASE", 1.0)
+
+
+def get_outbox_retry_max() -> float:
+    return _get_float_env("OUTBOX_RETRY_MAX", 300.0)
+
+
+# ---- Черновики анкет (продолжение с места остановки) ----
+
+def get_draft_enabled() -> bool:
+    return _get_bool_env("DRAFT_ENABLED", True)
+
+
+def get_draft_every() -> int:
+    """Сохранять черновик каждые N ответов."""
+    return _get_int_env("DRAFT_EVERY", 3)
+
+
+def get_draft_idle() -> float:
+    """Сохранять черновик, если пользователь молчит столько секунд."""
+    return _get_float_env("DRAFT_IDLE", 30.0)
+
+
+# ---- Ограничение частоты (flood control) ----
+
+def get_throttle_store() -> str:
+    """auto | memory | redis. auto — Redis FSM-хранилища, если он есть."""
+    return os.environ.get("THROTTLE_STORE", "auto").strip().lower() or "auto"
+
+
+def get_throttle_user_rate() -> float:
+    """Входящих апдейтов в секунду от одного пользователя (0 — без лимита)."""
+    return _get_float_env("THROTTLE_USER_RATE", 2.0)
+
+
+def get_throttle_user_burst() -> int:
+    return _get_int_env("THROTTLE_USER_BURST", 5)
+
+
+def get_throttle_global_rate() -> float:
+    """Входящих апдейтов в секунду на всего бота (0 — без лимита)."""
+    return _get_float_env("THROTTLE_GLOBAL_RATE", 200.0)
+
+
+def get_throttle_global_burst() -> int:
+    return _get_int_env("THROTTLE_GLOBAL_BURST", 400)
+
+
+def get_throttle_global_max_wait() -> float:
+    """Сколько апдейт может ждать глобального лимита, прежде чем отброшен."""
+    return _get_float_env("THROTTLE_GLOBAL_MAX_WAIT", 5.0)
+
+
+def get_send_global_rate() -> float:
+    """Исходящих сообщений в секунду на бота (лимит Telegram — 30)."""
+    return _get_float_env("SEND_GLOBAL_RATE", 30.0)
+
+
+def get_send_chat_rate() -> float:
+    """Сообщений в секунду в один личный чат (лимит Telegram — 1)."""
+    return _get_float_env("SEND_CHAT_RATE", 1.0)
+
+
+def get_send_chat_burst() -> int:
+    return _get_int_env("SEND_CHAT_BURST", 3)
+
+
+def get_send_group_per_minute() -> int:
+    """Сообщений в минуту в одну группу (лимит Telegram — 20)."""
+    return _get_int_env("SEND_GROUP_PER_MINUTE", 20)
+
+
+def get_send_max_retries() -> int:
+    """Повторы отправки после 429 (TelegramRetryAfter)."""
+    return _get_int_env("SEND_MAX_RETRIES", 3)
+
+
+# ---- Рассылки о новых опросах ----
+
+def get_broadcast_enabled() -> bool:
+    return _get_bool_env("BROADCAST_ENABLED", True)
+
+
+def get_broadcast_rate() -> float:
+    """Сообщений рассылки в секунду — меньше SEND_GLOBAL_RATE, чтобы
+    ответам пользователям оставался запас общего лимита."""
+    return _get_float_env("BROADCAST_RATE", 20.0)
+
+
+def get_broadcast_concurrency() -> int:
+    """Сколько сообщений рассылки отправляется одновременно."""
+    return _get_int_env("BROADCAST_CONCURRENCY", 10)
+
+
+def get_broadcast_chunk_size() -> int:
+    """Получателей в одной пачке (после каждой пачки прогресс
+    сохраняется на бэкенде)."""
+    return _get_int_env("BROADCAST_CHUNK_SIZE", 100)
+
+
+def get_broadcast_poll_interval() -> float:
+    """Как часто спрашивать бэкенд о новых рассылках, секунды."""
+    return _get_float_env("BROADCAST_POLL_INTERVAL", 30.0)
+
+
+def get_broadcast_worker_token() -> str:
+    """Общий с бэкендом секрет для claim и progress (X-Worker-Token)."""
+    return os.environ.get("BROADCAST_WORKER_TOKEN", "").strip()
+
+
+# ---- Метрики Prometheus ----
+
+def get_metrics_enabled() -> bool:
+    return _get_bool_env("METRICS_ENABLED", True)
+
+
+def get_metrics_port() -> int:
+    """Порт /metrics в режиме polling (в режиме webhook — WEBAPP_PORT)."""
+    return _get_int_env("METRICS_PORT", 9100)
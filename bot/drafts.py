@@ -0,0 +1,81 @@
+import asyncio
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class DraftCheckpointer:
+    """Отложенное сохранение черновиков анкет с объединением записей.
+
+    update() только запоминает последнее состояние по ключу. Отправка
+    происходит сразу, если ответов стало кратно every, иначе — когда
+    пользователь idle секунд ничего не отвечает. Пока предыдущая запись
+    по ключу ещё отправляется, новые состояния не плодят запросов:
+    после её завершения уйдёт только последнее.
+
+    send — корутина send(key, payload); исключение считается неудачей,
+    состояние будет отправлено со следующим update().
+    """
+
+    def __init__(self, send, every: int, idle: float) -> None:
+        self._send = send
+        self.every = max(every, 1)
+        self.idle = idle
+        self._pending = {}
+        self._timers = {}
+        self._sending = {}
+
+    def update(self, key, payload, answered: int) -> None:
+        self._pending[key] = payload
+        self._cancel_timer(key)
+        if answered % self.every == 0:
+            self._flush(key)
+        elif self.idle > 0:
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self.idle, self._flush, key
+            )
+
+    async def discard(self, key) -> None:
+        """Забывает черновик (анкета завершена) и дожидается записи,
+        которая уже в пути, — чтобы она не пришла после ответа."""
+        self._pending.pop(key, None)
+        self._cancel_timer(key)
+        task = self._sending.get(key)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Отправляет все отложенные черновики (при остановке бота)."""
+        for key in list(self._pending):
+            self._cancel_timer(key)
+            self._flush(key)
+        if self._sending:
+            await asyncio.gather(
+                *self._sending.values(), return_exceptions=True
+            )
+
+    def _cancel_timer(self, key) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _flush(self, key) -> None:
+        self._timers.pop(key, None)
+        if key in self._sending or key not in self._pending:
+            # Идущая отправка заберёт последнее состояние сама
+            return
+        task = asyncio.ensure_future(self._run(key))
+        self._sending[key] = task
+
+    async def _run(self, key) -> None:
+        try:
+            while key in self._pending:
+                payload = self._pending.pop(key)
+                self._cancel_timer(key)
+                try:
+                    await self._send(key, payload)
+                except Exception as e:  # noqa: BLE001
+                    logger.warning("Не удалось сохранить черновик: %s", e)
+        finally:
+            self._sending.pop(key, None)
@@ -1,22 +1,41 @@
 import logging
+from typing import Optional
 
-import httpx
 from aiogram import F, Router
+from aiogram.filters import or_f
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import Message
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 
-from config import get_user_service_base_url
 from services import (
     call_external_api,
+    checkpoint_draft,
+    discard_draft,
+    get_draft,
+    get_survey,
     get_user_by_username,
     submit_survey_response,
+    survey_version,
+)
+from keyboards import (
+    MULTIPLE,
+    AnswerCallback,
+    DoneCallback,
+    StartSurveyCallback,
+    ToggleCallback,
+    answer_value,
+    format_question,
+    match_option,
+    question_keyboard,
+    question_options,
+    question_type,
 )
 
 logger = logging.getLogger(__name__)
 
 
-operations_router = Router()
+operations_router = Router(name="operations")
 
 
 class OperationStates(StatesGroup):
@@ -27,28 +46,22 @@ class SurveyStates(StatesGroup):
     answering_question = State()
 
 
-async def get_survey_from_api(survey_id: int):
-    """Получение данных опроса из API"""
-    base = get_user_service_base_url()
-    if not base:
-        return None
-
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            # Сначала получаем список всех опросов или конкретный опрос
-            # Для простоты используем тестовые данные, если API недоступен
-            return {
-                "id": survey_id,
-                "title": f"Опрос #{survey_id}",
-                "questions": [
-                    f"Вопрос 1 для опроса {survey_id}",
-                    f"Вопрос 2 для опроса {survey_id}",
-                    f"Вопрос 3 для опроса {survey_id}",
-                ]
-            }
-    except Exception as e:
-        logger.warning("Не удалось получить опрос из API: %s", e)
-        return None
+async def reply(
+    message: Message,
+    text: str,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    edit: bool = False,
+) -> None:
+    """Ответ пользователю: новым сообщением или правкой сообщения бота
+    (после нажатия кнопки — вместо нового сообщения на каждый вопрос)."""
+    if edit:
+        try:
+            await message.edit_text(text, reply_markup=reply_markup)
+            return
+        except TelegramBadRequest as e:
+            # Сообщение слишком старое или не изменилось — шлём новое
+            logger.info("Не удалось изменить сообщение: %s", e)
+    await message.answer(text, reply_markup=reply_markup)
 
 
 @operations_router.message(
@@ -62,8 +75,35 @@ async def receive_number(message: Message, state: FSMContext) -> None:
         await message.answer("Пожалуйста, отправьте номер анкеты (число).")
         return
 
+    await start_survey(message, state, survey_id, message.from_user)
+
+
+@operations_router.callback_query(StartSurveyCallback.filter())
+async def start_from_invitation(
+    callback: CallbackQuery, callback_data: StartSurveyCallback,
+    state: FSMContext,
+) -> None:
+    # Кнопка из рассылки: анкета начинается из любого состояния, как
+    # после ввода номера, но только для зарегистрированных (как в /start)
+    await callback.answer()
+    if not isinstance(callback.message, Message):
+        return
+    if not await get_user_by_username(callback.from_user.username):
+        await callback.message.answer(
+            "Чтобы пройти опрос, сначала зарегистрируйтесь — "
+            "отправьте /start."
+        )
+        return
+    await start_survey(
+        callback.message, state, callback_data.survey_id, callback.from_user
+    )
+
+
+async def start_survey(
+    message: Message, state: FSMContext, survey_id: int, from_user
+) -> None:
     # Получаем данные опроса из API
-    survey_data = await get_survey_from_api(survey_id)
+    survey_data = await get_survey(survey_id)
     if not survey_data:
         await message.answer(
             f"Не удалось загрузить анкету с номером {survey_id}. "
@@ -71,30 +111,111 @@ async def receive_number(message: Message, state: FSMContext) -> None:
         )
         return
 
-    questions = survey_data["questions"]
+    questions = survey_data.get("questions") or []
     if not questions:
         await message.answer(
             f"Анкета с номером {survey_id} не содержит вопросов."
         )
         return
 
-    # Сохраняем данные анкеты в состоянии
-    await state.update_data({
+    version = survey_version(survey_data)
+    title = survey_data.get('title', f'№{survey_id}')
+
+    # Если пользователь уже начинал эту анкету — продолжаем с места
+    # остановки
+    answers = []
+    if from_user:
+        draft = await get_draft(survey_id, from_user.id)
+        answers = draft_answers(draft, version, len(questions))
+
+    # В состоянии только ссылка на опрос и прогресс: вопросы берутся
+    # из общего кеша опросов, а не копируются в сессию каждого пользователя
+    await state.set_data({
         "survey_id": survey_id,
-        "survey_title": survey_data.get("title", f"Опрос #{survey_id}"),
-        "questions": questions,
-        "current_question": 0,
-        "answers": []
+        "version": version,
+        "cursor": len(answers),
+        "answers": answers,
     })
 
-    # Начинаем опрос
     await state.set_state(SurveyStates.answering_question)
+    current = len(answers)
+    intro = (
+        f"Продолжаем анкету: {title}" if answers
+        else f"Начинаем анкету: {title}"
+    )
     await message.answer(
-        f"Начинаем анкету: {survey_data.get('title', f'№{survey_id}')}\n\n"
-        f"Вопрос 1 из {len(questions)}:\n{questions[0]}"
+        f"{intro}\n\n"
+        f"{format_question(current, len(questions), questions[current])}",
+        reply_markup=question_keyboard(current, questions[current]),
     )
 
 
+def draft_answers(draft, version, question_count) -> list:
+    """Ответы из черновика, если по нему можно продолжить анкету.
+
+    Черновик действителен, только пока вопросы не менялись (та же
+    версия) и анкета не пройдена до конца; черновик другой версии или
+    повреждённый отбрасывается — анкета начинается заново.
+    """
+    if not isinstance(draft, dict) or draft.get("version") != version:
+        return []
+    answers = draft.get("answers")
+    if not isinstance(answers, list) or not all(
+        isinstance(answer, str) for answer in answers
+    ):
+        return []
+    if not 0 < len(answers) < question_count:
+        return []
+    return answers
+
+
+async def restart_survey(message, state, text, edit=False) -> None:
+    """Сбрасывает прогресс: продолжить анкету нельзя."""
+    await state.set_data({})
+    await state.set_state(OperationStates.awaiting_number)
+    await reply(message, text, edit=edit)
+
+
+async def load_progress(message: Message, state: FSMContext, edit=False):
+    """Прогресс из состояния и опрос из кеша; None, если продолжать нельзя
+    (пользователю уже отправлено объяснение)."""
+    data = await state.get_data()
+    survey_id = data.get("survey_id")
+    answers = data.get("answers")
+    if (
+        survey_id is None
+        or not isinstance(answers, list)
+        or data.get("cursor") != len(answers)
+    ):
+        # Состояние от прежней версии бота или повреждено
+        await restart_survey(
+            message, state,
+            "Не удалось продолжить анкету. Введите её номер ещё раз.",
+            edit=edit,
+        )
+        return None
+    survey_data = await get_survey(survey_id)
+    if not survey_data:
+        await message.answer(
+            "Не удалось загрузить анкету. Попробуйте ответить ещё раз позже."
+        )
+        return None
+    if (
+        survey_version(survey_data) != data.get("version")
+        or len(answers) >= len(survey_data.get("questions") or [])
+    ):
+        # Вопросы поменялись посреди прохождения — ответы уже не
+        # соответствуют им, начинаем анкету заново
+        await restart_survey(
+            message, state,
+            "Анкета изменилась, пока вы её проходили. "
+            f"Введите номер {survey_id} ещё раз, чтобы начать заново.",
+            edit=edit,
+        )
+        return None
+    return data, survey_data
+
+
 @operations_router.message(SurveyStates.answering_question, F.text.len() > 0)
 async def receive_answer(message: Message, state: FSMContext) -> None:
     text = (message.text or "").strip()
@@ -102,70 +223,230 @@ async def receive_answer(message: Message, state: FSMContext) -> None:
         await message.answer("Ответ не может быть пустым. Пожалуйста, ответьте на вопрос.")
         return
 
-    # Получаем данные анкеты из состояния
-    data = await state.get_data()
+    progress = await load_progress(message, state)
+    if progress is None:
+        return
+    data, survey_data = progress
+    question = survey_data["questions"][data["cursor"]]
+
+    if question_options(question):
+        # На вопрос с вариантами можно ответить и текстом варианта
+        option = match_option(question, text)
+        if option is None or question_type(question) == MULTIPLE:
+            await message.answer(
+                "Выберите вариант кнопками под вопросом.",
+                reply_markup=question_keyboard(
+                    data["cursor"], question, data.get("selected", ())
+                ),
+            )
+            return
+        text = answer_value(question, [option])
+
+    await accept_answer(
+        message, state, data, survey_data, text, message.from_user
+    )
+
+
+async def check_callback(
+    callback: CallbackQuery, state: FSMContext, question_index: int
+):
+    """Прогресс для нажатой кнопки; None, если кнопка от уже пройденного
+    вопроса или сообщение недоступно."""
+    if not isinstance(callback.message, Message):
+        await callback.answer()
+        return None
+    progress = await load_progress(callback.message, state, edit=True)
+    if progress is None:
+        await callback.answer()
+        return None
+    data, _ = progress
+    if data["cursor"] != question_index:
+        await callback.answer("Этот вопрос уже пройден.")
+        return None
+    return progress
+
+
+@operations_router.callback_query(
+    SurveyStates.answering_question, AnswerCallback.filter()
+)
+async def receive_choice(
+    callback: CallbackQuery, callback_data: AnswerCallback, state: FSMContext
+) -> None:
+    progress = await check_callback(callback, state, callback_data.q)
+    if progress is None:
+        return
+    data, survey_data = progress
+    question = survey_data["questions"][data["cursor"]]
+    value = answer_value(question, [callback_data.o])
+    if not value:
+        await callback.answer()
+        return
+
+    await callback.answer()
+    await accept_answer(
+        callback.message, state, data, survey_data, value, callback.from_user,
+        edit=True,
+    )
+
+
+@operations_router.callback_query(
+    SurveyStates.answering_question, ToggleCallback.filter()
+)
+async def toggle_choice(
+    callback: CallbackQuery, callback_data: ToggleCallback, state: FSMContext
+) -> None:
+    progress = await check_callback(callback, state, callback_data.q)
+    if progress is None:
+        return
+    data, survey_data = progress
+    question = survey_data["questions"][data["cursor"]]
+
+    selected = set(data.get("selected", ()))
+    selected ^= {callback_data.o}
+    data["selected"] = sorted(selected)
+    await state.set_data(data)
+
+    await callback.answer()
+    # Меняется только клавиатура, текст вопроса остаётся
+    try:
+        await callback.message.edit_reply_markup(
+            reply_markup=question_keyboard(data["cursor"], question, selected)
+        )
+    except TelegramBadRequest as e:
+        logger.info("Не удалось изменить клавиатуру: %s", e)
+
+
+@operations_router.callback_query(
+    SurveyStates.answering_question, DoneCallback.filter()
+)
+async def finish_choice(
+    callback: CallbackQuery, callback_data: DoneCallback, state: FSMContext
+) -> None:
+    progress = await check_callback(callback, state, callback_data.q)
+    if progress is None:
+        return
+    data, survey_data = progress
+    question = survey_data["questions"][data["cursor"]]
+    value = answer_value(question, data.get("selected", ()))
+    if not value:
+        await callback.answer("Отметьте хотя бы один вариант.")
+        return
+
+    await callback.answer()
+    await accept_answer(
+        callback.message, state, data, survey_data, value, callback.from_user,
+        edit=True,
+    )
+
+
+@operations_router.callback_query(
+    or_f(AnswerCallback.filter(), ToggleCallback.filter(),
+         DoneCallback.filter())
+)
+async def stale_callback(callback: CallbackQuery) -> None:
+    # Кнопки из завершённой или прерванной анкеты
+    await callback.answer("Эта анкета уже не активна.")
+
+
+async def accept_answer(
+    message: Message,
+    state: FSMContext,
+    data: dict,
+    survey_data: dict,
+    value: str,
+    from_user,
+    edit: bool = False,
+) -> None:
+    """Записывает ответ на текущий вопрос и задаёт следующий."""
     survey_id = data["survey_id"]
-    questions = data["questions"]
-    current_question = data["current_question"]
+    questions = survey_data["questions"]
+    current_question = data["cursor"]
     answers = data["answers"]
 
     # Добавляем ответ
-    answers.append(text)
+    answers.append(value)
+    data.pop("selected", None)
 
     # Проверяем, есть ли ещё вопросы
     if current_question + 1 < len(questions):
-        # Переходим к следующему вопросу
+        # Переходим к следующему вопросу. Данные уже прочитаны —
+        # записываем их целиком, без повторного чтения в update_data
         next_question = current_question + 1
-        await state.update_data({
-            "current_question": next_question,
-            "answers": answers
-        })
-
-        await message.answer(
-            f"Вопрос {next_question + 1} из {len(questions)}:\n"
-            f"{questions[next_question]}"
+        data["cursor"] = next_question
+        await state.set_data(data)
+        if from_user:
+            checkpoint_draft(
+                survey_id, from_user.id, from_user.username,
+                answers, data["version"],
+            )
+
+        await reply(
+            message,
+            format_question(next_question, len(questions),
+                            questions[next_question]),
+            reply_markup=question_keyboard(
+                next_question, questions[next_question]
+            ),
+            edit=edit,
         )
     else:
         # Анкета завершена
-        await finish_survey(message, state, survey_id, answers)
+        await finish_survey(
+            message, state, survey_id, answers, from_user, edit=edit
+        )
 
 
 async def finish_survey(
-    message: Message, state: FSMContext, survey_id: int, answers: list
+    message: Message,
+    state: FSMContext,
+    survey_id: int,
+    answers: list,
+    from_user,
+    edit: bool = False,
 ) -> None:
     """Завершение анкеты и отправка результатов на бекенд"""
 
-    from_user = message.from_user
     if not from_user:
         await message.answer("Ошибка: не удалось определить пользователя.")
         await state.set_state(OperationStates.awaiting_number)
         return
 
-    # Получаем данные пользователя из API
-    user_data = await get_user_by_username(from_user.username)
-    if not user_data:
-        await message.answer(
-            "Ошибка: пользователь не найден в системе. "
-            "Обратитесь к администратору."
+    # Ответы незарегистрированного бэкенд отклонит (403): отправляем на
+    # регистрацию, черновик остаётся — после неё анкету можно продолжить
+    if not await get_user_by_username(from_user.username):
+        await reply(
+            message,
+            "Чтобы отправить ответы, сначала зарегистрируйтесь — "
+            "отправьте /start, затем снова введите номер анкеты.",
+            edit=edit,
         )
+        await state.set_data({})
         await state.set_state(OperationStates.awaiting_number)
         return
 
-    # Отправляем ответы на бекенд через API
-    result = await submit_survey_response(survey_id, user_data, answers)
+    # Отложенный черновик больше не нужен: бэкенд удалит сохранённый
+    # вместе с записью ответа
+    await discard_draft(survey_id, from_user.id)
+
+    # Отправляем ответы на бекенд одним запросом: пользователя бэкенд
+    # найдёт сам по Telegram id
+    result = await submit_survey_response(
+        survey_id, from_user.id, from_user.username, answers
+    )
 
     if result:
-        await message.answer(
+        text = (
             "✅ Анкета успешно завершена и отправлена!"
             "\n\nВведите номер новой анкеты или /start"
         )
     else:
-        await message.answer(
+        text = (
             "⚠️ Анкета завершена, но не удалось отправить ответы на сервер. "
             "Попробуйте позже или обратитесь к администратору.\n\n"
             "Введите номер новой анкеты или /start"
         )
+    await reply(message, text, edit=edit)
 
-    # Возвращаемся в начальное состояние
+    # Возвращаемся в начальное состояние; прогресс анкеты больше не нужен
+    await state.set_data({})
     await state.set_state(OperationStates.awaiting_number)
-
@@ -1,14 +1,18 @@
+from typing import Optional
+
 from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import Message
+from aiogram.types import CallbackQuery, Message, User
 
+from keyboards import GenderCallback, gender_keyboard
 from services import create_user, get_user_by_username
 from .operations import OperationStates
 
 
-registration_router = Router()
+registration_router = Router(name="registration")
 
 
 class RegistrationStates(StatesGroup):
@@ -90,9 +94,7 @@ async def receive_age(message: Message, state: FSMContext) -> None:
     await state.update_data(age=age)
     await state.set_state(RegistrationStates.asking_gender)
     await message.answer(
-        "Отлично! Теперь выберите пол:\n"
-        "M - Мужской\n"
-        "F - Женский"
+        "Отлично! Теперь выберите пол:", reply_markup=gender_keyboard()
     )
 
 
@@ -107,13 +109,36 @@ async def receive_gender(message: Message, state: FSMContext) -> None:
         gender = "F"
     else:
         await message.answer(
-            "Пожалуйста, выберите один из вариантов:\n"
-            "M - Мужской\n"
-            "F - Женский"
+            "Пожалуйста, выберите один из вариантов:",
+            reply_markup=gender_keyboard(),
         )
         return
 
-    from_user = message.from_user
+    await complete_registration(message, state, message.from_user, gender)
+
+
+@registration_router.callback_query(
+    RegistrationStates.asking_gender, GenderCallback.filter(F.value.in_({"M", "F"}))
+)
+async def choose_gender(
+    callback: CallbackQuery, callback_data: GenderCallback, state: FSMContext
+) -> None:
+    await callback.answer()
+    if not isinstance(callback.message, Message):
+        return
+    # Убираем кнопки, чтобы пол не выбрали повторно
+    try:
+        await callback.message.edit_reply_markup(reply_markup=None)
+    except TelegramBadRequest:
+        pass
+    await complete_registration(
+        callback.message, state, callback.from_user, callback_data.value
+    )
+
+
+async def complete_registration(
+    message: Message, state: FSMContext, from_user: Optional[User], gender: str
+) -> None:
     if from_user is None:
         await message.answer(
             "Не удалось завершить регистрацию: нет данных пользователя."
@@ -130,6 +155,7 @@ async def receive_gender(message: Message, state: FSMContext) -> None:
         surname=data.get("last_name", ""),
         age=data.get("age", 0),
         gender=gender,
+        telegram_id=from_user.id,
     )
 
     if created:
@@ -0,0 +1,162 @@
+"""Типы вопросов и inline-клавиатуры для них.
+
+Вопрос опроса — строка (свободный ответ) или объект с полями text, type
+(text | single | multiple | scale), options, min, max; формат описан
+в backend/surveys/questions.py. Варианты ответа отправляются
+inline-кнопками, в callback_data — только номера вопроса и варианта
+(«a:3:1»), а не текст, так что данные укладываются в лимит Telegram
+в 64 байта при любой длине вариантов.
+"""
+from typing import Iterable, List, Optional
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+
+TEXT = "text"
+SINGLE = "single"
+MULTIPLE = "multiple"
+SCALE = "scale"
+
+# Совпадает с MULTIPLE_SEPARATOR бэкенда
+MULTIPLE_SEPARATOR = "; "
+
+
+class AnswerCallback(CallbackData, prefix="a"):
+    """Выбор варианта в вопросах single и scale."""
+    q: int
+    o: int
+
+
+class ToggleCallback(CallbackData, prefix="t"):
+    """Отметка варианта в вопросе multiple."""
+    q: int
+    o: int
+
+
+class DoneCallback(CallbackData, prefix="d"):
+    """Завершение выбора в вопросе multiple."""
+    q: int
+
+
+class GenderCallback(CallbackData, prefix="g"):
+    value: str
+
+
+class StartSurveyCallback(CallbackData, prefix="s"):
+    """Кнопка «Пройти опрос» в сообщении рассылки."""
+    survey_id: int
+
+
+def question_text(question) -> str:
+    if isinstance(question, dict):
+        return str(question.get("text") or "")
+    return str(question)
+
+
+def question_type(question) -> str:
+    if isinstance(question, dict):
+        return question.get("type") or TEXT
+    return TEXT
+
+
+def question_options(question) -> List[str]:
+    """Варианты ответа; для шкалы — её значения, для текста — пусто."""
+    kind = question_type(question)
+    if kind in (SINGLE, MULTIPLE):
+        return [str(option) for option in question.get("options") or []]
+    if kind == SCALE:
+        low, high = question.get("min", 1), question.get("max", 5)
+        if not isinstance(low, int) or not isinstance(high, int):
+            return []
+        return [str(value) for value in range(low, high + 1)]
+    return []
+
+
+def format_question(index: int, total: int, question) -> str:
+    text = f"Вопрос {index + 1} из {total}:\n{question_text(question)}"
+    if question_type(question) == MULTIPLE:
+        text += "\n\nОтметьте варианты и нажмите «Готово»."
+    return text
+
+
+def question_keyboard(
+    index: int, question, selected: Iterable[int] = ()
+) -> Optional[InlineKeyboardMarkup]:
+    """Клавиатура вопроса; None для вопроса со свободным ответом."""
+    kind = question_type(question)
+    options = question_options(question)
+    if not options:
+        return None
+
+    if kind == SCALE:
+        # Шкала — одной строкой кнопок
+        return InlineKeyboardMarkup(inline_keyboard=[[
+            InlineKeyboardButton(
+                text=option,
+                callback_data=AnswerCallback(q=index, o=i).pack(),
+            )
+            for i, option in enumerate(options)
+        ]])
+
+    if kind == SINGLE:
+        return InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(
+                text=option,
+                callback_data=AnswerCallback(q=index, o=i).pack(),
+            )]
+            for i, option in enumerate(options)
+        ])
+
+    selected = set(selected)
+    rows = [
+        [InlineKeyboardButton(
+            text=f"✅ {option}" if i in selected else option,
+            callback_data=ToggleCallback(q=index, o=i).pack(),
+        )]
+        for i, option in enumerate(options)
+    ]
+    rows.append([InlineKeyboardButton(
+        text="Готово", callback_data=DoneCallback(q=index).pack()
+    )])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def answer_value(question, option_indexes: Iterable[int]) -> str:
+    """Ответ для хранения: текст варианта или варианты через разделитель
+    в порядке списка — одинаковый выбор даёт одинаковую строку."""
+    options = question_options(question)
+    return MULTIPLE_SEPARATOR.join(
+        options[i] for i in sorted(set(option_indexes))
+        if 0 <= i < len(options)
+    )
+
+
+def match_option(question, text: str) -> Optional[int]:
+    """Номер варианта, совпадающего с введённым текстом (без учёта
+    регистра), — ответ текстом на вопрос single или scale."""
+    text = text.strip().casefold()
+    for i, option in enumerate(question_options(question)):
+        if option.strip().casefold() == text:
+            return i
+    return None
+
+
+def gender_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(
+            text="Мужской", callback_data=GenderCallback(value="M").pack()
+        ),
+        InlineKeyboardButton(
+            text="Женский", callback_data=GenderCallback(value="F").pack()
+        ),
+    ]])
+
+
+def invitation_keyboard(survey_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(
+            text="Пройти опрос",
+            callback_data=StartSurveyCallback(survey_id=survey_id).pack(),
+        )
+    ]])
@@ -0,0 +1,257 @@
+"""Нагрузочный прогон бота: N одновременных пользователей проходят
+регистрацию и анкету через настоящие обработчики из handlers/.
+
+Telegram не нужен: сообщения — объекты aiogram Message, привязанные к Bot
+с фиктивной сессией, которая отвечает на sendMessage без сети. Запросы
+к бэкенду идут по-настоящему — на USER_SERVICE_BASE_URL.
+
+Пример (бэкенд на SQLite):
+
+    cd backend && DB_ENGINE=sqlite python manage.py migrate
+    DB_ENGINE=sqlite uvicorn backend.asgi:application --port 8000
+    cd bot && python loadtest.py --base-url http://localhost:8000 \\
+        --survey-id 1 --users 500 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+
+PHASES = ("start", "register", "lookup", "survey", "answer", "submit")
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * q), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument(
+        "--survey-id", type=int, required=True,
+        help="ID существующего опроса на бэкенде"
+    )
+    parser.add_argument("--users", type=int, default=200,
+                        help="Сколько пользователей смоделировать")
+    parser.add_argument("--concurrency", type=int, default=50,
+                        help="Сколько пользователей активны одновременно")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Отключить кеши пользователей и опросов")
+    parser.add_argument("--outbox", action="store_true",
+                        help="Отправлять ответы через outbox")
+    return parser.parse_args()
+
+
+def configure_env(args):
+    # Настройки читаются при импорте services, поэтому задаются заранее
+    os.environ["USER_SERVICE_BASE_URL"] = args.base_url
+    os.environ["OUTBOX_ENABLED"] = "true" if args.outbox else "false"
+    if args.outbox:
+        os.environ.setdefault("OUTBOX_PATH", "loadtest_outbox.sqlite3")
+    if args.no_cache:
+        os.environ["USER_CACHE_MAXSIZE"] = "0"
+        os.environ["SURVEY_CACHE_MAXSIZE"] = "0"
+
+
+async def run(args):
+    from aiogram import Bot
+    from aiogram.client.session.base import BaseSession
+    from aiogram.fsm.context import FSMContext
+    from aiogram.fsm.storage.base import StorageKey
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from aiogram.methods import SendMessage
+    from aiogram.types import CallbackQuery, Chat, Message, User
+
+    import services
+    from handlers import operations, registration
+    from keyboards import (
+        MULTIPLE,
+        DoneCallback,
+        ToggleCallback,
+        question_options,
+        question_type,
+    )
+
+    class FakeSession(BaseSession):
+        """Сессия без сети: на sendMessage возвращает «отправленное» сообщение."""
+
+        def __init__(self):
+            super().__init__()
+            self.sent = 0
+
+        async def make_request(self, bot, method, timeout=None):
+            self.sent += 1
+            if isinstance(method, SendMessage):
+                return Message(
+                    message_id=self.sent,
+                    date=datetime.now(),
+                    chat=Chat(id=method.chat_id, type="private"),
+                    text=method.text,
+                )
+            return True
+
+        async def stream_content(self, *args, **kwargs):
+            yield b""
+
+        async def close(self):
+            pass
+
+    session = FakeSession()
+    bot = Bot("42:LOADTEST", session=session)
+    storage = MemoryStorage()
+    run_id = uuid.uuid4().hex[:6]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    message_ids = iter(range(1, 10 ** 9))
+
+    def make_message(tg_user, text):
+        return Message(
+            message_id=next(message_ids),
+            date=datetime.now(),
+            chat=Chat(id=tg_user.id, type="private"),
+            from_user=tg_user,
+            text=text,
+        ).as_(bot)
+
+    async def step(phase, handler, tg_user, state, text):
+        started = time.perf_counter()
+        try:
+            await handler(make_message(tg_user, text), state)
+        except Exception:  # noqa: BLE001
+            errors[phase] += 1
+        latencies[phase].append((time.perf_counter() - started) * 1000)
+
+    def make_callback(tg_user, callback_data):
+        return CallbackQuery(
+            id=str(next(message_ids)),
+            from_user=tg_user,
+            chat_instance=str(tg_user.id),
+            message=make_message(tg_user, "вопрос"),
+            data=callback_data.pack(),
+        ).as_(bot)
+
+    async def callback_step(phase, handler, tg_user, state, callback_data):
+        started = time.perf_counter()
+        try:
+            await handler(
+                make_callback(tg_user, callback_data), callback_data, state
+            )
+        except Exception:  # noqa: BLE001
+            errors[phase] += 1
+        latencies[phase].append((time.perf_counter() - started) * 1000)
+
+    async def answer(phase, tg_user, state, index, question):
+        """Ответ, который бот примет: первый вариант для вопросов
+        с вариантами (multiple — отметка и «Готово»), текст — для прочих."""
+        options = question_options(question)
+        if question_type(question) == MULTIPLE:
+            await operations.toggle_choice(
+                make_callback(tg_user, ToggleCallback(q=index, o=0)),
+                ToggleCallback(q=index, o=0), state,
+            )
+            await callback_step(
+                phase, operations.finish_choice, tg_user, state,
+                DoneCallback(q=index),
+            )
+            return
+        text = options[0] if options else "ответ"
+        await step(phase, operations.receive_answer, tg_user, state, text)
+
+    async def simulate_user(i):
+        tg_user = User(
+            id=10 ** 9 + i, is_bot=False, first_name="Load",
+            username=f"load_{run_id}_{i}",
+        )
+        state = FSMContext(
+            storage=storage,
+            key=StorageKey(bot_id=bot.id, chat_id=tg_user.id, user_id=tg_user.id),
+        )
+
+        await step("start", registration.cmd_start, tg_user, state, "/start")
+        await registration.receive_first_name(
+            make_message(tg_user, "Нагрузка"), state
+        )
+        await registration.receive_last_name(
+            make_message(tg_user, "Тестовая"), state
+        )
+        await registration.receive_age(make_message(tg_user, "30"), state)
+        await step("register", registration.receive_gender, tg_user, state, "M")
+        await step("lookup", registration.cmd_start, tg_user, state, "/start")
+        await step(
+            "survey", operations.receive_number, tg_user, state,
+            str(args.survey_id)
+        )
+
+        # Отвечаем, пока бот не вернёт пользователя к вводу номера анкеты
+        for _ in range(1000):
+            current = await state.get_state()
+            if current != operations.SurveyStates.answering_question.state:
+                break
+            data = await state.get_data()
+            survey = await services.get_survey(args.survey_id)
+            index = data["cursor"]
+            questions_left = len(survey["questions"]) - index
+            phase = "submit" if questions_left <= 1 else "answer"
+            await answer(
+                phase, tg_user, state, index, survey["questions"][index]
+            )
+
+    await services.init_http_client()
+    await services.start_outbox()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            await simulate_user(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited(i) for i in range(args.users)))
+    elapsed = time.perf_counter() - started
+
+    await services.stop_outbox()
+    await services.close_http_client()
+
+    total_calls = sum(len(values) for values in latencies.values())
+    print(
+        f"users={args.users} concurrency={args.concurrency} "
+        f"elapsed={elapsed:.2f}s flows/s={args.users / elapsed:.1f} "
+        f"handler calls/s={total_calls / elapsed:.1f} "
+        f"telegram calls={session.sent}"
+    )
+    print(
+        f"{'phase':<10}{'calls':>8}{'errors':>8}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for phase in PHASES:
+        values = sorted(latencies[phase])
+        if not values:
+            continue
+        print(
+            f"{phase:<10}{len(values):>8}{errors[phase]:>8}"
+            f"{statistics.median(values):>10.1f}"
+            f"{percentile(values, 0.95):>10.1f}"
+            f"{percentile(values, 0.99):>10.1f}"
+        )
+    print(
+        "cache:",
+        "users", services.get_user_cache_stats(),
+        "surveys", services.get_survey_cache_stats(),
+    )
+
+
+def main():
+    args = parse_args()
+    configure_env(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
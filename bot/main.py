@@ -4,29 +4,184 @@ import logging
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums.parse_mode import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
-from config import get_bot_token
+from config import (
+    get_bot_run_mode,
+    get_bot_token,
+    get_max_concurrent_updates,
+    get_metrics_enabled,
+    get_metrics_port,
+    get_send_chat_burst,
+    get_send_chat_rate,
+    get_send_global_rate,
+    get_send_group_per_minute,
+    get_send_max_retries,
+    get_throttle_global_burst,
+    get_throttle_global_max_wait,
+    get_throttle_global_rate,
+    get_throttle_user_burst,
+    get_throttle_user_rate,
+    get_webapp_host,
+    get_webapp_port,
+    get_webhook_base_url,
+    get_webhook_max_connections,
+    get_webhook_path,
+    get_webhook_secret,
+)
 from handlers import operations_router, registration_router
+from metrics import (
+    HandlerMetricsMiddleware,
+    InstrumentedStorage,
+    metrics_handler,
+    start_metrics_server,
+)
+from middlewares import (
+    ConcurrencyLimitMiddleware,
+    SendRateLimitMiddleware,
+    ThrottlingMiddleware,
+)
+from ratelimit import create_rate_limiter
+from services import (
+    close_http_client,
+    init_http_client,
+    start_broadcasts,
+    start_drafts,
+    start_outbox,
+    start_submit_batching,
+    stop_broadcasts,
+    stop_drafts,
+    stop_outbox,
+    stop_submit_batching,
+)
+from storage import create_events_isolation, create_storage
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def build_dispatcher() -> Dispatcher:
+    storage = create_storage()
+    if get_metrics_enabled():
+        storage = InstrumentedStorage(storage)
+    dp = Dispatcher(
+        storage=storage,
+        events_isolation=create_events_isolation(storage),
+    )
+
+    # Флуд отсекается раньше, чем апдейт займёт слот обработки
+    limiter = create_rate_limiter(storage)
+    dp["rate_limiter"] = limiter
+    dp.update.outer_middleware(ThrottlingMiddleware(
+        limiter,
+        user_rate=get_throttle_user_rate(),
+        user_burst=get_throttle_user_burst(),
+        global_rate=get_throttle_global_rate(),
+        global_burst=get_throttle_global_burst(),
+        global_max_wait=get_throttle_global_max_wait(),
+    ))
+
+    limit = get_max_concurrent_updates()
+    if limit > 0:
+        dp.update.outer_middleware(ConcurrencyLimitMiddleware(limit))
+
+    if get_metrics_enabled():
+        # Inner middleware диспетчера наследуется всеми роутерами
+        dp.message.middleware(HandlerMetricsMiddleware())
+        dp.callback_query.middleware(HandlerMetricsMiddleware())
+
+    dp.include_router(registration_router)
+    dp.include_router(operations_router)
+
+    dp.startup.register(init_http_client)
+    dp.startup.register(start_submit_batching)
+    dp.startup.register(start_outbox)
+    dp.startup.register(start_drafts)
+    dp.startup.register(start_broadcasts)
+    # Обработчики shutdown вызываются в порядке регистрации
+    dp.shutdown.register(stop_broadcasts)
+    dp.shutdown.register(stop_drafts)
+    dp.shutdown.register(stop_outbox)
+    dp.shutdown.register(stop_submit_batching)
+    dp.shutdown.register(close_http_client)
+    return dp
+
+
+async def run_polling(bot: Bot, dp: Dispatcher) -> None:
+    # Вебхук и long polling взаимоисключающие
+    await bot.delete_webhook()
+    metrics_runner = None
+    if get_metrics_enabled():
+        metrics_runner = await start_metrics_server(
+            get_webapp_host(), get_metrics_port()
+        )
+    logger.info("Бот запущен (long polling)")
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher) -> None:
+    path = get_webhook_path()
+    secret = get_webhook_secret()
+    webhook_url = f"{get_webhook_base_url().rstrip('/')}{path}"
+
+    app = web.Application()
+    app.router.add_get("/health", health)
+    if get_metrics_enabled():
+        app.router.add_get("/metrics", metrics_handler)
+    SimpleRequestHandler(
+        dispatcher=dp, bot=bot, secret_token=secret
+    ).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=get_webapp_host(), port=get_webapp_port())
+    await site.start()
+    try:
+        # Все реплики регистрируют один и тот же URL — вызов идемпотентен
+        await bot.set_webhook(
+            webhook_url,
+            secret_token=secret,
+            max_connections=get_webhook_max_connections(),
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        logger.info("Бот запущен (webhook %s)", webhook_url)
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
 async def main() -> None:
     token = get_bot_token()
     bot = Bot(
         token=token,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher(storage=MemoryStorage())
-
-    dp.include_router(registration_router)
-    dp.include_router(operations_router)
+    dp = build_dispatcher()
+    # Исходящие лимиты Telegram для всех запросов бота
+    bot.session.middleware(SendRateLimitMiddleware(
+        dp["rate_limiter"],
+        global_rate=get_send_global_rate(),
+        chat_rate=get_send_chat_rate(),
+        chat_burst=get_send_chat_burst(),
+        group_per_minute=get_send_group_per_minute(),
+        max_retries=get_send_max_retries(),
+    ))
 
-    logger.info("Бот запущен")
-    await dp.start_polling(bot)
+    if get_bot_run_mode() == "webhook":
+        await run_webhook(bot, dp)
+    else:
+        await run_polling(bot, dp)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,208 @@
+"""Метрики бота в формате Prometheus.
+
+Время обработчиков (по роутеру и состоянию FSM), время запросов к
+бэкенду (по функции services.py), время операций FSM-хранилища, ошибки,
+отброшенные флуд-контролем апдейты, сообщения рассылок и попадания
+в кеши. Отдаются на /metrics: в режиме webhook — тем же
+aiohttp-приложением, в режиме polling — отдельным HTTP-сервером
+на METRICS_PORT.
+"""
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.types import TelegramObject
+from aiohttp import web
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+
+# Бакеты под обработчики и запросы к бэкенду внутри одной сети
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0,
+)
+
+HANDLER_LATENCY = Histogram(
+    "bot_handler_seconds",
+    "Время обработчика апдейта",
+    ["router", "state"],
+    buckets=LATENCY_BUCKETS,
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total",
+    "Необработанные исключения в обработчиках",
+    ["router", "state", "error"],
+)
+HTTP_LATENCY = Histogram(
+    "bot_backend_request_seconds",
+    "Время HTTP-запроса к бэкенду и внешним API",
+    ["function"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_ERRORS = Counter(
+    "bot_backend_request_errors_total",
+    "Неудачные HTTP-запросы (сетевые ошибки и ответы 4xx/5xx)",
+    ["function"],
+)
+STORAGE_LATENCY = Histogram(
+    "bot_fsm_storage_seconds",
+    "Время операции FSM-хранилища",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+THROTTLED_UPDATES = Counter(
+    "bot_throttled_updates_total",
+    "Апдейты, отброшенные флуд-контролем",
+    ["scope"],
+)
+
+BROADCAST_MESSAGES = Counter(
+    "bot_broadcast_messages_total",
+    "Сообщения рассылок по результату (sent, blocked, failed)",
+    ["result"],
+)
+
+
+def _state_label(state) -> str:
+    return state or "none"
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Время и ошибки обработчиков.
+
+    Регистрируется inner-middleware на наблюдателях диспетчера и
+    наследуется вложенными роутерами, поэтому вызывается только для
+    апдейтов, нашедших обработчик.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        router = data.get("event_router")
+        router_name = router.name if router is not None else "unknown"
+        state = _state_label(data.get("raw_state"))
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.labels(router_name, state, type(e).__name__).inc()
+            raise
+        finally:
+            HANDLER_LATENCY.labels(router_name, state).observe(
+                time.perf_counter() - started
+            )
+
+
+@contextmanager
+def track_request(function: str):
+    """Замер HTTP-запроса: with track_request("get_survey"): ...
+
+    Исключение внутри блока считается ошибкой и пробрасывается дальше.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        HTTP_ERRORS.labels(function).inc()
+        raise
+    finally:
+        HTTP_LATENCY.labels(function).observe(time.perf_counter() - started)
+
+
+class InstrumentedStorage(BaseStorage):
+    """Обёртка FSM-хранилища, замеряющая время каждой операции.
+
+    Остальные атрибуты (redis, create_isolation) берутся у исходного
+    хранилища.
+    """
+
+    def __init__(self, storage: BaseStorage) -> None:
+        self.storage = storage
+
+    def __getattr__(self, name):
+        if name == "storage":
+            raise AttributeError(name)
+        return getattr(self.storage, name)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        with STORAGE_LATENCY.labels("set_state").time():
+            await self.storage.set_state(key, state)
+
+    async def get_state(self, key: StorageKey):
+        with STORAGE_LATENCY.labels("get_state").time():
+            return await self.storage.get_state(key)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        with STORAGE_LATENCY.labels("set_data").time():
+            await self.storage.set_data(key, data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        with STORAGE_LATENCY.labels("get_data").time():
+            return await self.storage.get_data(key)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+
+class CacheCollector:
+    """Счётчики кешей TTLCache, читаются в момент опроса /metrics.
+
+    Кеши уже считают попадания сами, поэтому горячий путь не платит
+    за метрики ничего.
+    """
+
+    def __init__(self) -> None:
+        self._caches = {}
+
+    def add(self, name: str, cache) -> None:
+        self._caches[name] = cache
+
+    def collect(self):
+        requests = CounterMetricFamily(
+            "bot_cache_requests",
+            "Обращения к кешам в памяти процесса",
+            labels=["cache", "result"],
+        )
+        size = GaugeMetricFamily(
+            "bot_cache_size", "Число записей в кеше", labels=["cache"]
+        )
+        for name, cache in self._caches.items():
+            stats = cache.stats()
+            requests.add_metric([name, "hit"], stats["hits"])
+            requests.add_metric([name, "miss"], stats["misses"])
+            size.add_metric([name], stats["size"])
+        yield requests
+        yield size
+
+
+caches = CacheCollector()
+REGISTRY.register(caches)
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(
+        body=generate_latest(REGISTRY),
+        headers={"Content-Type": CONTENT_TYPE_LATEST},
+    )
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Отдельный HTTP-сервер с /metrics (режим polling)."""
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    return runner
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import CallbackQuery, TelegramObject, Update
+
+from metrics import THROTTLED_UPDATES
+from ratelimit import wait_for_token
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """Ограничивает число одновременно обрабатываемых апдейтов.
+
+    Лишние апдейты ждут своей очереди, а не перегружают бэкенд
+    и FSM-хранилище.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        async with self._semaphore:
+            return await handler(event, data)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Защита от флуда входящими апдейтами (outer middleware на update).
+
+    У каждого пользователя своё ведро токенов: апдейты сверх лимита
+    отбрасываются до обработчиков и FSM, а пользователь не чаще раза
+    в warn_interval секунд получает предупреждение. Общее ведро бота
+    не отбрасывает апдейты сразу, а придерживает их до max_wait секунд.
+    Отброшенное нажатие кнопки всё равно подтверждается (answer), иначе
+    клиент Telegram крутит на кнопке индикатор загрузки до таймаута.
+    """
+
+    WARNING_TEXT = "Слишком много сообщений подряд. Подождите немного."
+    CALLBACK_WARNING_TEXT = "Слишком быстро, подождите немного."
+
+    def __init__(
+        self,
+        limiter,
+        user_rate: float,
+        user_burst: int,
+        global_rate: float,
+        global_burst: int,
+        global_max_wait: float,
+        warn_interval: float = 10.0,
+    ) -> None:
+        self.limiter = limiter
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.global_max_wait = global_max_wait
+        self.warn_interval = warn_interval
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None and self.user_rate > 0:
+            delay = await self.limiter.hit(
+                f"user:{user.id}", self.user_rate, self.user_burst
+            )
+            if delay > 0:
+                THROTTLED_UPDATES.labels("user").inc()
+                callback = self._callback_query(event)
+                if callback is not None:
+                    # Всплывающая подсказка вместо сообщения в чат
+                    await self._answer_callback(
+                        callback, self.CALLBACK_WARNING_TEXT
+                    )
+                else:
+                    await self._warn(user.id, data)
+                return None
+
+        if self.global_rate > 0 and not await wait_for_token(
+            self.limiter, "global", self.global_rate, self.global_burst,
+            max_wait=self.global_max_wait,
+        ):
+            THROTTLED_UPDATES.labels("global").inc()
+            logger.warning("Общий лимит апдейтов превышен, апдейт отброшен")
+            callback = self._callback_query(event)
+            if callback is not None:
+                await self._answer_callback(callback)
+            return None
+
+        return await handler(event, data)
+
+    @staticmethod
+    def _callback_query(event: TelegramObject):
+        if isinstance(event, CallbackQuery):
+            return event
+        if isinstance(event, Update):
+            return event.callback_query
+        return None
+
+    @staticmethod
+    async def _answer_callback(callback: CallbackQuery, text=None) -> None:
+        try:
+            await callback.answer(text)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Не удалось ответить на нажатие кнопки: %s", e)
+
+    async def _warn(self, user_id: int, data: Dict[str, Any]) -> None:
+        chat = data.get("event_chat")
+        bot = data.get("bot")
+        if chat is None or bot is None:
+            return
+        delay = await self.limiter.hit(
+            f"warn:{user_id}", 1 / self.warn_interval, 1
+        )
+        if delay > 0:
+            return
+        try:
+            await bot.send_message(chat.id, self.WARNING_TEXT)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Не удалось отправить предупреждение: %s", e)
+
+
+class SendRateLimitMiddleware(BaseRequestMiddleware):
+    """Исходящие лимиты Telegram для всех вызовов API с chat_id
+    (message.answer, send_message, edit_message_text и т.д.).
+
+    Вызовы ждут токены ведра чата (личный чат — chat_rate в секунду,
+    группа — group_per_minute в минуту) и общего ведра бота, то есть
+    выстраиваются в очередь вместо ответа 429. Одинаковые вызовы в один
+    чат, пока первый ещё ждёт отправки, объединяются в один. Если Telegram
+    всё же ответил 429, вызов повторяется через retry_after.
+    """
+
+    def __init__(
+        self,
+        limiter,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        group_per_minute: int = 20,
+        max_retries: int = 3,
+    ) -> None:
+        self.limiter = limiter
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_per_minute = group_per_minute
+        self.max_retries = max_retries
+        self._pending: Dict[tuple, asyncio.Future] = {}
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        key = None
+        if isinstance(method, SendMessage):
+            # repr, а не JSON: в полях бывают Default(...) из настроек бота
+            key = (bot.id, chat_id, repr(method))
+            pending = self._pending.get(key)
+            if pending is not None:
+                return await asyncio.shield(pending)
+
+        task = asyncio.ensure_future(
+            self._send(make_request, bot, method, chat_id)
+        )
+        if key is not None:
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _send(self, make_request, bot, method, chat_id):
+        if isinstance(chat_id, int) and chat_id > 0:
+            rate, burst = self.chat_rate, self.chat_burst
+        else:
+            rate, burst = self.group_per_minute / 60, self.group_per_minute
+        # Сначала ведро чата, потом общее: пока сообщение ждёт своей
+        # очереди в чате, оно не занимает общий лимит
+        if rate > 0:
+            await wait_for_token(self.limiter, f"send:{chat_id}", rate, burst)
+        if self.global_rate > 0:
+            await wait_for_token(self.limiter, "send", self.global_rate,
+                                 max(int(self.global_rate), 1))
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(
+                    "Telegram 429 для чата %s, повтор через %s с",
+                    chat_id, e.retry_after,
+                )
+                await asyncio.sleep(e.retry_after)
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRejected(Exception):
+    """Получатель окончательно отклонил сообщение — повторять бесполезно."""
+
+
+class Outbox:
+    """Надёжная очередь исходящих сообщений на SQLite.
+
+    Сообщение сначала записывается на диск, затем доставляется фоновым
+    воркером. Неудачные попытки повторяются с экспоненциальной задержкой
+    и случайным разбросом (full jitter). Сообщения, отклонённые
+    получателем (OutboxRejected), помечаются как «мёртвые» и остаются
+    в файле для разбора.
+
+    deliver — корутина, принимающая payload; None или исключение
+    означают временную ошибку.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        deliver,
+        retry_base: float = 1.0,
+        retry_max: float = 300.0,
+        batch_size: int = 50,
+    ) -> None:
+        self.path = path
+        self._deliver = deliver
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.batch_size = batch_size
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " key TEXT NOT NULL UNIQUE,"
+            " payload TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_attempt_at REAL NOT NULL,"
+            " dead INTEGER NOT NULL DEFAULT 0,"
+            " last_error TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_due"
+            " ON outbox (dead, next_attempt_at)"
+        )
+        self._conn.commit()
+        self._wakeup = asyncio.Event()
+        self._worker = None
+
+    async def put(self, key: str, payload: dict) -> None:
+        """Сохраняет сообщение; повторный key игнорируется."""
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR IGNORE INTO outbox (key, payload, next_attempt_at)"
+            " VALUES (?, ?, ?)",
+            (key, json.dumps(payload, ensure_ascii=False), time.time()),
+        )
+        self._wakeup.set()
+
+    def pending_count(self) -> int:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE dead = 0"
+            ).fetchone()
+        return row[0]
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает воркер; недоставленное остаётся на диске."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        with self._db_lock:
+            self._conn.close()
+
+    async def _run(self) -> None:
+        while True:
+            # Сбрасываем до выборки: put(), пришедший во время доставки,
+            # снова поднимет событие, и новое сообщение не будет ждать
+            # до следующего таймаута
+            self._wakeup.clear()
+            try:
+                delay = await self._deliver_due()
+            except Exception as e:  # noqa: BLE001
+                logger.exception("Ошибка воркера outbox: %s", e)
+                delay = self.retry_base
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver_due(self) -> float:
+        """Доставляет созревшие сообщения; возвращает паузу до следующих."""
+        rows = await asyncio.to_thread(
+            self._fetchall,
+            "SELECT id, payload, attempts FROM outbox"
+            " WHERE dead = 0 AND next_attempt_at <= ?"
+            " ORDER BY next_attempt_at LIMIT ?",
+            (time.time(), self.batch_size),
+        )
+        if rows:
+            await asyncio.gather(*(self._deliver_one(*row) for row in rows))
+            if len(rows) == self.batch_size:
+                return 0
+
+        row = await asyncio.to_thread(
+            self._fetchone,
+            "SELECT MIN(next_attempt_at) FROM outbox WHERE dead = 0",
+            (),
+        )
+        if row[0] is None:
+            return self.retry_max
+        return max(row[0] - time.time(), 0)
+
+    async def _deliver_one(self, row_id: int, payload: str, attempts: int):
+        try:
+            result = await self._deliver(json.loads(payload))
+            error = None if result is not None else "пустой ответ"
+        except OutboxRejected as e:
+            logger.error("Сообщение outbox #%s отклонено: %s", row_id, e)
+            await asyncio.to_thread(
+                self._execute,
+                "UPDATE outbox SET dead = 1, last_error = ? WHERE id = ?",
+                (str(e), row_id),
+            )
+            return
+        except Exception as e:  # noqa: BLE001
+            error = str(e) or e.__class__.__name__
+
+        if error is None:
+            await asyncio.to_thread(
+                self._execute, "DELETE FROM outbox WHERE id = ?", (row_id,)
+            )
+            return
+
+        attempts += 1
+        delay = random.uniform(
+            0, min(self.retry_max, self.retry_base * 2 ** attempts)
+        )
+        logger.warning(
+            "Не удалось доставить сообщение outbox #%s (попытка %d), "
+            "повтор через %.1f с: %s", row_id, attempts, delay, error
+        )
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE outbox SET attempts = ?, next_attempt_at = ?,"
+            " last_error = ? WHERE id = ?",
+            (attempts, time.time() + delay, error, row_id),
+        )
+
+    def _execute(self, sql: str, params) -> None:
+        with self._db_lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def _fetchall(self, sql: str, params):
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _fetchone(self, sql: str, params):
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchone()
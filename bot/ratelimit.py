@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import get_throttle_store
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryRateLimiter:
+    """Token bucket для множества ключей в памяти процесса.
+
+    hit() списывает один токен и возвращает 0, либо, если токенов нет,
+    возвращает время ожидания до следующего токена (ничего не списывая).
+    Ведра давно не активных ключей вытесняются по LRU.
+    """
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        self.maxsize = maxsize
+        # key -> (tokens, updated_at)
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def hit(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def close(self) -> None:
+        self._buckets.clear()
+
+
+# Тот же token bucket, атомарно на стороне Redis: ведра общие для всех
+# реплик бота. Время передаётся клиентом (часы реплик синхронизированы).
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter:
+    """Token bucket в Redis (общий для нескольких реплик бота)."""
+
+    def __init__(self, redis, prefix: str = "ratelimit") -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self._script = redis.register_script(_TOKEN_BUCKET_LUA)
+
+    async def hit(self, key: str, rate: float, burst: int) -> float:
+        result = await self._script(
+            keys=[f"{self.prefix}:{key}"], args=[rate, burst, time.time()]
+        )
+        if isinstance(result, bytes):
+            result = result.decode()
+        return float(result)
+
+    async def close(self) -> None:
+        # Соединение принадлежит FSM-хранилищу и закрывается вместе с ним
+        pass
+
+
+async def wait_for_token(
+    limiter, key: str, rate: float, burst: int,
+    max_wait: Optional[float] = None,
+) -> bool:
+    """Ждёт токен; False, если ожидание превысило бы max_wait."""
+    waited = 0.0
+    while True:
+        delay = await limiter.hit(key, rate, burst)
+        if delay <= 0:
+            return True
+        if max_wait is not None and waited + delay > max_wait:
+            return False
+        await asyncio.sleep(delay)
+        waited += delay
+
+
+def create_rate_limiter(storage=None):
+    """Хранилище ведер по настройке THROTTLE_STORE.
+
+    redis — Redis FSM-хранилища (лимиты общие для всех реплик);
+    memory — память процесса; auto — redis, если FSM-хранилище в Redis.
+    """
+    backend = get_throttle_store()
+    redis = getattr(storage, "redis", None)
+    if backend == "redis" and redis is None:
+        logger.warning(
+            "THROTTLE_STORE=redis требует FSM_STORAGE=redis, "
+            "используем память процесса"
+        )
+    if backend in ("redis", "auto") and redis is not None:
+        return RedisRateLimiter(redis)
+    return MemoryRateLimiter()
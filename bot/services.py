@@ -1,9 +1,47 @@
+import asyncio
+import json
 import logging
+import time
+import uuid
+import zlib
 
 import httpx
 
+from batching import MicroBatcher
+from broadcast import BroadcastWorker
+from cache import TTLCache
+from drafts import DraftCheckpointer
+from metrics import caches, track_request
+from outbox import Outbox, OutboxRejected
 from config import (
+    get_broadcast_chunk_size,
+    get_broadcast_concurrency,
+    get_broadcast_enabled,
+    get_broadcast_poll_interval,
+    get_broadcast_rate,
+    get_broadcast_worker_token,
+    get_draft_enabled,
+    get_draft_every,
+    get_draft_idle,
     get_external_api_url,
+    get_http2_enabled,
+    get_http_keepalive_expiry,
+    get_http_max_connections,
+    get_http_max_keepalive_connections,
+    get_outbox_enabled,
+    get_outbox_path,
+    get_outbox_retry_base,
+    get_outbox_retry_max,
+    get_submit_batch_delay,
+    get_submit_batch_enabled,
+    get_submit_batch_size,
+    get_survey_cache_fresh_ttl,
+    get_survey_cache_maxsize,
+    get_survey_cache_negative_ttl,
+    get_survey_cache_ttl,
+    get_user_cache_maxsize,
+    get_user_cache_negative_ttl,
+    get_user_cache_ttl,
     get_user_service_base_url,
     get_user_service_timeout,
 )
@@ -12,23 +50,88 @@ from config import (
 logger = logging.getLogger(__name__)
 
 
+# ---- Общий HTTP-клиент ----
+
+_http_client = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """HTTP-клиент с пулом и таймаутами из настроек (config.py)."""
+    http2 = get_http2_enabled()
+    if http2 and not _http2_available():
+        logger.warning(
+            "HTTP/2 запрошен, но пакет h2 не установлен — используем HTTP/1.1"
+        )
+        http2 = False
+
+    return httpx.AsyncClient(
+        timeout=get_user_service_timeout(),
+        limits=httpx.Limits(
+            max_connections=get_http_max_connections(),
+            max_keepalive_connections=get_http_max_keepalive_connections(),
+            keepalive_expiry=get_http_keepalive_expiry(),
+        ),
+        http2=http2,
+    )
+
+
+async def init_http_client():
+    """Создание общего HTTP-клиента с пулом keep-alive соединений.
+
+    Вызывается один раз при старте бота (см. main.py).
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = _create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Закрытие общего HTTP-клиента при остановке бота."""
+    global _http_client
+    if _http_client is None:
+        return
+    client, _http_client = _http_client, None
+    await client.aclose()
+
+
+def get_http_client():
+    """Возвращает общий HTTP-клиент.
+
+    Если клиент ещё не создан (например, сервисы вызваны вне main.py),
+    он создаётся с теми же настройками, что и в init_http_client.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = _create_http_client()
+    return _http_client
+
+
 async def call_external_api(value, payload_meta):
     url = get_external_api_url()
     if not url:
         return None
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            resp = await client.post(
-                url, json={"value": value, **payload_meta}
+        with track_request("call_external_api"):
+            resp = await get_http_client().post(
+                url, json={"value": value, **payload_meta}, timeout=5.0
             )
             resp.raise_for_status()
-            data = resp.json()
-            result = data.get("result")
-            if isinstance(result, int):
-                return result
-            if isinstance(result, str) and result.isdigit():
-                return int(result)
-            return None
+        data = resp.json()
+        result = data.get("result")
+        if isinstance(result, int):
+            return result
+        if isinstance(result, str) and result.isdigit():
+            return int(result)
+        return None
     except Exception as e:  # noqa: BLE001
         logger.warning(
             "Внешний API недоступен или вернул ошибку: %s", e
@@ -38,20 +141,41 @@ async def call_external_api(value, payload_meta):
 
 # ---- Пользовательский сервис (Django) ----
 
+_MISSING = object()
+
+user_cache = TTLCache(
+    maxsize=get_user_cache_maxsize(),
+    ttl=get_user_cache_ttl(),
+    negative_ttl=get_user_cache_negative_ttl(),
+)
+caches.add("user", user_cache)
+
+
+def get_user_cache_stats() -> dict:
+    """Счётчики попаданий/промахов кеша пользователей."""
+    return user_cache.stats()
+
+
 async def get_user_by_username(username):
     base = get_user_service_base_url()
     if not base or not username:
         return None
+
+    cached = user_cache.get(username, _MISSING)
+    if cached is not _MISSING:
+        return cached
+
     url = f"{base.rstrip('/')}/api/users/by-nickname/{username}/"
     try:
-        async with httpx.AsyncClient(
-            timeout=get_user_service_timeout()
-        ) as client:
-            resp = await client.get(url)
+        with track_request("get_user_by_username"):
+            resp = await get_http_client().get(url)
             if resp.status_code == 404:
+                user_cache.set_negative(username)
                 return None
             resp.raise_for_status()
-            return resp.json()
+        user = resp.json()
+        user_cache.set(username, user)
+        return user
     except Exception as e:  # noqa: BLE001
         logger.warning(
             "Не удалось получить пользователя из user-сервиса: %s", e
@@ -59,7 +183,8 @@ async def get_user_by_username(username):
         return None
 
 
-async def create_user(tg_nickname, name, surname, age, gender):
+async def create_user(tg_nickname, name, surname, age, gender,
+                      telegram_id=None):
     """Создание пользователя через API"""
     base = get_user_service_base_url()
     if not base:
@@ -71,43 +196,445 @@ async def create_user(tg_nickname, name, surname, age, gender):
         "surname": surname,
         "age": age,
         "gender": gender,
+        # Числовой id — адрес для рассылок о новых опросах
+        "telegram_id": telegram_id,
     }
     try:
-        async with httpx.AsyncClient(
-            timeout=get_user_service_timeout()
-        ) as client:
-            resp = await client.post(url, json=payload)
+        with track_request("create_user"):
+            resp = await get_http_client().post(url, json=payload)
             resp.raise_for_status()
-            return resp.json()
+        user = resp.json()
     except Exception as e:  # noqa: BLE001
         logger.warning(
             "Не удалось создать пользователя в user-сервисе: %s", e
         )
+        # Состояние на сервере неизвестно — сбрасываем запись целиком
+        user_cache.invalidate(tg_nickname)
+        return None
+
+    if tg_nickname:
+        user_cache.set(tg_nickname, user)
+    return user
+
+
+# ---- Опросы ----
+
+survey_cache = TTLCache(
+    maxsize=get_survey_cache_maxsize(),
+    ttl=get_survey_cache_ttl(),
+    negative_ttl=get_survey_cache_negative_ttl(),
+)
+
+caches.add("survey", survey_cache)
+
+# Загрузки, которые выполняются прямо сейчас: survey_id -> asyncio.Task
+_survey_loads = {}
+
+
+def get_survey_cache_stats() -> dict:
+    """Счётчики попаданий/промахов кеша опросов."""
+    return survey_cache.stats()
+
+
+def survey_version(survey_data) -> str:
+    """Короткая версия опроса по списку вопросов.
+
+    Хранится в сессии вместо самих вопросов: если опрос изменился
+    посреди прохождения, номер текущего вопроса больше ему не соответствует.
+    """
+    raw = json.dumps(
+        survey_data.get("questions") or [], ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return format(zlib.crc32(raw), "08x")
+
+
+async def get_survey(survey_id):
+    """Получение опроса с кешированием.
+
+    Свежая запись отдаётся без обращения к API, устаревшая —
+    перепроверяется условным запросом (If-None-Match). Параллельные
+    загрузки одного и того же опроса объединяются в один запрос.
+    """
+    base = get_user_service_base_url()
+    if not base:
         return None
 
+    entry = survey_cache.get(survey_id, _MISSING)
+    if entry is None:
+        return None
+    if entry is not _MISSING and (
+        time.monotonic() - entry["checked_at"] < get_survey_cache_fresh_ttl()
+    ):
+        return entry["data"]
+
+    task = _survey_loads.get(survey_id)
+    if task is None:
+        stale = entry if entry is not _MISSING else None
+        task = asyncio.ensure_future(_load_survey(base, survey_id, stale))
+        _survey_loads[survey_id] = task
+        task.add_done_callback(lambda _: _survey_loads.pop(survey_id, None))
+    # shield: отмена одного ожидающего не должна отменять общую загрузку
+    return await asyncio.shield(task)
+
+
+async def _load_survey(base, survey_id, stale):
+    url = f"{base.rstrip('/')}/api/surveys/{survey_id}/"
+    headers = {}
+    if stale and stale.get("etag"):
+        headers["If-None-Match"] = stale["etag"]
+    try:
+        with track_request("get_survey"):
+            resp = await get_http_client().get(url, headers=headers)
+            if resp.status_code == 304 and stale:
+                stale["checked_at"] = time.monotonic()
+                survey_cache.set(survey_id, stale)
+                return stale["data"]
+            if resp.status_code == 404:
+                survey_cache.set_negative(survey_id)
+                return None
+            resp.raise_for_status()
+        data = resp.json()
+    except Exception as e:  # noqa: BLE001
+        logger.warning("Не удалось получить опрос из API: %s", e)
+        # Лучше отдать устаревшую версию, чем ничего
+        return stale["data"] if stale else None
 
-async def submit_survey_response(survey_id, user_data, answers):
-    """Отправка ответов на опрос через API"""
+    survey_cache.set(survey_id, {
+        "data": data,
+        "etag": resp.headers.get("ETag"),
+        "checked_at": time.monotonic(),
+    })
+    return data
+
+
+async def submit_survey_response(
+    survey_id, telegram_user_id, telegram_username, answers
+):
+    """Отправка ответов на опрос через API.
+
+    Пользователь определяется бэкендом по telegram_user_id (или
+    telegram_username) в той же транзакции, что и запись ответа;
+    ответы незарегистрированного отклоняются (403).
+    Если включён outbox, ответы сохраняются на диск и доставляются
+    фоновым воркером — функция возвращается сразу после записи.
+    """
     base = get_user_service_base_url()
     if not base:
         return None
-    url = f"{base.rstrip('/')}/api/surveys/{survey_id}/submit/"
     payload = {
         "answers": answers,
-        "user_id": user_data.get("id"),
-        "telegram_user_id": str(user_data.get("user_id", "")),
-        "telegram_username": user_data.get("username", ""),
+        "telegram_user_id": str(telegram_user_id),
+        "telegram_username": telegram_username or "",
+        "submission_key": uuid.uuid4().hex,
     }
+    if _outbox is not None:
+        try:
+            await _outbox.put(
+                payload["submission_key"], {"survey_id": survey_id, **payload}
+            )
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Не удалось записать ответы в outbox: %s", e)
+        else:
+            return {"submission_key": payload["submission_key"], "queued": True}
+    if _submit_batcher is not None:
+        try:
+            return await _submit_batcher.submit(
+                {"survey_id": survey_id, **payload}
+            )
+        except OutboxRejected as e:
+            logger.warning("Ответы на опрос отклонены: %s", e)
+            return None
+    return await _post_survey_response(base, survey_id, payload)
+
+
+async def _send_survey_response(
+    base, survey_id, payload, name="submit_survey_response"
+):
+    """Отправка одного ответа. OutboxRejected — бэкенд отклонил ответ
+    окончательно (4xx, кроме 408 и 429), повторять бессмысленно."""
+    url = f"{base.rstrip('/')}/api/surveys/{survey_id}/submit/"
+    with track_request(name):
+        resp = await get_http_client().post(url, json=payload)
+        if resp.is_client_error and resp.status_code not in (408, 429):
+            raise OutboxRejected(f"{resp.status_code}: {resp.text[:200]}")
+        resp.raise_for_status()
+    return resp.json()
+
+
+async def _post_survey_response(base, survey_id, payload):
     try:
-        async with httpx.AsyncClient(
-            timeout=get_user_service_timeout()
-        ) as client:
-            resp = await client.post(url, json=payload)
-            resp.raise_for_status()
-            return resp.json()
+        return await _send_survey_response(base, survey_id, payload)
     except Exception as e:  # noqa: BLE001
         logger.warning(
             "Не удалось отправить ответы на опрос: %s", e
         )
         return None
 
+
+# ---- Пакетная отправка ответов ----
+
+_submit_batcher = None
+
+
+async def _submit_survey_batch(items):
+    base = get_user_service_base_url()
+    url = f"{base.rstrip('/')}/api/surveys/submit-batch/"
+    try:
+        with track_request("submit_survey_batch"):
+            resp = await get_http_client().post(url, json=items)
+        if resp.is_client_error:
+            # Один некорректный ответ не должен ронять всю пачку —
+            # отправляем по одному
+            logger.warning(
+                "Пакет ответов отклонён (%s), отправляем по одному",
+                resp.status_code,
+            )
+            return await _submit_one_by_one(base, items)
+        resp.raise_for_status()
+        ids = resp.json().get("ids", [])
+    except Exception as e:  # noqa: BLE001
+        logger.warning(
+            "Не удалось отправить пакет ответов на опросы: %s", e
+        )
+        return [None] * len(items)
+    return [
+        {"id": response_id, "survey": item["survey_id"]}
+        for item, response_id in zip(items, ids)
+    ]
+
+
+async def _submit_one_by_one(base, items):
+    """Результаты отправки по одному: окончательный отказ остаётся
+    исключением OutboxRejected (его получит ожидающий — outbox пометит
+    ответ мёртвым), прочие ошибки — None, ответ можно повторить."""
+    results = await asyncio.gather(*(
+        _send_survey_response(base, item["survey_id"], {
+            key: value for key, value in item.items() if key != "survey_id"
+        })
+        for item in items
+    ), return_exceptions=True)
+    for index, result in enumerate(results):
+        if isinstance(result, Exception) and not isinstance(
+            result, OutboxRejected
+        ):
+            logger.warning("Не удалось отправить ответы на опрос: %s", result)
+            results[index] = None
+    return results
+
+
+async def start_submit_batching() -> None:
+    """Включает пакетную отправку ответов (SUBMIT_BATCH_ENABLED)."""
+    global _submit_batcher
+    if _submit_batcher is None and get_submit_batch_enabled():
+        _submit_batcher = MicroBatcher(
+            _submit_survey_batch,
+            max_size=get_submit_batch_size(),
+            max_delay=get_submit_batch_delay(),
+        )
+
+
+async def stop_submit_batching() -> None:
+    """Досылает накопленные ответы; вызывается до закрытия HTTP-клиента."""
+    global _submit_batcher
+    if _submit_batcher is None:
+        return
+    batcher, _submit_batcher = _submit_batcher, None
+    await batcher.close()
+
+
+# ---- Outbox ----
+
+_outbox = None
+
+
+async def _deliver_survey_response(item):
+    """Доставка ответа из outbox. Исключение или None — повторить позже,
+    OutboxRejected (в том числе из пачки) — ответ отклонён окончательно."""
+    if _submit_batcher is not None:
+        return await _submit_batcher.submit(item)
+
+    payload = {key: value for key, value in item.items() if key != "survey_id"}
+    return await _send_survey_response(
+        get_user_service_base_url(), item["survey_id"], payload,
+        name="deliver_survey_response",
+    )
+
+
+async def start_outbox() -> None:
+    """Открывает outbox и запускает воркер доставки (OUTBOX_ENABLED)."""
+    global _outbox
+    if _outbox is not None or not get_outbox_enabled():
+        return
+    _outbox = Outbox(
+        get_outbox_path(),
+        _deliver_survey_response,
+        retry_base=get_outbox_retry_base(),
+        retry_max=get_outbox_retry_max(),
+    )
+    _outbox.start()
+    pending = _outbox.pending_count()
+    if pending:
+        logger.info("В outbox %d недоставленных ответов", pending)
+
+
+async def stop_outbox() -> None:
+    global _outbox
+    if _outbox is None:
+        return
+    outbox, _outbox = _outbox, None
+    await outbox.stop()
+
+
+# ---- Черновики анкет ----
+
+_drafts = None
+
+
+async def get_draft(survey_id, telegram_user_id):
+    """Сохранённый черновик прохождения опроса или None."""
+    base = get_user_service_base_url()
+    if not base or not get_draft_enabled():
+        return None
+    url = f"{base.rstrip('/')}/api/surveys/{survey_id}/draft/"
+    try:
+        with track_request("get_draft"):
+            resp = await get_http_client().get(
+                url, params={"telegram_user_id": str(telegram_user_id)}
+            )
+            if resp.status_code == 404:
+                return None
+            resp.raise_for_status()
+        return resp.json()
+    except Exception as e:  # noqa: BLE001
+        logger.warning("Не удалось получить черновик анкеты: %s", e)
+        return None
+
+
+async def _put_draft(key, payload):
+    survey_id, _ = key
+    base = get_user_service_base_url()
+    url = f"{base.rstrip('/')}/api/surveys/{survey_id}/draft/"
+    with track_request("put_draft"):
+        resp = await get_http_client().put(url, json=payload)
+        resp.raise_for_status()
+
+
+def checkpoint_draft(
+    survey_id, telegram_user_id, telegram_username, answers, version
+) -> None:
+    """Запоминает прогресс анкеты; запрос уйдёт каждые DRAFT_EVERY
+    ответов или после DRAFT_IDLE секунд тишины, а не на каждый ответ."""
+    if _drafts is None:
+        return
+    _drafts.update(
+        (survey_id, str(telegram_user_id)),
+        {
+            "telegram_user_id": str(telegram_user_id),
+            "telegram_username": telegram_username or "",
+            "answers": list(answers),
+            "version": version,
+        },
+        answered=len(answers),
+    )
+
+
+async def discard_draft(survey_id, telegram_user_id) -> None:
+    """Отменяет отложенное сохранение: анкета завершена, черновик на
+    бэкенде удалится вместе с записью ответа."""
+    if _drafts is not None:
+        await _drafts.discard((survey_id, str(telegram_user_id)))
+
+
+async def start_drafts() -> None:
+    global _drafts
+    if _drafts is None and get_draft_enabled() and get_user_service_base_url():
+        _drafts = DraftCheckpointer(
+            _put_draft, every=get_draft_every(), idle=get_draft_idle()
+        )
+
+
+async def stop_drafts() -> None:
+    """Досылает отложенные черновики; вызывается до закрытия HTTP-клиента."""
+    global _drafts
+    if _drafts is None:
+        return
+    drafts, _drafts = _drafts, None
+    await drafts.close()
+
+
+# ---- Рассылки о новых опросах ----
+
+_broadcasts = None
+# Имя воркера для аренды рассылок на бэкенде: уникально для процесса
+_broadcast_worker_id = f"bot-{uuid.uuid4().hex[:12]}"
+
+
+def _broadcast_headers() -> dict:
+    return {"X-Worker-Token": get_broadcast_worker_token()}
+
+
+async def _claim_broadcast(limit):
+    base = get_user_service_base_url()
+    url = f"{base.rstrip('/')}/api/broadcasts/claim/"
+    with track_request("claim_broadcast"):
+        resp = await get_http_client().post(
+            url,
+            json={"worker": _broadcast_worker_id, "limit": limit},
+            headers=_broadcast_headers(),
+        )
+        if resp.status_code == 204:
+            return None
+        resp.raise_for_status()
+    return resp.json()
+
+
+async def _report_broadcast(broadcast_id, progress):
+    """Прогресс рассылки и следующая пачка; None — продолжать нельзя
+    (аренда потеряна или бэкенд недоступен)."""
+    base = get_user_service_base_url()
+    url = f"{base.rstrip('/')}/api/broadcasts/{broadcast_id}/progress/"
+    try:
+        with track_request("report_broadcast"):
+            resp = await get_http_client().post(
+                url,
+                json={"worker": _broadcast_worker_id, **progress},
+                headers=_broadcast_headers(),
+            )
+            resp.raise_for_status()
+        return resp.json()
+    except Exception as e:  # noqa: BLE001
+        # Пачка не засчитана: после окончания аренды её повторят
+        logger.warning(
+            "Не удалось сохранить прогресс рассылки #%s: %s", broadcast_id, e
+        )
+        return None
+
+
+async def start_broadcasts(bot, rate_limiter) -> None:
+    global _broadcasts
+    if (
+        _broadcasts is None and get_broadcast_enabled()
+        and get_user_service_base_url()
+    ):
+        _broadcasts = BroadcastWorker(
+            bot,
+            _claim_broadcast,
+            _report_broadcast,
+            rate_limiter,
+            rate=get_broadcast_rate(),
+            concurrency=get_broadcast_concurrency(),
+            chunk_size=get_broadcast_chunk_size(),
+            poll_interval=get_broadcast_poll_interval(),
+        )
+        _broadcasts.start()
+
+
+async def stop_broadcasts() -> None:
+    """Досылает текущую пачку рассылки; вызывается до закрытия
+    HTTP-клиента."""
+    global _broadcasts
+    if _broadcasts is None:
+        return
+    broadcasts, _broadcasts = _broadcasts, None
+    await broadcasts.stop()
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (
+    BaseStorage,
+    DefaultKeyBuilder,
+    StateType,
+    StorageKey,
+)
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import (
+    get_fsm_data_ttl,
+    get_fsm_state_ttl,
+    get_fsm_storage_backend,
+    get_fsm_storage_path,
+    get_redis_url,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def compact_dumps(obj) -> str:
+    """Компактная сериализация данных FSM (без пробелов, UTF-8 как есть)."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def compact_loads(raw):
+    return json.loads(raw)
+
+
+class FileStorage(BaseStorage):
+    """FSM-хранилище в JSON-файле.
+
+    Переживает перезапуск бота, но рассчитано на один процесс:
+    для локальной разработки и тестов. Для нескольких воркеров
+    используйте Redis.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.key_builder = DefaultKeyBuilder(with_destiny=True)
+        self._records: Dict[str, Dict[str, Any]] = self._read()
+        self._lock = asyncio.Lock()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        await self._update(key, "state", value)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return self._records.get(self.key_builder.build(key), {}).get("state")
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._update(key, "data", dict(data) or None)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = self._records.get(self.key_builder.build(key), {})
+        return dict(record.get("data") or {})
+
+    async def close(self) -> None:
+        pass
+
+    async def _update(self, key: StorageKey, field: str, value) -> None:
+        record_key = self.key_builder.build(key)
+        async with self._lock:
+            record = self._records.setdefault(record_key, {})
+            if value is None:
+                record.pop(field, None)
+            else:
+                record[field] = value
+            if not record:
+                del self._records[record_key]
+            self._write()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return compact_loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logger.warning("Файл FSM-хранилища повреждён, начинаем с нуля: %s", e)
+            return {}
+
+    def _write(self) -> None:
+        # Пишем во временный файл и атомарно подменяем, чтобы не получить
+        # полузаписанный JSON при падении процесса
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(compact_dumps(self._records))
+        os.replace(tmp_path, self.path)
+
+
+def _create_redis_storage(redis=None):
+    try:
+        from aiogram.fsm.storage.redis import RedisStorage
+    except ImportError as e:
+        raise RuntimeError(
+            "Для FSM_STORAGE=redis нужен пакет redis (pip install redis)"
+        ) from e
+
+    kwargs = {
+        "key_builder": DefaultKeyBuilder(with_destiny=True),
+        "state_ttl": get_fsm_state_ttl() or None,
+        "data_ttl": get_fsm_data_ttl() or None,
+        "json_dumps": compact_dumps,
+        "json_loads": compact_loads,
+    }
+    if redis is not None:
+        return RedisStorage(redis=redis, **kwargs)
+    return RedisStorage.from_url(get_redis_url(), **kwargs)
+
+
+def create_storage() -> BaseStorage:
+    """Создание FSM-хранилища по настройке FSM_STORAGE.
+
+    memory    — в памяти процесса (по умолчанию);
+    redis     — Redis (REDIS_URL), общий для нескольких воркеров;
+    fakeredis — Redis-совместимая заглушка в памяти, для тестов;
+    file      — JSON-файл (FSM_STORAGE_PATH), для локальной разработки.
+    """
+    backend = get_fsm_storage_backend()
+    if backend == "redis":
+        return _create_redis_storage()
+    if backend == "fakeredis":
+        try:
+            from fakeredis.aioredis import FakeRedis
+        except ImportError as e:
+            raise RuntimeError(
+                "Для FSM_STORAGE=fakeredis нужен пакет fakeredis"
+            ) from e
+        return _create_redis_storage(FakeRedis())
+    if backend == "file":
+        return FileStorage(get_fsm_storage_path())
+    if backend != "memory":
+        logger.warning(
+            "Неизвестный FSM_STORAGE=%r, используем память процесса", backend
+        )
+    return MemoryStorage()
+
+
+def create_events_isolation(storage: BaseStorage):
+    """Изоляция событий одного пользователя между воркерами.
+
+    Для Redis — распределённая блокировка, иначе — без изоляции.
+    """
+    create_isolation = getattr(storage, "create_isolation", None)
+    if create_isolation is None:
+        return None
+    return create_isolation()
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+from cache import TTLCache
+
+
+class TTLCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("cache.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entry_expires_after_ttl(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+
+        self.now += 59
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIn("a", cache)
+        self.now += 1
+        self.assertIsNone(cache.get("a", None))
+        self.assertNotIn("a", cache)
+        self.assertEqual(len(cache), 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # Чтение делает "a" свежей записью — вытесняется "b"
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+
+    def test_negative_entry_uses_own_ttl(self):
+        cache = TTLCache(maxsize=10, ttl=60, negative_ttl=5)
+        cache.set_negative("missing")
+
+        self.assertIsNone(cache.get("missing", "default"))
+        self.now += 5
+        self.assertEqual(cache.get("missing", "default"), "default")
+
+    def test_negative_entries_disabled_by_default(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set_negative("missing")
+
+        self.assertNotIn("missing", cache)
+
+    def test_stats_count_hits_and_misses(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b", None)
+        cache.invalidate("a")
+        cache.get("a", None)
+
+        self.assertEqual(cache.stats(), {
+            "size": 0, "maxsize": 10, "hits": 1, "misses": 2,
+            "hit_ratio": 1 / 3,
+        })
+
+    def test_zero_size_disables_cache(self):
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.set("a", 1)
+
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get("a", None))
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from outbox import Outbox, OutboxRejected
+
+
+class OutboxTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "outbox.sqlite3")
+        self.delivered = []
+
+    async def make_outbox(self, deliver, **options):
+        outbox = Outbox(self.path, deliver, **options)
+        self.addAsyncCleanup(outbox.stop)
+        return outbox
+
+    async def wait_for(self, predicate, timeout=2.0):
+        async with asyncio.timeout(timeout):
+            while not predicate():
+                await asyncio.sleep(0.01)
+
+    async def deliver(self, payload):
+        self.delivered.append(payload)
+        return {"id": len(self.delivered)}
+
+    async def test_delivers_and_deletes(self):
+        outbox = await self.make_outbox(self.deliver)
+        await outbox.put("k1", {"n": 1})
+        # Повторный ключ не дублирует сообщение
+        await outbox.put("k1", {"n": 1})
+        outbox.start()
+
+        await self.wait_for(lambda: outbox.pending_count() == 0)
+
+        self.assertEqual(self.delivered, [{"n": 1}])
+
+    async def test_retries_temporary_failures(self):
+        attempts = []
+
+        async def flaky(payload):
+            attempts.append(payload)
+            if len(attempts) < 3:
+                raise ConnectionError("backend down")
+            return {"id": 1}
+
+        outbox = await self.make_outbox(flaky, retry_base=0.01, retry_max=0.05)
+        await outbox.put("k1", {"n": 1})
+        outbox.start()
+
+        await self.wait_for(lambda: outbox.pending_count() == 0)
+
+        self.assertEqual(len(attempts), 3)
+
+    async def test_rejected_message_is_kept_dead(self):
+        async def reject(payload):
+            raise OutboxRejected("400: bad answer")
+
+        outbox = await self.make_outbox(reject)
+        await outbox.put("k1", {"n": 1})
+        outbox.start()
+
+        await self.wait_for(lambda: outbox.pending_count() == 0)
+
+        dead = outbox._fetchone(
+            "SELECT dead, last_error FROM outbox WHERE key = ?", ("k1",)
+        )
+        self.assertEqual(dead, (1, "400: bad answer"))
+
+    async def test_put_during_delivery_is_not_lost(self):
+        outbox = await self.make_outbox(self.deliver, retry_max=60)
+        deliver_due = outbox._deliver_due
+        calls = 0
+
+        async def deliver_due_then_put():
+            # Сообщение приходит, когда воркер уже посчитал паузу
+            nonlocal calls
+            calls += 1
+            delay = await deliver_due()
+            if calls == 1:
+                await outbox.put("k2", {"n": 2})
+            return delay
+
+        outbox._deliver_due = deliver_due_then_put
+        await outbox.put("k1", {"n": 1})
+        outbox.start()
+
+        await self.wait_for(lambda: len(self.delivered) == 2)
+
+        self.assertEqual(self.delivered, [{"n": 1}, {"n": 2}])
@@ -0,0 +1,85 @@
+import unittest
+from unittest import mock
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from handlers import operations
+from handlers.operations import OperationStates, draft_answers, load_progress
+from services import survey_version
+
+
+SURVEY = {"id": 1, "title": "Опрос", "questions": ["Q1", "Q2", "Q3"]}
+VERSION = survey_version(SURVEY)
+
+
+class DraftAnswersTests(unittest.TestCase):
+    def test_resumes_draft_of_same_version(self):
+        draft = {"version": VERSION, "answers": ["a"]}
+
+        self.assertEqual(draft_answers(draft, VERSION, 3), ["a"])
+
+    def test_discards_unusable_drafts(self):
+        for draft in (
+            None,
+            [],
+            {"answers": ["a"]},
+            {"version": "old", "answers": ["a"]},
+            {"version": VERSION},
+            {"version": VERSION, "answers": "a"},
+            {"version": VERSION, "answers": [1]},
+            {"version": VERSION, "answers": []},
+            {"version": VERSION, "answers": ["a", "b", "c"]},
+        ):
+            with self.subTest(draft=draft):
+                self.assertEqual(draft_answers(draft, VERSION, 3), [])
+
+
+class LoadProgressTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.state = FSMContext(
+            storage=MemoryStorage(),
+            key=StorageKey(bot_id=1, chat_id=2, user_id=2),
+        )
+        self.message = mock.AsyncMock()
+        patcher = mock.patch.object(
+            operations, "get_survey", mock.AsyncMock(return_value=SURVEY)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def load(self, data):
+        await self.state.set_data(data)
+        return await load_progress(self.message, self.state)
+
+    async def test_returns_valid_progress(self):
+        data = {
+            "survey_id": 1, "version": VERSION, "cursor": 1, "answers": ["a"],
+        }
+
+        self.assertEqual(await self.load(data), (data, SURVEY))
+        self.message.answer.assert_not_awaited()
+
+    async def test_restarts_on_broken_or_outdated_state(self):
+        for data in (
+            {},
+            {"survey_id": 1, "version": VERSION},
+            {"survey_id": 1, "version": VERSION, "cursor": 2,
+             "answers": ["a"]},
+            {"survey_id": 1, "version": "old", "cursor": 1,
+             "answers": ["a"]},
+            {"survey_id": 1, "version": VERSION, "cursor": 3,
+             "answers": ["a", "b", "c"]},
+        ):
+            with self.subTest(data=data):
+                self.message.reset_mock()
+
+                self.assertIsNone(await self.load(data))
+
+                self.assertEqual(await self.state.get_data(), {})
+                self.assertEqual(
+                    await self.state.get_state(),
+                    OperationStates.awaiting_number.state,
+                )
+                self.message.answer.assert_awaited_once()